@@ -10,7 +10,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Import your models
 from app.db.database import Base
-from app.db.models import FileSystem, Folder  # Import all your models
+from app.db.models import FileSystem, Folder, NoteTopic, GraphBuildJob, GraphSnapshot  # Import all your models
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,44 @@
+"""Add note_topics cache table
+
+Revision ID: 5a1f2c9d7e31
+Revises: 0304cf473149
+Create Date: 2026-10-18 09:12:04.318221
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1f2c9d7e31'
+down_revision: Union[str, None] = '0304cf473149'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('note_topics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('note_id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('model_name', sa.String(), nullable=False),
+    sa.Column('topic', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['note_id'], ['filesystem.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('note_id', 'model_name', name='uq_note_topics_note_model')
+    )
+    op.create_index(op.f('ix_note_topics_id'), 'note_topics', ['id'], unique=False)
+    op.create_index(op.f('ix_note_topics_note_id'), 'note_topics', ['note_id'], unique=False)
+    op.create_index('ix_note_topics_hash_model', 'note_topics', ['content_hash', 'model_name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_note_topics_hash_model', table_name='note_topics')
+    op.drop_index(op.f('ix_note_topics_note_id'), table_name='note_topics')
+    op.drop_index(op.f('ix_note_topics_id'), table_name='note_topics')
+    op.drop_table('note_topics')
@@ -0,0 +1,43 @@
+"""Add graph_build_jobs queue table
+
+Revision ID: 8c3e6b1f4a27
+Revises: 5a1f2c9d7e31
+Create Date: 2026-10-18 11:40:52.907113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3e6b1f4a27'
+down_revision: Union[str, None] = '5a1f2c9d7e31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('graph_build_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('worker_id', sa.String(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_graph_build_jobs_id'), 'graph_build_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_graph_build_jobs_status'), 'graph_build_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_graph_build_jobs_status'), table_name='graph_build_jobs')
+    op.drop_index(op.f('ix_graph_build_jobs_id'), table_name='graph_build_jobs')
+    op.drop_table('graph_build_jobs')
@@ -0,0 +1,47 @@
+"""Add graph_snapshots and point build jobs at them
+
+Revision ID: b7d94e2a6c10
+Revises: 8c3e6b1f4a27
+Create Date: 2026-10-18 13:05:17.441962
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d94e2a6c10'
+down_revision: Union[str, None] = '8c3e6b1f4a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('graph_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('node_count', sa.Integer(), nullable=False),
+    sa.Column('link_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_graph_snapshots_id'), 'graph_snapshots', ['id'], unique=False)
+    op.add_column('graph_build_jobs', sa.Column('snapshot_version', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_graph_build_jobs_snapshot_version', 'graph_build_jobs', 'graph_snapshots',
+        ['snapshot_version'], ['id'], ondelete='SET NULL'
+    )
+    op.drop_column('graph_build_jobs', 'result')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('graph_build_jobs', sa.Column('result', sa.Text(), nullable=True))
+    op.drop_constraint('fk_graph_build_jobs_snapshot_version', 'graph_build_jobs', type_='foreignkey')
+    op.drop_column('graph_build_jobs', 'snapshot_version')
+    op.drop_index(op.f('ix_graph_snapshots_id'), table_name='graph_snapshots')
+    op.drop_table('graph_snapshots')
@@ -0,0 +1,47 @@
+"""Add full-text search vector and GIN index to filesystem
+
+Revision ID: d41c8a7f9e03
+Revises: b7d94e2a6c10
+Create Date: 2026-10-18 16:20:43.108215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41c8a7f9e03'
+down_revision: Union[str, None] = 'b7d94e2a6c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Other databases use the in-process index in app.services.fulltext
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Generated column, so Postgres keeps it current on every insert, update and delete
+    op.execute(
+        """
+        ALTER TABLE filesystem ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(content, '')), 'B')
+        ) STORED
+        """
+    )
+    op.create_index(
+        'ix_filesystem_search_vector', 'filesystem', ['search_vector'],
+        unique=False, postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_filesystem_search_vector', table_name='filesystem')
+    op.drop_column('filesystem', 'search_vector')
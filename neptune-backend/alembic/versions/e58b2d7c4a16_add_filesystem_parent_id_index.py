@@ -0,0 +1,28 @@
+"""Add (parent_id, id) index to filesystem for paginated listings
+
+Revision ID: e58b2d7c4a16
+Revises: d41c8a7f9e03
+Create Date: 2026-10-18 19:42:08.513207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e58b2d7c4a16'
+down_revision: Union[str, None] = 'd41c8a7f9e03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_filesystem_parent_id_id', 'filesystem', ['parent_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_filesystem_parent_id_id', table_name='filesystem')
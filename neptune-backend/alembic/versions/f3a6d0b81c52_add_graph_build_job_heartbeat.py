@@ -0,0 +1,28 @@
+"""Add heartbeat_at to graph_build_jobs
+
+Revision ID: f3a6d0b81c52
+Revises: e58b2d7c4a16
+Create Date: 2026-10-18 21:05:37.204615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a6d0b81c52'
+down_revision: Union[str, None] = 'e58b2d7c4a16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('graph_build_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('graph_build_jobs', 'heartbeat_at')
@@ -1,30 +1,51 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session, undefer
 from app.db.database import get_db
 from app.db.models import FileSystem
-from app.schemas.file_system import FileSystemItem, FileSystemCreate, FileSystemUpdate, FileSystemListResponse
+from app.schemas.file_system import FileSystemItem, FileSystemCreate, FileSystemUpdate, FileSystemListResponse, FileSystemListingItem
 from pydantic import BaseModel
 from datetime import datetime
 from app.services.knowledge_graph import schedule_knowledge_graph_update
-from typing import Dict, Any
+from app.services.topic_cache import invalidate_note_topics
+from app.services.note_index import schedule_note_index_removal, schedule_note_index_update
+from app.services.fulltext import index_note_text, remove_note_text
+from app.services.filesystem_listing import list_page, listing_response, page_size, parse_fields
+from typing import Dict, Any, Optional
 
 router = APIRouter()
 class ContentUpdate(BaseModel):
     content: str
 
-@router.get("/", response_model=list[FileSystemItem])
-async def get_file_system(parent_id: int = None, db: Session = Depends(get_db)):
-    """Get all files and folders optionally filtered by parent_id"""
-    query = db.query(FileSystem)
-    if parent_id is not None:
-        query = query.filter(FileSystem.parent_id == parent_id)
-    else:
-        query = query.filter(FileSystem.parent_id == None)  # Root items
+@router.get("/", response_model=list[FileSystemListingItem])
+async def get_file_system(
+    parent_id: int = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get files and folders, optionally filtered by parent_id.
+
+    Content is left out unless requested, e.g. fields=id,name,type,content. Every
+    item is returned unless `limit` is given; then pass the X-Next-Cursor response
+    header back as `after` for the next page.
+    """
+    try:
+        columns = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    limit = page_size(limit)
+    
+    def in_folder(query):
+        if parent_id is not None:
+            return query.filter(FileSystem.parent_id == parent_id)
+        return query.filter(FileSystem.parent_id == None)  # Root items
     
-    items = query.all()
+    rows, next_cursor = list_page(db, columns, limit, after, in_folder)
     
     # Create default note if nothing exists
-    if not items and parent_id is None:
+    if not rows and parent_id is None and after is None:
         default_note = FileSystem(
             name="Untitled Note",
             type="file",
@@ -34,23 +55,10 @@ async def get_file_system(parent_id: int = None, db: Session = Depends(get_db)):
         db.add(default_note)
         db.commit()
         db.refresh(default_note)
-        return [FileSystemItem(
-            id=default_note.id,
-            name=default_note.name,
-            type=default_note.type,
-            parent_id=default_note.parent_id,
-            content=default_note.content
-        )]
+        index_note_text(db, default_note.id, default_note.name, default_note.content)
+        rows, next_cursor = list_page(db, columns, limit, None, in_folder)
     
-    return [
-        FileSystemItem(
-            id=item.id,
-            name=item.name,
-            type=item.type,
-            parent_id=item.parent_id,
-            content=item.content
-        ) for item in items
-    ]
+    return listing_response(rows, next_cursor)
 
 @router.post("/", response_model=FileSystemItem)
 async def create_file_system_item(item: FileSystemCreate, db: Session = Depends(get_db)):
@@ -64,6 +72,8 @@ async def create_file_system_item(item: FileSystemCreate, db: Session = Depends(
     db.add(db_item)
     db.commit()
     db.refresh(db_item)
+    if db_item.type == "file":
+        index_note_text(db, db_item.id, db_item.name, db_item.content)
     return FileSystemItem(
         id=db_item.id,
         name=db_item.name,
@@ -76,7 +86,6 @@ async def create_file_system_item(item: FileSystemCreate, db: Session = Depends(
 async def update_file_content(
     item_id: int, 
     data: dict, 
-    background_tasks: BackgroundTasks,  # Add this parameter
     db: Session = Depends(get_db)
 ):
     """Update file content and trigger knowledge graph update"""
@@ -84,12 +93,16 @@ async def update_file_content(
     if content is None:
         raise HTTPException(status_code=400, detail="Content field is required")
         
-    db_item = db.query(FileSystem).filter(FileSystem.id == item_id).first()
+    db_item = db.query(FileSystem).options(undefer(FileSystem.content)).filter(FileSystem.id == item_id).first()
     if not db_item:
         raise HTTPException(status_code=404, detail="File not found")
     if db_item.type != "file":
         raise HTTPException(status_code=400, detail="Cannot set content for folders")
     
+    # Cached topics only apply to the old content
+    if db_item.content != content:
+        invalidate_note_topics(db, item_id)
+    
     # Update the content
     db_item.content = content
     db_item.updated_at = datetime.utcnow()
@@ -98,8 +111,10 @@ async def update_file_content(
     db.commit()
     db.refresh(db_item)
     
-    # Schedule knowledge graph update in the background
-    schedule_knowledge_graph_update(background_tasks, db)
+    # Schedule a debounced knowledge graph update and re-embed the note for search
+    schedule_knowledge_graph_update(db)
+    schedule_note_index_update(db_item.id, db_item.name, db_item.content)
+    index_note_text(db, db_item.id, db_item.name, db_item.content)
     
     # Return the updated item
     return FileSystemItem(
@@ -113,7 +128,7 @@ async def update_file_content(
 @router.get("/{item_id}", response_model=FileSystemItem)
 async def get_file_by_id(item_id: int, db: Session = Depends(get_db)):
     """Get a specific file or folder by ID"""
-    item = db.query(FileSystem).filter(FileSystem.id == item_id).first()
+    item = db.query(FileSystem).options(undefer(FileSystem.content)).filter(FileSystem.id == item_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     return FileSystemItem(
@@ -127,7 +142,6 @@ async def get_file_by_id(item_id: int, db: Session = Depends(get_db)):
 @router.delete("/{item_id}", response_model=Dict[str, Any])
 async def delete_file_system_item(
     item_id: int,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Delete a file or folder and trigger knowledge graph update"""
@@ -142,12 +156,16 @@ async def delete_file_system_item(
         if children > 0:
             raise HTTPException(status_code=400, detail="Cannot delete folder with children")
     
+    # Drop cached topics for the note before removing it
+    invalidate_note_topics(db, item_id)
+    
     # Delete the item
     db.delete(db_item)
     db.commit()
     
     # Schedule knowledge graph update in the background to reflect the removal
-    from app.services.knowledge_graph import schedule_knowledge_graph_update
-    schedule_knowledge_graph_update(background_tasks, db)
+    schedule_knowledge_graph_update(db)
+    schedule_note_index_removal(item_id)
+    remove_note_text(db, item_id)
     
     return {"success": True, "message": f"Item {item_id} deleted successfully"}
\ No newline at end of file
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.db.database import get_db
 from app.db.models import FileSystem
 from app.schemas.file_system import FolderCreate, FolderResponse
+from app.services.filesystem_listing import list_page, listing_response, page_size
 
 router = APIRouter()
 
@@ -33,5 +34,7 @@ def get_folder(folder_id: int, db: Session = Depends(get_db)):
     return folder
 
 @router.get("/", response_model=list[FolderResponse])
-def list_folders(db: Session = Depends(get_db)):
-    return db.query(FileSystem).all()
\ No newline at end of file
+def list_folders(limit: Optional[int] = Query(None, ge=1), after: Optional[int] = None, db: Session = Depends(get_db)):
+    """List every entry, or pages of `limit` when given; pass the X-Next-Cursor response header back as `after`"""
+    rows, next_cursor = list_page(db, ["id", "name", "parent_id"], page_size(limit), after)
+    return listing_response(rows, next_cursor)
\ No newline at end of file
@@ -1,27 +1,98 @@
-from fastapi import APIRouter, Depends, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict
+from typing import Dict, Optional
 
 from app.db.database import get_db
-from app.services.knowledge_graph import generate_knowledge_graph, get_cached_graph_data
+from app.services import wire_format
+from app.services.llm_limits import LLMUnavailableError
+from app.services.graph_snapshots import LoadedSnapshot, etag_matches, get_graph_changes, get_latest_snapshot
+from app.services.knowledge_graph import (
+    refresh_knowledge_graph_now,
+    schedule_knowledge_graph_update,
+    stream_knowledge_graph_build,
+)
 
 router = APIRouter()
 
+# ?format=columnar selects the dictionary-encoded, parallel-array payload
+GraphFormat = Query(None, alias="format", pattern="^(columnar|rows)$")
+
+def snapshot_response(
+    snapshot: LoadedSnapshot,
+    request: Request,
+    wire: Optional[str] = None,
+    conditional: bool = False
+) -> Response:
+    """
+    Serve a snapshot with its version headers, in the wire format and content
+    coding the client asked for. Each representation is encoded once per version
+    and has its own ETag; with conditional set, a matching If-None-Match gets a
+    304 carrying the same headers.
+    """
+    columnar = wire == "columnar"
+    media_type = wire_format.negotiate_media_type(request.headers.get("accept"))
+    encoding = wire_format.negotiate_encoding(request.headers.get("accept-encoding"))
+    body, applied = snapshot.render(columnar, media_type, encoding)
+    headers = {
+        "ETag": snapshot.etag_for(columnar, media_type, applied),
+        "X-Graph-Version": str(snapshot.version),
+        # The representation depends on these request headers, so shared caches must key on them
+        "Vary": "Accept, Accept-Encoding",
+    }
+    # Unchanged graph: let the client reuse its copy
+    if conditional and etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if applied:
+        headers["Content-Encoding"] = applied
+    return Response(content=body, media_type=media_type, headers=headers)
+
 @router.get("/", response_model=Dict)
-async def get_knowledge_graph(
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
+async def get_knowledge_graph(request: Request, wire: Optional[str] = GraphFormat, db: Session = Depends(get_db)):
     """Get the knowledge graph data for visualization"""
-    # Get current cached data
-    graph_data = get_cached_graph_data()
+    snapshot = get_latest_snapshot(db)
     
-    # Schedule update for next time
-    background_tasks.add_task(generate_knowledge_graph, db)
+    # Saves and deletes already schedule rebuilds, so only build here when nothing exists yet
+    if snapshot is None:
+        schedule_knowledge_graph_update(db)
+        return {"nodes": [], "links": []}
     
-    return graph_data
+    return snapshot_response(snapshot, request, wire, conditional=True)
+
+@router.get("/changes", response_model=Dict)
+async def get_knowledge_graph_changes(since: int, db: Session = Depends(get_db)):
+    """
+    Get node and link changes since a graph version (from the X-Graph-Version header).
+    Falls back to the full graph when that version is no longer available.
+    """
+    changes = get_graph_changes(db, since)
+    if changes is None:
+        return {"version": None, "since": since, "full": True, "graph": {"nodes": [], "links": []}}
+    return changes
+
+@router.get("/stream")
+async def stream_knowledge_graph(db: Session = Depends(get_db)):
+    """
+    Refresh the knowledge graph and stream it as Server-Sent Events while it builds:
+    "node" and "link" events as they are known, then "complete" with the graph version
+    """
+    return StreamingResponse(
+        stream_knowledge_graph_build(db),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/refresh", response_model=Dict)
-async def refresh_knowledge_graph(db: Session = Depends(get_db)):
-    """Force refresh the knowledge graph and wait for the results"""
-    return await generate_knowledge_graph(db)
\ No newline at end of file
+async def refresh_knowledge_graph(request: Request, wire: Optional[str] = GraphFormat, db: Session = Depends(get_db)):
+    """Force refresh the knowledge graph and wait for the results, joining a running build"""
+    try:
+        snapshot = await refresh_knowledge_graph_now(db)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Knowledge graph build is still running")
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if snapshot is None:
+        return {"nodes": [], "links": []}
+    return snapshot_response(snapshot, request, wire)
\ No newline at end of file
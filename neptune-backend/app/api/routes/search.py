@@ -0,0 +1,60 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any
+
+from app.core.config import config
+from app.db.database import get_db
+from app.db.models import FileSystem
+from app.services.note_index import search_notes
+from app.services.fulltext import search_note_text
+
+router = APIRouter()
+
+@router.get("/", response_model=List[Dict[str, Any]])
+async def search(
+    q: str = Query(..., min_length=1),
+    k: int = Query(None, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Semantic search over notes, ranked by embedding similarity to the query.
+    Only the matched notes are read from the database.
+    """
+    if not config.NOTE_INDEX_ENABLED:
+        raise HTTPException(status_code=503, detail="Search index is disabled")
+    try:
+        # Embedding the query is CPU-bound, keep it off the event loop
+        matches = await asyncio.to_thread(search_notes, q, k or config.SEARCH_TOP_K)
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    if not matches:
+        return []
+    rows = db.query(FileSystem.id, FileSystem.name, FileSystem.parent_id).filter(
+        FileSystem.id.in_([note_id for note_id, _ in matches])
+    ).all()
+    by_id = {row.id: row for row in rows}
+    
+    return [
+        {
+            "id": note_id,
+            "name": by_id[note_id].name,
+            "parent_id": by_id[note_id].parent_id,
+            "score": round(score, 4)
+        }
+        for note_id, score in matches
+        if note_id in by_id  # Deleted since the index was last updated
+    ]
+
+@router.get("/text", response_model=List[Dict[str, Any]])
+async def search_text(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Keyword search over note names and content, ranked, with matches in the
+    snippet wrapped in <mark>...</mark>
+    """
+    return search_note_text(db, q, limit)
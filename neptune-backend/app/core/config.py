@@ -8,5 +8,59 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key")
     ALGORITHM = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+    LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", 30))
+    LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", 0))
+    # Account quota shared by every request of the process; 0 means unlimited
+    LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 0))
+    LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 0))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+    LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 0.5))
+    LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", 30))
+    LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", 5))
+    LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", 30))
+    # Notes longer than this (estimated tokens) are split along headings and classified per chunk
+    NOTE_CHUNK_TOKENS = int(os.getenv("NOTE_CHUNK_TOKENS", 750))
+    NOTE_MAX_CHUNKS = int(os.getenv("NOTE_MAX_CHUNKS", 8))
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 100000))
+    # "llm" extracts note topics with the chat model, "keybert" locally with NoteGraphModel
+    TOPIC_BACKEND = os.getenv("TOPIC_BACKEND", "llm")
+    LOCAL_TOPIC_BATCH_SIZE = int(os.getenv("LOCAL_TOPIC_BATCH_SIZE", 64))
+    # "llm" scores topic pairs with the chat model, "embedding" uses local sentence embeddings
+    RELATIONSHIP_BACKEND = os.getenv("RELATIONSHIP_BACKEND", "llm")
+    RELATIONSHIP_TOP_K = int(os.getenv("RELATIONSHIP_TOP_K", 5))
+    RELATIONSHIP_THRESHOLD = float(os.getenv("RELATIONSHIP_THRESHOLD", 0.3))
+    RELATIONSHIP_SHARD_TOKEN_BUDGET = int(os.getenv("RELATIONSHIP_SHARD_TOKEN_BUDGET", 1500))
+    # Same sentence-transformer KeyBERT uses in NoteGraphModel
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    NOTE_INDEX_ENABLED = os.getenv("NOTE_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+    NOTE_INDEX_PATH = os.getenv("NOTE_INDEX_PATH", ".cache/note_index")
+    SEARCH_TOP_K = int(os.getenv("SEARCH_TOP_K", 10))
+    # Load the local models the configured backends need at startup rather than on the first request
+    MODEL_WARMUP = os.getenv("MODEL_WARMUP", "false").lower() in ("1", "true", "yes")
+    # Unload local models unused for this long, 0 keeps them loaded
+    MODEL_IDLE_UNLOAD_SECONDS = float(os.getenv("MODEL_IDLE_UNLOAD_SECONDS", 0))
+    # Largest page a filesystem or folder listing returns when the client passes limit
+    FILESYSTEM_MAX_PAGE_SIZE = int(os.getenv("FILESYSTEM_MAX_PAGE_SIZE", 1000))
+    # Responses at least this large are gzip (or brotli) compressed, 0 disables compression
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+    # Compact, memory-mappable copy of the latest built graph; empty disables it
+    GRAPH_STORE_PATH = os.getenv("GRAPH_STORE_PATH", ".cache/topic_graph.bin")
+    GRAPH_REBUILD_DEBOUNCE_SECONDS = float(os.getenv("GRAPH_REBUILD_DEBOUNCE_SECONDS", 2.0))
+    # "inline" builds inside the API process, "worker" queues jobs for `python -m app.worker`
+    GRAPH_BUILD_MODE = os.getenv("GRAPH_BUILD_MODE", "inline")
+    GRAPH_WORKER_POLL_SECONDS = float(os.getenv("GRAPH_WORKER_POLL_SECONDS", 1.0))
+    # A running job whose worker hasn't heartbeated for the timeout is handed to another worker
+    GRAPH_JOB_TIMEOUT_SECONDS = float(os.getenv("GRAPH_JOB_TIMEOUT_SECONDS", 900))
+    GRAPH_JOB_HEARTBEAT_SECONDS = float(os.getenv("GRAPH_JOB_HEARTBEAT_SECONDS", 30))
+    GRAPH_REFRESH_TIMEOUT_SECONDS = float(os.getenv("GRAPH_REFRESH_TIMEOUT_SECONDS", 300))
+    GRAPH_SNAPSHOT_RETENTION = int(os.getenv("GRAPH_SNAPSHOT_RETENTION", 20))
+    GRAPH_LAYOUT_ITERATIONS = int(os.getenv("GRAPH_LAYOUT_ITERATIONS", 100))
+    GRAPH_LAYOUT_WARM_ITERATIONS = int(os.getenv("GRAPH_LAYOUT_WARM_ITERATIONS", 30))
+    # Largest share of added/removed nodes for which the previous layout is reused as a start
+    GRAPH_LAYOUT_WARM_START_MAX_CHANGE = float(os.getenv("GRAPH_LAYOUT_WARM_START_MAX_CHANGE", 0.25))
 
 config = Config()
\ No newline at end of file
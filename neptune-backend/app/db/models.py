@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -9,14 +10,62 @@ class FileSystem(Base):
     name = Column(String, nullable=False)
     type = Column(String, nullable=False)  # 'file' or 'folder'
     parent_id = Column(Integer, ForeignKey("filesystem.id"), nullable=True)
-    content = Column(Text, nullable=True)  # Content for files
+    # Loaded on first access (or with undefer()), so listings don't pull note bodies
+    content = deferred(Column(Text, nullable=True))  # Content for files
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination of a folder's children
+        Index("ix_filesystem_parent_id_id", "parent_id", "id"),
+    )
+
 class Folder(Base):
     __tablename__ = 'folders'
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class NoteTopic(Base):
+    """Cached topic extraction result for a single note's content under a given model"""
+    __tablename__ = "note_topics"
+
+    id = Column(Integer, primary_key=True, index=True)
+    note_id = Column(Integer, ForeignKey("filesystem.id", ondelete="CASCADE"), nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 of the note content
+    model_name = Column(String, nullable=False)
+    topic = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("note_id", "model_name", name="uq_note_topics_note_model"),
+        Index("ix_note_topics_hash_model", "content_hash", "model_name"),
+    )
+
+class GraphBuildJob(Base):
+    """Queued knowledge graph rebuild, claimed and run by an out-of-process worker"""
+    __tablename__ = "graph_build_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="pending", index=True)  # pending, running, done, failed
+    run_after = Column(DateTime, nullable=False, server_default=func.now())  # Debounce: not claimable before this
+    worker_id = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    snapshot_version = Column(Integer, ForeignKey("graph_snapshots.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # Renewed by the running worker; stale means it died
+    finished_at = Column(DateTime, nullable=True)
+
+class GraphSnapshot(Base):
+    """Versioned knowledge graph as served to the frontend; the id is the graph version"""
+    __tablename__ = "graph_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    data = Column(Text, nullable=False)  # JSON graph data for the frontend
+    content_hash = Column(String(64), nullable=False)  # sha256 of data, unchanged rebuilds keep their version
+    node_count = Column(Integer, nullable=False, default=0)
+    link_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now())
@@ -0,0 +1,76 @@
+"""
+Measure how long the API process takes to import, which bounds how fast a cold
+start or a new replica can serve requests.
+
+Run from neptune-backend:
+    python -m app.import_benchmark
+    python -m app.import_benchmark --module app.main --top 20 --max-ms 1500
+
+Each run imports the module in a fresh interpreter with `python -X importtime`
+and reports the total plus the slowest imports. With --max-ms it exits non-zero
+when the median total exceeds the budget, so it can guard startup in CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Imported on first use only; showing up here means something imports them eagerly again
+DEFERRED_MODULES = ["matplotlib", "plotly", "openai", "keybert", "transformers", "sentence_transformers"]
+
+def measure_import(module: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Import module in a fresh interpreter.
+
+    Returns:
+        (total microseconds, {imported module: cumulative microseconds})
+    """
+    env = dict(os.environ)
+    # Modules that read settings at import time need something to read
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env.setdefault("NOTE_INDEX_ENABLED", "false")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative[name.strip()] = int(cumulative_us)
+    return cumulative.get(module, 0), cumulative
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--max-ms", type=float, default=0, help="Fail when the median exceeds this")
+    args = parser.parse_args(argv)
+
+    totals = []
+    for _ in range(args.runs):
+        total, cumulative = measure_import(args.module)
+        totals.append(total)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"import {args.module}: median {median_ms:.0f} ms, min {min(totals) / 1000:.0f} ms over {args.runs} runs")
+    print("\nSlowest imports (cumulative ms, last run):")
+    for name, us in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.1f}  {name}")
+
+    eager = [name for name in DEFERRED_MODULES if name in cumulative]
+    if eager:
+        print(f"\nImported eagerly but meant to load on first use: {', '.join(eager)}")
+
+    if args.max_ms and median_ms > args.max_ms:
+        print(f"\nOver budget: {median_ms:.0f} ms > {args.max_ms:.0f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
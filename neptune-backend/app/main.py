@@ -1,6 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import filesystem, folders, knowledge_graph
+from fastapi.middleware.gzip import GZipMiddleware
+from app.core.config import config
+from app.services import wire_format
+from app.api.routes import filesystem, folders, knowledge_graph, search
+from app.services.knowledge_graph import load_latest_graph_on_startup
+from app.services.local_topics import warm_up_models
+from app.services.note_index import schedule_note_index_sync
 
 app = FastAPI()
 
@@ -10,8 +16,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the frontend read pagination and graph version headers
+    expose_headers=["X-Next-Cursor", "X-Graph-Version"],
 )
 
+if config.RESPONSE_COMPRESSION_MIN_BYTES:
+    # Graph snapshots arrive here already compressed and pass through untouched
+    app.add_middleware(GZipMiddleware, minimum_size=config.RESPONSE_COMPRESSION_MIN_BYTES, compresslevel=wire_format.GZIP_LEVEL)
+
 app.include_router(filesystem.router, prefix="/api/filesystem", tags=["filesystem"])
 app.include_router(folders.router, prefix="/api/folders", tags=["folders"])
 app.include_router(
@@ -19,6 +31,14 @@ app.include_router(
     prefix="/api/knowledge-graph",
     tags=["knowledge_graph"],
 )
+app.include_router(search.router, prefix="/api/search", tags=["search"])
+
+@app.on_event("startup")
+def load_knowledge_graph():
+    load_latest_graph_on_startup()
+    # Catch up on notes edited while the server was down
+    schedule_note_index_sync()
+    warm_up_models()
 
 @app.get("/")
 async def root():
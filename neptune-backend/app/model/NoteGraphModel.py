@@ -1,10 +1,18 @@
 import networkx as nx
 from datetime import datetime
-from transformers import pipeline
 import json
 import matplotlib.pyplot as plt
 import re
-from keybert import KeyBERT
+try:
+    from app.model.attribute_index import NodeAttributeIndex
+    from app.model.layout import force_layout
+    from app.model.markdown_extract import parse_note_md, parse_notes_md
+    from app.model.model_registry import get_keybert, get_text2text_pipeline
+except ImportError:  # Run from app/model, like NoteGraphModel_test
+    from attribute_index import NodeAttributeIndex
+    from layout import force_layout
+    from markdown_extract import parse_note_md, parse_notes_md
+    from model_registry import get_keybert, get_text2text_pipeline
 
 
 
@@ -17,23 +25,52 @@ class ContextManager:
             setattr(self, key, value)
 
 class NoteGraphModel:
-    def __init__(self, nlp_model=None, domain_model="facebook/bart-large", classes=None):
+    def __init__(self, nlp_model=None, domain_model="facebook/bart-large", classes=None, keyword_model='all-MiniLM-L6-v2'):
         """
         Initializes the NoteGraphModel.
         
         Args:
             nlp_model: A preloaded NLP model or pipeline for parsing notes into topics and relationships
             domain_model: A text-to-text generation model used for domain classification of courses.
+                None disables it (topic extraction doesn't need it).
             classes (list, optional): A list of course/class names for domain initialization.
+            keyword_model: Sentence-transformer name or loaded model KeyBERT embeds with.
+
+        Models load on first use through the shared model registry, so instances are
+        cheap and share one copy of each model.
         """
         self.graph = nx.Graph()
+        self.index = NodeAttributeIndex()
+        self.note_topics = {}  # note_id -> set of topics, to undo a note's contribution
         self.context = ContextManager()
-        self.kw_model = KeyBERT('all-MiniLM-L6-v2')
-        self.dmodel = pipeline("text2text-generation", model=domain_model)
+        self.domain_model = domain_model
+        self.keyword_model = keyword_model
+        self._kw_model = None
         
         if classes:
             self._init_domains(classes)
 
+    @property
+    def kw_model(self):
+        """KeyBERT, loaded on first use"""
+        if self._kw_model is not None:
+            return self._kw_model
+        if isinstance(self.keyword_model, str):
+            return get_keybert(self.keyword_model)
+        # A model object is private to this instance
+        from keybert import KeyBERT
+        self._kw_model = KeyBERT(self.keyword_model)
+        return self._kw_model
+
+    @kw_model.setter
+    def kw_model(self, model):
+        self._kw_model = model
+
+    @property
+    def dmodel(self):
+        """The domain classification pipeline, loaded on first use, or None"""
+        return get_text2text_pipeline(self.domain_model) if self.domain_model else None
+
     def _init_domains(self, classes):
         """
         Uses AI-powered domain classification to organize courses into domains and subdomains.
@@ -58,15 +95,15 @@ class NoteGraphModel:
             for domain, subdomains in domains.items():
                 if domain == "relate":
                     continue
-                self.graph.add_node(domain, type="domain")
+                self._add_node(domain, type="domain")
                 for sub in subdomains:
-                    self.graph.add_node(sub, type="subdomain")
-                    self.graph.add_edge(domain, sub, relation="has_subdomain")
+                    self._add_node(sub, type="subdomain")
+                    self._add_edge(domain, sub, relation="has_subdomain")
 
             for group in domains.get("relate", []):
                 for i in range(len(group)):
                     for j in range(i + 1, len(group)):
-                        self.graph.add_edge(group[i], group[j], relation="relate")
+                        self._add_edge(group[i], group[j], relation="relate")
         except json.JSONDecodeError:
             print("Failed to parse domain model output:", result)
 
@@ -81,6 +118,7 @@ class NoteGraphModel:
             type: domain, subdomain, topic
         """
         self.graph.add_node(node, **attrs)
+        self.index.reindex(node, self.graph.nodes[node])
     
     def _add_edge(self, src, dst, **attrs):
         """
@@ -91,16 +129,22 @@ class NoteGraphModel:
             dst: Destination node.
             **attrs: Arbitrary metadata
         """
+        for node in (src, dst):
+            if node not in self.graph:
+                self._add_node(node)
         self.graph.add_edge(src, dst, **attrs)
 
     def _parse_note(self, text, note_id):
         """
         Parses a note and updates the graph with new concepts or connections.
-        Extract topics and keywords using KeyBERT and chunk with GPT.
+        Extract topics and keywords using KeyBERT.
 
         Args:
             text (dict): dictionary of sentences with index
             note_id (str): Unique note identifier
+
+        Returns:
+            dict with "keywords" ({"value", "index", "score"}) and "topics" ({"value", "note_id"})
         """
         index_to_text = list(text.items())
         keywords = []
@@ -115,7 +159,73 @@ class NoteGraphModel:
             # Map back to the sentence index
             sentence_idx = self._find_sentence_index(word, text)
             keywords.append({"value": word, "index": sentence_idx, "score": score})
-        pass
+
+        # 2. The note's topic is its best single-word keyword
+        if full_text.strip():
+            topic = self.extract_topics([{"id": note_id, "content": full_text}])[0]["topic"]
+            topics.append({"value": topic, "note_id": note_id})
+            self.add_topic_from_note(topic, note_id)
+
+        return {
+            "keywords": keywords,
+            "topics": topics
+        }
+
+    def _find_sentence_index(self, word, text):
+        """
+        Finds the first sentence containing a keyword.
+
+        Args:
+            word (str): Keyword or keyphrase
+            text (dict): dictionary of sentences with index
+
+        Returns:
+            Index of the first matching sentence, or None
+        """
+        word = word.lower()
+        for index, sentence in text.items():
+            if word in sentence.lower():
+                return index
+        return None
+
+    def extract_topics(self, notes, top_n=5, batch_size=64):
+        """
+        Picks one topic per note from its KeyBERT keywords, locally on CPU.
+
+        Notes are embedded in batches through KeyBERT's multi-document API, and each
+        note gets its best-scoring keyword. The choice depends on the note alone, so
+        a note extracted on its own during an incremental rebuild gets the same topic
+        as in a full build; notes share a topic when they share their top keyword.
+
+        Args:
+            notes (list): dictionaries with "id" and "content"
+            top_n (int): Keyword candidates KeyBERT scores per note
+            batch_size (int): Notes embedded per KeyBERT call
+
+        Returns:
+            list of {"topic": ..., "note_id": ...} in input order
+        """
+        results = []
+        for start in range(0, len(notes), batch_size):
+            batch = notes[start:start + batch_size]
+            keywords = self.kw_model.extract_keywords(
+                [note["content"] for note in batch],
+                keyphrase_ngram_range=(1, 1),
+                stop_words="english",
+                top_n=top_n
+            )
+            # KeyBERT returns a flat list when given a single document
+            if len(batch) == 1:
+                keywords = [keywords]
+            for note, note_keywords in zip(batch, keywords):
+                if note_keywords:
+                    # Ties go to the alphabetically first keyword so the result doesn't depend on order
+                    word, _ = min(note_keywords, key=lambda item: (-item[1], item[0]))
+                    topic = word.capitalize()
+                else:
+                    topic = "unclassified"
+                results.append({"topic": topic, "note_id": note["id"]})
+        return results
 
     def _parse_note_md(self, text, note_id):
         """
@@ -124,48 +234,20 @@ class NoteGraphModel:
         - keywords: list of {"value": word, "note_id": note_id}
         - topics: list of {"value": heading, "note_id": note_id}
         """
-        keywords = []
-        topics = []
+        return parse_note_md(text, note_id)
 
-        # Extract headings
-        heading_matches = re.findall(r'^(#{1,6})\s+(.*)', text, re.MULTILINE)
-        for _, heading in heading_matches:
-            topics.append({"value": heading.strip(), "note_id": note_id})
-
-        # 1. Bold-Italic (***text*** or ___text___)
-        bold_italic_matches = re.findall(r'(\*\*\*.+?\*\*\*|___.+?___)', text)
-        for match in bold_italic_matches:
-            content = re.sub(r'^\*\*\*|___|___|\*\*\*$', '', match).strip()
-            if content:
-                keywords.append({"value": content, "note_id": note_id})
-            # Replace with placeholder to avoid re-matching
-            text = text.replace(match, '')
-
-        # 2. Bold (**text** or __text__)
-        bold_matches = re.findall(r'(\*\*.+?\*\*|__.+?__)', text)
-        for match in bold_matches:
-            content = re.sub(r'^\*\*|__|__|\*\*$', '', match).strip()
-            if content:
-                keywords.append({"value": content, "note_id": note_id})
-            text = text.replace(match, '')
-
-        # 3. Italic (*text* or _text_)
-        italic_matches = re.findall(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)|(?<!_)_(?!_)(.+?)(?<!_)_(?!_)', text)
-        for match in italic_matches:
-            for word in match:
-                if word:
-                    keywords.append({"value": word.strip(), "note_id": note_id})
-
-        # Extract vocab terms (**term** - definition) → just get term
-        vocab_matches = re.findall(r'\*\*(.*?)\*\*\s*[:\-–=]\s*.+', text)
-        for term in vocab_matches:
-            if term:
-                keywords.append({"value": term.strip(), "note_id": note_id})
+    def parse_notes_md(self, notes, processes=None):
+        """
+        Parses many markdown notes at once, on a process pool for bulk imports.
 
-        return {
-            "keywords": keywords,
-            "topics": topics
-        }
+        Args:
+            notes (list): (note_id, text) pairs
+            processes (int, optional): Worker processes, defaults to the CPU count
+
+        Returns:
+            list of _parse_note_md results in input order
+        """
+        return parse_notes_md(notes, processes=processes)
         
     def _combine_nodes(self):
         pass
@@ -184,45 +266,109 @@ class NoteGraphModel:
         # Check if topic already exists
         if topic in self.graph.nodes:
             # Get existing note_ids
-            note_ids = self.graph.nodes[topic].get('note_ids', [])
-            if note_id not in note_ids:
-                note_ids.append(note_id)
-                
-            # Update node with new note_ids
-            self.graph.nodes[topic]['note_ids'] = note_ids
+            note_ids = self.graph.nodes[topic].setdefault('note_ids', set())
+            if note_id in note_ids:
+                return
+            note_ids.add(note_id)
             self.graph.nodes[topic]['count'] = len(note_ids)
+            self.index.add_member(topic, 'note_ids', note_id)
+            self.index.update(topic, 'count', len(note_ids))
         else:
             # Create new topic node
-            self._add_node(topic, type="topic", note_ids=[note_id], count=1)
+            self._add_node(topic, type="topic", note_ids={note_id}, count=1)
+        self.note_topics.setdefault(note_id, set()).add(topic)
 
-    def query(self, **filters):
+    def _remove_topic_from_note(self, topic, note_id):
+        """
+        Drops a note's reference from a topic, removing the topic (and its edges)
+        once no note references it.
+        """
+        data = self.graph.nodes.get(topic)
+        if data is None:
+            return
+        note_ids = data.get('note_ids', set())
+        note_ids.discard(note_id)
+        if not note_ids and data.get('type') == "topic":
+            self.graph.remove_node(topic)
+            self.index.remove(topic)
+            return
+        data['count'] = len(note_ids)
+        self.index.discard_member(topic, 'note_ids', note_id)
+        self.index.update(topic, 'count', len(note_ids))
+
+    def remove_note(self, note_id):
+        """
+        Removes a note's contribution to the graph, e.g. when it is deleted.
+        Topics left without notes are dropped along with their edges.
+
+        Args:
+            note_id (str): ID of the note
+
+        Returns:
+            set of topics the note referenced
+        """
+        topics = self.note_topics.pop(note_id, set())
+        for topic in topics:
+            self._remove_topic_from_note(topic, note_id)
+        return topics
+
+    def update_note(self, note_id, topics=None, text=None):
+        """
+        Replaces a note's topics in place after it was edited, touching only the
+        topics that changed.
+
+        Args:
+            note_id (str): ID of the note
+            topics (iterable, optional): The note's topics now
+            text (str, optional): Markdown to take the topics (headings) from instead
+
+        Returns:
+            (added, removed) sets of topics
+        """
+        if topics is None:
+            parsed = self._parse_note_md(text or "", note_id)
+            topics = [topic["value"] for topic in parsed["topics"]]
+        new_topics = set(topics)
+        old_topics = self.note_topics.get(note_id, set())
+
+        removed = old_topics - new_topics
+        added = new_topics - old_topics
+        for topic in removed:
+            self._remove_topic_from_note(topic, note_id)
+        old_topics -= removed
+        if not old_topics:
+            self.note_topics.pop(note_id, None)
+        for topic in added:
+            self.add_topic_from_note(topic, note_id)
+        return added, removed
+
+    def query(self, copy=True, **filters):
         """
         Queries the graph for nodes based on dynamic properties and context (time for now)
 
+        Filters resolve through the attribute index by set intersection instead of
+        scanning every node. A scalar filter on a collection attribute such as note_ids
+        matches nodes whose collection contains it.
+
         Args:
+            copy (bool): Return an independent copy (default) or a read-only view of the graph.
             node_type (str, optional): Filter by node type.
             **filters: Additional attribute filters. {key: value}
 
         Returns:
             subgraph containing only nodes and edges that match criteria.
         """
-        nodes = []
-
-        for node, data in self.graph.nodes(data=True):
-            match = True
-            for key, value in filters.items():
-                node_value = data.get(key)
-                if isinstance(value, datetime):
-                    if node_value > self.context.current_time:
-                        match = False
-                        break
-                elif node_value != value:
-                    match = False
-                    break
-            if match:
-                nodes.append(node)
-
-        return self.graph.subgraph(nodes).copy()
+        nodes, unindexed = self.index.select(filters, self.context.current_time)
+        if nodes is None:
+            nodes = self.graph.nodes
+        if unindexed:
+            nodes = [
+                node for node in nodes
+                if all(self.graph.nodes[node].get(key) == value for key, value in unindexed.items())
+            ]
+
+        subgraph = self.graph.subgraph(nodes)
+        return subgraph.copy() if copy else subgraph
 
     def get_graph(self):
         """
@@ -231,12 +377,16 @@ class NoteGraphModel:
         """
         return self.graph
 
-    def visualize(self):
+    def visualize(self, pos=None):
         """
         Visualizes the graph structure (e.g., using matplotlib or pyvis).
+
+        Args:
+            pos (dict, optional): Precomputed node positions to draw with instead of laying out again.
         """
         plt.figure(figsize=(12, 8))
-        pos = nx.spring_layout(self.graph, k=0.5, iterations=50)
+        if pos is None:
+            pos = force_layout(self.graph)
         
         nx.draw_networkx_nodes(self.graph, pos, node_size=1500)
         nx.draw_networkx_edges(self.graph, pos, arrowstyle='->', arrowsize=20)
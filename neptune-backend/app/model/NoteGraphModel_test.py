@@ -1,7 +1,8 @@
 from NoteGraphModel import NoteGraphModel
 
 fake_courses = ["Linear Algebra", "Calculus", "Operating Systems", "Algorithms"]
-model = NoteGraphModel(classes=fake_courses)
+# Cheap to build: models load when first used, and the domains are added by the test below
+model = NoteGraphModel()
 
 def test_markdown():
     model = NoteGraphModel()
@@ -36,6 +37,24 @@ def test_graph_init_and_visualize():
     print("\nVisualizing graph...")
     model.visualize()
 
+def test_remove_and_update_note():
+    model = NoteGraphModel(domain_model=None)
+    model.add_topic_from_note("Algebra", "1")
+    model.add_topic_from_note("Algebra", "2")
+    model.add_topic_from_note("Geometry", "2")
+    model._add_edge("Algebra", "Geometry", relation="related")
+
+    added, removed = model.update_note("2", topics=["Algebra", "Topology"])
+    assert added == {"Topology"} and removed == {"Geometry"}
+    assert "Geometry" not in model.get_graph()
+    assert model.get_graph().nodes["Algebra"]["count"] == 2
+
+    model.remove_note("1")
+    assert model.get_graph().nodes["Algebra"]["note_ids"] == {"2"}
+    model.remove_note("2")
+    assert set(model.query(type="topic").nodes) == set()
+    assert model.note_topics == {}
+
 if __name__ == "__main__":
     test_graph_init_and_visualize()
 
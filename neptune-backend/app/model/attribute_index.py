@@ -0,0 +1,159 @@
+"""
+Secondary indexes over node attributes for NoteGraphModel.query.
+
+Kept free of model imports so it can be used and tested on its own.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+# Attribute values of these types are indexed by membership of their elements
+COLLECTION_TYPES = (list, set, frozenset, tuple)
+
+class NodeAttributeIndex:
+    """
+    Maps attribute values to the nodes holding them.
+
+    - Hashable values: {key: {value: {nodes}}} for equality filters.
+    - Collections (e.g. note_ids): {key: {element: {nodes}}} for membership filters.
+    - datetimes: a sorted list per key for range filters.
+
+    The index only sees changes made through reindex()/remove(), so graph edits
+    must go through NoteGraphModel's methods rather than the NetworkX graph directly.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._members = {}
+        self._times = {}  # key -> (sorted times, nodes in the same order)
+        self._indexed = {}  # node -> {key: value as indexed}, to undo on change
+
+    def __len__(self):
+        return len(self._indexed)
+
+    def _add(self, node, key, value):
+        if isinstance(value, datetime):
+            times, nodes = self._times.setdefault(key, ([], []))
+            position = bisect_right(times, value)
+            times.insert(position, value)
+            nodes.insert(position, node)
+        elif isinstance(value, COLLECTION_TYPES):
+            members = self._members.setdefault(key, {})
+            for element in value:
+                members.setdefault(element, set()).add(node)
+            # Own copy, kept in step by add_member/discard_member
+            return set(value)
+        else:
+            try:
+                self._values.setdefault(key, {}).setdefault(value, set()).add(node)
+            except TypeError:
+                pass  # Unhashable values are matched by scanning
+        return value
+
+    def _discard(self, node, key, value):
+        if isinstance(value, datetime):
+            times, nodes = self._times[key]
+            position = bisect_left(times, value)
+            while nodes[position] != node:
+                position += 1
+            del times[position]
+            del nodes[position]
+        elif isinstance(value, set):
+            members = self._members[key]
+            for element in value:
+                members[element].discard(node)
+                if not members[element]:
+                    del members[element]
+        else:
+            try:
+                nodes = self._values[key].get(value)
+            except TypeError:
+                return
+            if nodes is not None:
+                nodes.discard(node)
+                if not nodes:
+                    del self._values[key][value]
+
+    def reindex(self, node, attrs):
+        """Index a node's current attributes, replacing whatever was indexed for it before"""
+        self.remove(node)
+        self._indexed[node] = {key: self._add(node, key, value) for key, value in attrs.items()}
+
+    def remove(self, node):
+        for key, value in self._indexed.pop(node, {}).items():
+            self._discard(node, key, value)
+
+    def update(self, node, key, value):
+        """Re-index a single attribute of a node"""
+        indexed = self._indexed.setdefault(node, {})
+        if key in indexed:
+            self._discard(node, key, indexed[key])
+        indexed[key] = self._add(node, key, value)
+
+    def add_member(self, node, key, element):
+        """Record that a node's collection attribute gained element, in O(1)"""
+        self._members.setdefault(key, {}).setdefault(element, set()).add(node)
+        self._indexed.setdefault(node, {}).setdefault(key, set()).add(element)
+
+    def discard_member(self, node, key, element):
+        """Record that a node's collection attribute lost element, in O(1)"""
+        members = self._members.get(key, {})
+        nodes = members.get(element)
+        if nodes is not None:
+            nodes.discard(node)
+            if not nodes:
+                del members[element]
+        self._indexed.get(node, {}).get(key, set()).discard(element)
+
+    def nodes_with_value(self, key, value):
+        """
+        Nodes whose attribute equals value, or None if that can't be answered from
+        the index (unhashable or collection values)
+        """
+        if isinstance(value, COLLECTION_TYPES):
+            return None
+        try:
+            return self._values.get(key, {}).get(value, set())
+        except TypeError:
+            return None
+
+    def nodes_containing(self, key, element):
+        """Nodes whose collection attribute contains element"""
+        return self._members.get(key, {}).get(element, set())
+
+    def nodes_until(self, key, moment):
+        """Nodes whose datetime attribute is at or before moment"""
+        times, nodes = self._times.get(key, ([], []))
+        return set(nodes[:bisect_right(times, moment)])
+
+    def is_collection(self, key):
+        return key in self._members
+
+    def select(self, filters, now):
+        """
+        Resolve query filters by intersecting index entries, smallest first.
+
+        A datetime filter matches nodes whose attribute is at or before now; a
+        scalar filter on a collection attribute also matches by membership.
+
+        Returns:
+            (nodes, unindexed): the matching node set, or None if no filter could
+            narrow it down, and the filters left to check on those nodes directly
+        """
+        candidates = []
+        unindexed = {}
+        for key, value in filters.items():
+            if isinstance(value, datetime):
+                candidates.append(self.nodes_until(key, now))
+                continue
+            matches = self.nodes_with_value(key, value)
+            if matches is None:
+                unindexed[key] = value
+            elif self.is_collection(key):
+                candidates.append(matches | self.nodes_containing(key, value))
+            else:
+                candidates.append(matches)
+
+        if not candidates:
+            return None, unindexed
+        candidates.sort(key=len)
+        return candidates[0].intersection(*candidates[1:]), unindexed
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from app.model.attribute_index import NodeAttributeIndex
+
+
+def test_select_intersects_indexed_filters():
+    index = NodeAttributeIndex()
+    index.reindex("Math", {"type": "domain"})
+    index.reindex("Algebra", {"type": "topic", "note_ids": ["1", "2"]})
+    index.reindex("Geometry", {"type": "topic", "note_ids": ["2"]})
+
+    assert index.select({"type": "topic"}, None) == ({"Algebra", "Geometry"}, {})
+    assert index.select({"type": "topic", "note_ids": "1"}, None) == ({"Algebra"}, {})
+    assert index.select({}, None) == (None, {})
+    # Whole-list comparisons can't come from the index
+    assert index.select({"note_ids": ["2"]}, None) == (None, {"note_ids": ["2"]})
+
+
+def test_reindex_replaces_previous_entries():
+    index = NodeAttributeIndex()
+    note_ids = ["1"]
+    index.reindex("Algebra", {"type": "topic", "note_ids": note_ids})
+    note_ids.append("2")
+    index.reindex("Algebra", {"type": "subdomain", "note_ids": note_ids})
+
+    assert index.nodes_with_value("type", "topic") == set()
+    assert index.nodes_containing("note_ids", "2") == {"Algebra"}
+
+    index.remove("Algebra")
+    assert index.nodes_containing("note_ids", "1") == set()
+    assert len(index) == 0
+
+
+def test_datetime_filters_use_sorted_range():
+    index = NodeAttributeIndex()
+    now = datetime(2026, 1, 1)
+    for days in range(5):
+        index.reindex(f"n{days}", {"created": now + timedelta(days=days - 2)})
+
+    nodes, _ = index.select({"created": now}, now)
+    assert nodes == {"n0", "n1", "n2"}
+
+
+def test_member_updates_touch_one_element():
+    index = NodeAttributeIndex()
+    index.reindex("Algebra", {"note_ids": {"1"}, "count": 1})
+    index.add_member("Algebra", "note_ids", "2")
+    index.update("Algebra", "count", 2)
+
+    assert index.nodes_containing("note_ids", "2") == {"Algebra"}
+    assert index.nodes_with_value("count", 2) == {"Algebra"}
+    assert index.nodes_with_value("count", 1) == set()
+
+    index.discard_member("Algebra", "note_ids", "1")
+    assert index.nodes_containing("note_ids", "1") == set()
+    index.remove("Algebra")
+    assert index.nodes_containing("note_ids", "2") == set()
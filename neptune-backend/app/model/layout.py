@@ -0,0 +1,107 @@
+"""
+Force-directed layout for topic graphs.
+
+Free of app imports so NoteGraphModel can use it when run from app/model.
+"""
+import numpy as np
+import networkx as nx
+from typing import Dict, Hashable, Optional, Tuple
+
+Positions = Dict[Hashable, Tuple[float, float]]
+
+# Node pairs per block of the repulsion pass; bounds its scratch memory to a few
+# tens of MB however large the graph
+REPULSION_BLOCK_PAIRS = 1 << 20
+
+def force_layout(
+    G: nx.Graph,
+    initial: Optional[Positions] = None,
+    iterations: int = 50,
+    temperature: float = 0.1,
+    k: Optional[float] = None,
+    seed: int = 42
+) -> Positions:
+    """
+    Fruchterman-Reingold force-directed layout, vectorized over all node pairs.
+
+    Repulsion is exact over every pair but computed in row blocks of about
+    REPULSION_BLOCK_PAIRS pairs, and attraction runs over the edge list, so memory
+    is O(n + edges). Time is still O(n^2) per iteration.
+
+    Args:
+        G: Graph to lay out; edge "weight" scales attraction
+        initial: Starting positions; nodes missing from it are placed near their
+            positioned neighbours, or at random if they have none
+        iterations: Number of simulation steps
+        temperature: Maximum step length of the first iteration, cooled linearly to zero
+        k: Optimal distance between nodes, defaults to 1/sqrt(n)
+        seed: Seed for random placement
+
+    Returns:
+        Dictionary mapping each node to an (x, y) tuple
+    """
+    nodes = list(G.nodes())
+    n = len(nodes)
+    if n == 0:
+        return {}
+
+    rng = np.random.default_rng(seed)
+    index = {node: i for i, node in enumerate(nodes)}
+    pos = rng.random((n, 2))
+    known = np.zeros(n, dtype=bool)
+    if initial:
+        for node, i in index.items():
+            if node in initial:
+                pos[i] = initial[node]
+                known[i] = True
+        # New nodes start next to whatever they connect to
+        for node, i in index.items():
+            if known[i]:
+                continue
+            anchors = [index[nbr] for nbr in G.neighbors(node) if known[index[nbr]]]
+            if anchors:
+                pos[i] = pos[anchors].mean(axis=0) + rng.normal(scale=0.05, size=2)
+            elif known.any():
+                low, high = pos[known].min(axis=0), pos[known].max(axis=0)
+                pos[i] = low + rng.random(2) * np.maximum(high - low, 1e-3)
+
+    if n == 1:
+        return {nodes[0]: (float(pos[0, 0]), float(pos[0, 1]))}
+
+    # Edge list with one entry per node pair; directed edges still pull both ways
+    pair_weights: Dict[Tuple[int, int], float] = {}
+    for u, v, weight in G.edges(data="weight", default=1.0):
+        i, j = sorted((index[u], index[v]))
+        if i != j:
+            pair_weights[(i, j)] = max(pair_weights.get((i, j), weight), weight)
+    pairs = np.array(list(pair_weights), dtype=np.int64).reshape(-1, 2)
+    source, target = pairs[:, 0], pairs[:, 1]
+    weights = np.fromiter(pair_weights.values(), dtype=float, count=len(pair_weights))
+
+    k = k or np.sqrt(1.0 / n)
+    dt = temperature / (iterations + 1)
+    t = temperature
+    block = max(1, REPULSION_BLOCK_PAIRS // n)
+    displacement = np.empty_like(pos)
+
+    for _ in range(iterations):
+        # Repulsion k^2/d between all pairs
+        for start in range(0, n, block):
+            delta = pos[start:start + block, None, :] - pos[None, :, :]
+            distance_sq = np.einsum("ijk,ijk->ij", delta, delta)
+            np.clip(distance_sq, 0.0001, None, out=distance_sq)
+            displacement[start:start + block] = np.einsum("ijk,ij->ik", delta, k * k / distance_sq)
+        # Attraction d^2/k along edges
+        delta = pos[source] - pos[target]
+        distance = np.linalg.norm(delta, axis=-1)
+        np.clip(distance, 0.01, None, out=distance)
+        pull = delta * (weights * distance / k)[:, None]
+        for axis in range(2):
+            displacement[:, axis] -= np.bincount(source, weights=pull[:, axis], minlength=n)
+            displacement[:, axis] += np.bincount(target, weights=pull[:, axis], minlength=n)
+        length = np.linalg.norm(displacement, axis=-1)
+        np.clip(length, 0.01, None, out=length)
+        pos += displacement * (t / length)[:, None]
+        t -= dt
+
+    return {node: (float(pos[i, 0]), float(pos[i, 1])) for node, i in index.items()}
@@ -0,0 +1,92 @@
+"""
+Markdown keyword and heading extraction used by NoteGraphModel.
+
+Kept free of model imports so process pool workers start quickly.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+HEADING = re.compile(r'^(#{1,6})\s+(.*)', re.MULTILINE)
+BOLD_ITALIC_MARKERS = re.compile(r'^\*\*\*|___|___|\*\*\*$')
+BOLD_MARKERS = re.compile(r'^\*\*|__|__|\*\*$')
+# Every emphasis level in one alternation, tried in order at each position:
+# bold-italic (***text*** or ___text___), bold (**text** or __text__), then
+# italic (*text* or _text_). A span only closes on a marker run of its own
+# length, so emphasis nested inside it stays part of its text. Italic markers
+# must hug their text, so a "* " list bullet never opens one.
+EMPHASIS = re.compile(
+    r'(?P<bold_italic>\*\*\*(?!\*).+?(?<!\*)\*\*\*(?!\*)|___(?!_).+?(?<!_)___(?!_))'
+    r'|(?P<bold>\*\*(?!\*).+?(?<!\*)\*\*(?!\*)|__(?!_).+?(?<!_)__(?!_))'
+    r'|(?<!\*)\*(?![\s*])(?P<star>.+?)(?<![\s*])\*(?!\*)'
+    r'|(?<!_)_(?![\s_])(?P<underscore>.+?)(?<![\s_])_(?!_)'
+)
+VOCAB = re.compile(r'\*\*(.*?)\*\*\s*[:\-–=]\s*.+')
+
+# Below this many notes a pool costs more to start than it saves
+POOL_MIN_NOTES = 200
+
+def parse_note_md(text, note_id):
+    """
+    Input: raw markdown text
+    Output:
+    - keywords: list of {"value": word, "note_id": note_id}
+    - topics: list of {"value": heading, "note_id": note_id}
+
+    Emphasis is tokenized in a single left-to-right pass, so the cost is linear in
+    the note however many emphasized words it has. Keywords are listed by level
+    (bold-italic, bold, italic, then vocab terms), each in document order.
+    Emphasis nested across levels keeps the outermost span, as a markdown
+    renderer would.
+    """
+    topics = [{"value": heading.strip(), "note_id": note_id} for _, heading in HEADING.findall(text)]
+    bold_italic = []
+    bold = []
+    italic = []
+    # Text with bold and bold-italic spans cut out, for the vocab pattern
+    remaining = []
+    position = 0
+
+    for match in EMPHASIS.finditer(text):
+        kind = match.lastgroup
+        if kind == "bold_italic" or kind == "bold":
+            markers, level = (BOLD_ITALIC_MARKERS, bold_italic) if kind == "bold_italic" else (BOLD_MARKERS, bold)
+            content = markers.sub('', match.group(0)).strip()
+            if content:
+                level.append(content)
+            remaining.append(text[position:match.start()])
+            position = match.end()
+        elif match.group(kind):
+            italic.append(match.group(kind).strip())
+    remaining.append(text[position:])
+
+    # Extract vocab terms (**term** - definition) → just get term
+    vocab = [term.strip() for term in VOCAB.findall(''.join(remaining)) if term]
+
+    return {
+        "keywords": [{"value": value, "note_id": note_id} for value in bold_italic + bold + italic + vocab],
+        "topics": topics
+    }
+
+def _parse_item(item):
+    return parse_note_md(item[1], item[0])
+
+def parse_notes_md(notes, processes=None, chunksize=64):
+    """
+    Parse many notes, fanning out to a process pool for bulk imports.
+
+    Args:
+        notes: iterable of (note_id, text) pairs
+        processes: Worker processes; None uses the CPU count, 1 parses in-process.
+            Small batches are always parsed in-process.
+        chunksize: Notes sent to a worker at a time
+
+    Returns:
+        list of parse_note_md results in input order
+    """
+    notes = list(notes)
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or len(notes) < POOL_MIN_NOTES:
+        return [parse_note_md(text, note_id) for note_id, text in notes]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_parse_item, notes, chunksize=chunksize))
@@ -0,0 +1,124 @@
+"""
+Benchmark markdown extraction on large synthetic notes.
+
+    python -m app.model.markdown_extract_benchmark [--notes 2000] [--sections 40]
+
+Compares the original per-level, per-match replace() implementation with the
+single-pass parse_note_md, checks that their output is identical on ordinary
+notes, and times parse_notes_md serially and on a process pool.
+"""
+import argparse
+import random
+import re
+import time
+
+from app.model.markdown_extract import parse_note_md, parse_notes_md
+
+WORDS = ["matrix", "vector", "kernel", "entropy", "gradient", "theorem", "proof", "lemma", "graph", "tree"]
+
+def synthetic_note(rng, sections):
+    """Markdown with headings, every emphasis level, vocab lines and plain prose"""
+    lines = [f"# {rng.choice(WORDS).title()} notes"]
+    for i in range(sections):
+        lines.append(f"## Section {i} {rng.choice(WORDS)}")
+        for _ in range(8):
+            words = [rng.choice(WORDS) for _ in range(12)]
+            words[rng.randrange(12)] = f"**{rng.choice(WORDS)}**"
+            words[rng.randrange(12)] = f"*{rng.choice(WORDS)} {rng.choice(WORDS)}*"
+            words[rng.randrange(12)] = f"***{rng.choice(WORDS)}***"
+            words[rng.randrange(12)] = f"_{rng.choice(WORDS)}_"
+            lines.append(" ".join(words))
+        lines.append(f"**{rng.choice(WORDS)}** - the {rng.choice(WORDS)} of a {rng.choice(WORDS)}")
+    return "\n".join(lines)
+
+def legacy_parse_note_md(text, note_id):
+    """
+    Input: raw markdown text
+    Output:
+    - keywords: list of {"value": word, "note_id": note_id}
+    - topics: list of {"value": heading, "note_id": note_id}
+    """
+    keywords = []
+    topics = []
+
+    # Extract headings
+    heading_matches = re.findall(r'^(#{1,6})\s+(.*)', text, re.MULTILINE)
+    for _, heading in heading_matches:
+        topics.append({"value": heading.strip(), "note_id": note_id})
+
+    # 1. Bold-Italic (***text*** or ___text___)
+    bold_italic_matches = re.findall(r'(\*\*\*.+?\*\*\*|___.+?___)', text)
+    for match in bold_italic_matches:
+        content = re.sub(r'^\*\*\*|___|___|\*\*\*$', '', match).strip()
+        if content:
+            keywords.append({"value": content, "note_id": note_id})
+        # Replace with placeholder to avoid re-matching
+        text = text.replace(match, '')
+
+    # 2. Bold (**text** or __text__)
+    bold_matches = re.findall(r'(\*\*.+?\*\*|__.+?__)', text)
+    for match in bold_matches:
+        content = re.sub(r'^\*\*|__|__|\*\*$', '', match).strip()
+        if content:
+            keywords.append({"value": content, "note_id": note_id})
+        text = text.replace(match, '')
+
+    # 3. Italic (*text* or _text_)
+    italic_matches = re.findall(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)|(?<!_)_(?!_)(.+?)(?<!_)_(?!_)', text)
+    for match in italic_matches:
+        for word in match:
+            if word:
+                keywords.append({"value": word.strip(), "note_id": note_id})
+
+    # Extract vocab terms (**term** - definition) → just get term
+    vocab_matches = re.findall(r'\*\*(.*?)\*\*\s*[:\-–=]\s*.+', text)
+    for term in vocab_matches:
+        if term:
+            keywords.append({"value": term.strip(), "note_id": note_id})
+
+    return {
+        "keywords": keywords,
+        "topics": topics
+    }
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--sections", type=int, default=40)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    notes = [(i, synthetic_note(rng, args.sections)) for i in range(args.notes)]
+    size = sum(len(text) for _, text in notes)
+    print(f"{args.notes} notes, {size / 1e6:.1f} MB of markdown")
+
+    sample = notes[:50]
+    legacy, legacy_time = timed(lambda: [legacy_parse_note_md(text, i) for i, text in sample])
+    current, current_time = timed(lambda: [parse_note_md(text, i) for i, text in sample])
+    assert legacy == current, "parse_note_md output differs from the original implementation"
+    print(f"original vs parse_note_md on {len(sample)} notes: {legacy_time:.3f}s vs {current_time:.3f}s (identical output)")
+
+    long_note = synthetic_note(rng, args.sections * 20)
+    legacy, legacy_time = timed(lambda: legacy_parse_note_md(long_note, 0))
+    current, current_time = timed(lambda: parse_note_md(long_note, 0))
+    assert legacy == current, "parse_note_md output differs from the original implementation"
+    print(f"original vs parse_note_md on one {len(long_note) / 1e6:.1f} MB note: {legacy_time:.3f}s vs {current_time:.3f}s")
+
+    dense_note = " ".join(f"**{rng.choice(WORDS)}{i}** *{rng.choice(WORDS)}{i}*" for i in range(args.sections * 500))
+    legacy, legacy_time = timed(lambda: legacy_parse_note_md(dense_note, 0))
+    current, current_time = timed(lambda: parse_note_md(dense_note, 0))
+    assert legacy == current, "parse_note_md output differs from the original implementation"
+    print(f"original vs parse_note_md on {args.sections * 1000} emphasized words: {legacy_time:.3f}s vs {current_time:.3f}s")
+
+    _, serial_time = timed(lambda: parse_notes_md(notes, processes=1))
+    _, pool_time = timed(lambda: parse_notes_md(notes, processes=args.processes))
+    print(f"parse_notes_md serial: {serial_time:.3f}s, process pool: {pool_time:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import random
+import timeit
+
+from app.model.markdown_extract import parse_note_md, parse_notes_md
+from app.model.markdown_extract_benchmark import legacy_parse_note_md, synthetic_note
+
+
+def test_parse_note_md():
+    text = """# Machine Learning Overview
+
+Machine learning is a **subset** of artificial intelligence focused on _data-driven_ predictions.
+It involves ***algorithms*** that improve over time through exposure to **data**.
+
+## Supervised Learning
+"""
+    result = parse_note_md(text, 1)
+
+    assert [topic["value"] for topic in result["topics"]] == ["Machine Learning Overview", "Supervised Learning"]
+    assert [keyword["value"] for keyword in result["keywords"]] == ["algorithms", "subset", "data", "data-driven"]
+
+
+NOTES = [
+    "Call `my_var_name` or __init__ before ***anything*** else, see _Sipser_ ch. 3",
+    "**bold with *italic* inside** and a lone * bullet\n- item with __strong__ text",
+    "# Heading\n\n1. first *step*\n2. second **step**\n\n___Definition___ = the meaning",
+]
+
+
+def _values(text):
+    return [keyword["value"] for keyword in parse_note_md(text, 1)["keywords"]]
+
+
+def test_matches_original_implementation_on_ordinary_notes():
+    rng = random.Random(0)
+    texts = NOTES + [synthetic_note(rng, 5) for _ in range(20)]
+
+    for text in texts:
+        assert parse_note_md(text, 1) == legacy_parse_note_md(text, 1), repr(text)
+
+
+def test_list_bullets_do_not_open_italics():
+    # The original matched "* **Eigenvalue**: a scalar *" as an italic span
+    text = "* **Eigenvalue**: a scalar *lambda* with Av = lambda v\n* **Trace** - sum of the diagonal"
+
+    assert _values(text) == ["Eigenvalue", "Trace", "lambda"]
+
+
+def test_nested_emphasis_keeps_the_outer_span():
+    assert _values("*a **b** c*") == ["a **b** c"]
+    assert _values("**a ***b*** c**") == ["a ***b*** c"]
+    assert _values("**a**b**c**") == ["a", "c"]
+
+
+def test_cost_is_linear_in_emphasized_words():
+    small = " ".join(f"**w{i}** *i{i}*" for i in range(2000))
+    large = " ".join(f"**w{i}** *i{i}*" for i in range(40000))
+
+    small_time = min(timeit.repeat(lambda: parse_note_md(small, 1), number=1, repeat=3))
+    large_time = min(timeit.repeat(lambda: parse_note_md(large, 1), number=1, repeat=3))
+
+    assert len(parse_note_md(large, 1)["keywords"]) == 80000
+    # 20x the input; a per-match replace() would take about 400x as long
+    assert large_time < small_time * 80
+
+
+def test_parse_notes_md_pool_keeps_order():
+    rng = random.Random(1)
+    notes = [(i, synthetic_note(rng, 2)) for i in range(250)]
+
+    assert parse_notes_md(notes, processes=2) == parse_notes_md(notes, processes=1)
@@ -0,0 +1,198 @@
+"""
+Process-wide registry of the ML models NoteGraphModel and the services use.
+
+Models load on first use and are shared by every caller asking for the same
+key, so creating a NoteGraphModel costs nothing and memory doesn't grow with the
+number of instances. Idle models can be unloaded and load again when next needed.
+A model built on top of another (KeyBERT on its sentence-transformer) declares
+that dependency: using it keeps the dependency loaded, and unloading the
+dependency unloads it too, so no second copy of the shared model is loaded.
+
+Kept free of model imports: the libraries are only imported by the loaders.
+"""
+import gc
+import threading
+import time
+
+class ModelRegistry:
+    """Lazily loads, shares and unloads models by key"""
+
+    def __init__(self):
+        self._models = {}  # key -> model
+        self._last_used = {}  # key -> time.monotonic() of the last get()
+        self._loaders = {}  # key -> zero-argument loader, for warmup()
+        self._depends_on = {}  # key -> keys of the models it wraps
+        self._load_locks = {}  # key -> lock, so a model loads once even when requested concurrently
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def __contains__(self, key):
+        return key in self._models
+
+    def register(self, key, loader, depends_on=()):
+        """Remember how to load key without loading it"""
+        with self._lock:
+            self._loaders.setdefault(key, loader)
+            if depends_on:
+                self._depends_on.setdefault(key, tuple(depends_on))
+
+    def _touch(self, key, now):
+        """Mark key and everything it depends on as used; call with _lock held"""
+        pending = [key]
+        while pending:
+            key = pending.pop()
+            if key in self._models:
+                self._last_used[key] = now
+            pending.extend(self._depends_on.get(key, ()))
+
+    def get(self, key, loader=None, depends_on=()):
+        """
+        Returns the model for key, loading it on first use.
+
+        Args:
+            key (str): Identifies the model, e.g. "keybert:all-MiniLM-L6-v2"
+            loader (callable, optional): Builds the model; defaults to the registered one
+            depends_on (tuple, optional): Keys of models this one wraps; they stay
+                loaded while it is used, and unloading one of them unloads it too
+        """
+        with self._lock:
+            if depends_on:
+                self._depends_on.setdefault(key, tuple(depends_on))
+            model = self._models.get(key)
+            if model is not None:
+                self._touch(key, time.monotonic())
+                return model
+            if loader is not None:
+                self._loaders.setdefault(key, loader)
+            loader = self._loaders.get(key)
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        if loader is None:
+            raise KeyError(f"No loader registered for model {key}")
+
+        with load_lock:
+            model = self._models.get(key)
+            if model is None:
+                started = time.perf_counter()
+                model = loader()
+                print(f"Loaded model {key} in {time.perf_counter() - started:.1f}s")
+            with self._lock:
+                self._models[key] = model
+                self._touch(key, time.monotonic())
+        return model
+
+    def warmup(self, keys=None):
+        """
+        Loads models ahead of their first use, e.g. at startup.
+
+        Args:
+            keys (list, optional): Keys to load; defaults to every registered model
+        """
+        for key in list(keys if keys is not None else self._loaders):
+            try:
+                self.get(key)
+            except Exception as e:
+                print(f"Error warming up model {key}: {e}")
+
+    def _unload(self, key):
+        """Drops key and the loaded models depending on it; returns the keys dropped"""
+        with self._lock:
+            unloaded = []
+            pending = [key]
+            while pending:
+                current = pending.pop()
+                if self._models.pop(current, None) is None:
+                    continue
+                self._last_used.pop(current, None)
+                unloaded.append(current)
+                pending.extend(other for other, deps in self._depends_on.items() if current in deps)
+        if unloaded:
+            gc.collect()
+            for current in unloaded:
+                print(f"Unloaded model {current}")
+        return unloaded
+
+    def unload(self, key):
+        """
+        Drops a loaded model, along with every loaded model depending on it since
+        those hold a reference that would keep it in memory.
+
+        Returns:
+            False if key wasn't loaded
+        """
+        return bool(self._unload(key))
+
+    def unload_idle(self, max_idle_seconds):
+        """
+        Unloads models not used for max_idle_seconds.
+
+        Using a model counts as using what it depends on, so a dependency is never
+        idle while its dependents are in use. Callers still holding a reference
+        keep that model alive until they let go.
+
+        Returns:
+            list of unloaded keys
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, used in self._last_used.items() if now - used >= max_idle_seconds]
+        unloaded = []
+        for key in idle:
+            unloaded.extend(self._unload(key))
+        return unloaded
+
+    def start_idle_unloader(self, max_idle_seconds, interval_seconds=None):
+        """Checks for idle models in a daemon thread; max_idle_seconds of 0 disables it"""
+        if not max_idle_seconds or self._reaper is not None:
+            return
+        interval_seconds = interval_seconds or max(1.0, max_idle_seconds / 4)
+
+        def run():
+            while True:
+                time.sleep(interval_seconds)
+                self.unload_idle(max_idle_seconds)
+
+        self._reaper = threading.Thread(target=run, name="model-idle-unloader", daemon=True)
+        self._reaper.start()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "loaded": {key: round(now - used, 1) for key, used in self._last_used.items()},
+                "registered": sorted(self._loaders),
+            }
+
+registry = ModelRegistry()
+
+def get_sentence_transformer(name):
+    """The shared sentence-transformer called name, on CPU"""
+    def load():
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "Local embeddings (embedding relationships, KeyBERT topics, search) require sentence-transformers "
+                "(pip install -r requirements-local.txt)"
+            ) from e
+        return SentenceTransformer(name, device="cpu")
+    return registry.get(f"sentence-transformer:{name}", load)
+
+def get_keybert(name):
+    """A KeyBERT on top of the shared sentence-transformer called name"""
+    def load():
+        try:
+            from keybert import KeyBERT
+        except ImportError as e:
+            raise ImportError("KeyBERT topic extraction requires keybert (pip install -r requirements-local.txt)") from e
+        return KeyBERT(get_sentence_transformer(name))
+    return registry.get(f"keybert:{name}", load, depends_on=(f"sentence-transformer:{name}",))
+
+def get_text2text_pipeline(name):
+    """The shared text2text-generation pipeline for model name"""
+    def load():
+        try:
+            from transformers import pipeline
+        except ImportError as e:
+            raise ImportError("Domain classification requires transformers (pip install -r requirements-local.txt)") from e
+        return pipeline("text2text-generation", model=name)
+    return registry.get(f"text2text:{name}", load)
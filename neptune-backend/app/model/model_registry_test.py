@@ -0,0 +1,62 @@
+import threading
+
+from app.model.model_registry import ModelRegistry
+
+
+def test_model_loads_once_and_is_shared():
+    registry = ModelRegistry()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("m", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(model is models[0] for model in models)
+
+
+def test_registered_models_load_on_warmup_only():
+    registry = ModelRegistry()
+    registry.register("m", object)
+    assert "m" not in registry
+
+    registry.warmup()
+    assert "m" in registry
+
+
+def test_idle_models_unload_and_reload():
+    registry = ModelRegistry()
+    first = registry.get("m", object)
+
+    assert registry.unload_idle(3600) == []
+    assert registry.unload_idle(0) == ["m"]
+    assert "m" not in registry
+    assert registry.get("m") is not first
+
+
+def test_dependents_keep_their_dependency_loaded_and_unload_with_it():
+    registry = ModelRegistry()
+    encoder = registry.get("encoder", object)
+    registry.get("keybert", lambda: (registry.get("encoder"),), depends_on=("encoder",))
+
+    # Only KeyBERT is used, which still counts as using its encoder
+    registry._last_used["encoder"] -= 100
+    registry.get("keybert")
+    assert registry.unload_idle(50) == []
+    assert registry.get("encoder") is encoder
+
+    # Dropping the encoder drops KeyBERT, which would otherwise keep it in memory
+    assert registry.unload("encoder")
+    assert "keybert" not in registry
+
+    # A dependent on its own can go without its dependency
+    registry.get("keybert")
+    assert registry.unload("keybert")
+    assert "encoder" in registry
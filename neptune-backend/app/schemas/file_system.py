@@ -24,6 +24,16 @@ class FileSystemUpdate(BaseModel):
 class FileSystemResponse(BaseModel):
     item: FileSystemItem
 
+class FileSystemListingItem(BaseModel):
+    """A listing row: only id is always present, the rest depend on fields="""
+    id: int
+    name: Optional[str] = None
+    type: Optional[str] = None
+    parent_id: Optional[int] = None
+    content: Optional[str] = None  # Only when requested with fields=
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class FileSystemListResponse(BaseModel):
     items: List[FileSystemItem]
 
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The shared LLM service builds its OpenAI client from the environment on first use
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+# app.db.database builds its engine at import time; tests use their own SQLite sessions
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+# Tests opt into the response cache explicitly so runs never share on-disk state
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("NOTE_INDEX_ENABLED", "false")
+os.environ.setdefault("GRAPH_STORE_PATH", "")
+# Failures are asserted directly; tests that exercise retries build their own RateLimiter
+os.environ.setdefault("LLM_MAX_RETRIES", "0")
+os.environ.setdefault("LLM_CIRCUIT_FAILURE_THRESHOLD", "0")
+
+
+class FakeOpenAIServer:
+    """
+    Minimal OpenAI-compatible chat completions server for tests.
+
+    `responder` receives the request body and returns the assistant message content.
+    `delay` is slept inside every request so concurrency can be observed.
+    `fail_next()` makes the following requests return an error status instead.
+    """
+
+    def __init__(self):
+        self.responder = lambda body: "topic"
+        self.delay = 0.0
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._failures = []
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests.append(body)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    failure = server._failures.pop(0) if server._failures else None
+                try:
+                    time.sleep(server.delay)
+                    content = server.responder(body) if failure is None else None
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+                if failure is not None:
+                    status, retry_after = failure
+                    payload = json.dumps({"error": {"message": f"fake error {status}", "type": "fake"}}).encode("utf-8")
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    if retry_after is not None:
+                        self.send_header("Retry-After", retry_after)
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                payload = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def fail_next(self, count, status=429, retry_after=None):
+        """Answer the next `count` requests with an error status (and optional Retry-After)"""
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def prompt(self, body):
+        """Return the user prompt text of a recorded request"""
+        return body["messages"][-1]["content"]
+
+
+@pytest.fixture
+def db_session():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.db.database import Base
+    from app.db import models  # noqa: F401  registers every table
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    server = FakeOpenAIServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Response
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import config
+from app.db.models import FileSystem
+from app.services import wire_format
+
+# Columns a listing can project with fields=
+LISTING_FIELDS = ("id", "name", "type", "parent_id", "content", "created_at", "updated_at")
+# What the sidebar needs; content has to be asked for explicitly
+DEFAULT_FIELDS = ("id", "name", "type", "parent_id")
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str] = LISTING_FIELDS, default: Sequence[str] = DEFAULT_FIELDS) -> List[str]:
+    """
+    Turn a comma-separated fields= value into column names, always including id.
+
+    Raises:
+        ValueError: for a field that isn't in allowed
+    """
+    if not fields:
+        return list(default)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return list(dict.fromkeys(["id"] + requested))
+
+def list_page(
+    db: Session,
+    fields: Sequence[str],
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    filter_query=None
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Fetch one page of filesystem rows in id order, selecting only the projected columns.
+
+    Keyset pagination: the page starts after the id the previous page ended on, so
+    every page is an index range scan however deep the client pages. Without a
+    limit every remaining row is returned as one page.
+
+    Args:
+        db: Database session
+        fields: Columns to return
+        limit: Page size, or None for all rows
+        after: Cursor from the previous page
+        filter_query: Optional function narrowing the query, e.g. to one folder
+
+    Returns:
+        (rows as dictionaries, cursor for the next page or None on the last page)
+    """
+    query: Query = db.query(*(getattr(FileSystem, field) for field in fields))
+    if filter_query is not None:
+        query = filter_query(query)
+    if after is not None:
+        query = query.filter(FileSystem.id > after)
+    query = query.order_by(FileSystem.id)
+    if limit is None:
+        return [row._asdict() for row in query.all()], None
+    # One extra row tells whether there is another page
+    rows = query.limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return [row._asdict() for row in rows[:limit]], next_cursor
+
+def page_size(limit: Optional[int]) -> Optional[int]:
+    """Clamp a requested page size; None (no limit given) keeps the full listing"""
+    return min(limit, config.FILESYSTEM_MAX_PAGE_SIZE) if limit else None
+
+def listing_response(rows: List[Dict[str, Any]], next_cursor: Optional[int]) -> Response:
+    """Serialize a page in one pass and advertise the next cursor in a header"""
+    headers = {NEXT_CURSOR_HEADER: str(next_cursor)} if next_cursor is not None else {}
+    return Response(content=wire_format.dumps(rows), media_type=wire_format.JSON, headers=headers)
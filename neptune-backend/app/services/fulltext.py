@@ -0,0 +1,205 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.models import FileSystem
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Characters of context shown around the first match
+SNIPPET_CHARS = 160
+HIGHLIGHT_START, HIGHLIGHT_END = "<mark>", "</mark>"
+# Name matches count as much as this many content matches (like the 'A' weight on Postgres)
+NAME_WEIGHT = 3
+
+def tokenize(value: str) -> List[str]:
+    return TOKEN_PATTERN.findall(value.lower())
+
+class InvertedIndex:
+    """
+    In-process BM25 inverted index over note names and content.
+
+    Used when the database has no native full-text search (SQLite). It lives in
+    the API process, so with several API processes each keeps its own copy,
+    built from the database on first use and updated by that process's writes.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: Dict[int, Counter] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, note_id: int, name: str, content: str):
+        """Index a note, replacing any previous version"""
+        terms = Counter(tokenize(content or ""))
+        for term in tokenize(name or ""):
+            terms[term] += NAME_WEIGHT
+        with self._lock:
+            self.remove(note_id)
+            if not terms:
+                return
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[note_id] = count
+            self._terms[note_id] = terms
+            length = sum(terms.values())
+            self._lengths[note_id] = length
+            self._total_length += length
+
+    def remove(self, note_id: int) -> bool:
+        with self._lock:
+            terms = self._terms.pop(note_id, None)
+            if terms is None:
+                return False
+            for term in terms:
+                postings = self._postings[term]
+                del postings[note_id]
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= self._lengths.pop(note_id)
+            return True
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+        """
+        Rank notes containing every query term by BM25.
+
+        Returns:
+            List of (note_id, score), best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            if not terms or not self._lengths:
+                return []
+            postings = [self._postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return []
+            n = len(self._lengths)
+            average_length = self._total_length / n
+            # Walk the shortest postings list, matching all terms like plainto_tsquery
+            candidates = min(postings, key=len)
+            scores = []
+            for note_id in candidates:
+                if not all(note_id in posting for posting in postings):
+                    continue
+                length = self._lengths[note_id]
+                score = 0.0
+                for posting in postings:
+                    tf = posting[note_id]
+                    idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                    score += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / average_length))
+                scores.append((note_id, score))
+        scores.sort(key=lambda item: -item[1])
+        return scores[:limit]
+
+def highlight_snippet(content: str, query: str, size: int = SNIPPET_CHARS) -> str:
+    """Cut a window of content around the first query term and wrap matched terms in <mark>"""
+    terms = set(tokenize(query))
+    if not content or not terms:
+        return (content or "")[:size]
+    matches = [m for m in TOKEN_PATTERN.finditer(content) if m.group(0).lower() in terms]
+    start = max(0, matches[0].start() - size // 4) if matches else 0
+    end = min(len(content), start + size)
+    pieces = []
+    position = start
+    for match in matches:
+        if match.start() < start:
+            continue
+        if match.end() > end:
+            break
+        pieces.append(content[position:match.start()])
+        pieces.append(f"{HIGHLIGHT_START}{match.group(0)}{HIGHLIGHT_END}")
+        position = match.end()
+    pieces.append(content[position:end])
+    snippet = "".join(pieces).replace("\n", " ")
+    return f"{'...' if start > 0 else ''}{snippet}{'...' if end < len(content) else ''}"
+
+_index: Optional[InvertedIndex] = None
+_index_lock = threading.Lock()
+
+def _uses_postgres(db: Session) -> bool:
+    return db.bind.dialect.name == "postgresql"
+
+def get_inverted_index(db: Session) -> InvertedIndex:
+    """The process-wide inverted index, built from every note on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = InvertedIndex()
+                rows = db.query(FileSystem.id, FileSystem.name, FileSystem.content).filter(FileSystem.type == "file")
+                for note_id, name, content in rows.yield_per(500):
+                    index.add(note_id, name, content)
+                _index = index
+    return _index
+
+def index_note_text(db: Session, note_id: int, name: str, content: Optional[str]):
+    """Keep the in-process index current after a note is created or saved (no-op on Postgres)"""
+    if _uses_postgres(db) or _index is None:
+        return  # Postgres maintains the tsvector column; an unbuilt index picks the note up when built
+    _index.add(note_id, name, content or "")
+
+def remove_note_text(db: Session, note_id: int):
+    """Drop a deleted note from the in-process index (no-op on Postgres)"""
+    if not _uses_postgres(db) and _index is not None:
+        _index.remove(note_id)
+
+def search_note_text(db: Session, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Full-text search over note names and content.
+
+    Uses the tsvector GIN index on Postgres and the in-process inverted index
+    elsewhere. Matched terms in snippets are wrapped in <mark>...</mark>.
+
+    Returns:
+        List of {"id", "name", "parent_id", "score", "snippet"}, best first
+    """
+    if _uses_postgres(db):
+        rows = db.execute(
+            text(
+                """
+                SELECT id, name, parent_id,
+                       ts_rank_cd(search_vector, query) AS score,
+                       ts_headline('english', coalesce(content, ''), query,
+                                   'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15') AS snippet
+                FROM filesystem, plainto_tsquery('english', :q) AS query
+                WHERE type = 'file' AND search_vector @@ query
+                ORDER BY score DESC
+                LIMIT :limit
+                """
+            ),
+            {"q": query, "limit": limit}
+        ).mappings().all()
+        return [
+            {**row, "score": round(float(row["score"]), 4)}
+            for row in rows
+        ]
+
+    matches = get_inverted_index(db).search(query, limit)
+    if not matches:
+        return []
+    # Only the ranked page is read back, for names and snippets
+    rows = db.query(FileSystem.id, FileSystem.name, FileSystem.parent_id, FileSystem.content).filter(
+        FileSystem.id.in_([note_id for note_id, _ in matches])
+    ).all()
+    by_id = {row.id: row for row in rows}
+    return [
+        {
+            "id": note_id,
+            "name": by_id[note_id].name,
+            "parent_id": by_id[note_id].parent_id,
+            "score": round(score, 4),
+            "snippet": highlight_snippet(by_id[note_id].content or "", query)
+        }
+        for note_id, score in matches
+        if note_id in by_id
+    ]
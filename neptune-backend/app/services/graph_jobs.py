@@ -0,0 +1,173 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models import GraphBuildJob
+from app.services.graph_snapshots import LoadedSnapshot, get_latest_snapshot
+
+def enqueue_graph_build(db: Session, delay_seconds: float = 0.0) -> GraphBuildJob:
+    """
+    Queue a knowledge graph rebuild for the worker.
+
+    A rebuild always reads every note, so one pending job is enough: repeated
+    triggers reuse it and push its run_after back, which debounces bursts of
+    saves across every API process sharing the database.
+
+    Args:
+        db: Database session
+        delay_seconds: Quiet period before the worker may claim the job
+
+    Returns:
+        The pending job that will cover this request
+    """
+    run_after = datetime.utcnow() + timedelta(seconds=delay_seconds)
+    job = (
+        db.query(GraphBuildJob)
+        .filter(GraphBuildJob.status == "pending")
+        .order_by(GraphBuildJob.id.desc())
+        .first()
+    )
+    if job is None:
+        job = GraphBuildJob(status="pending", run_after=run_after)
+        db.add(job)
+    elif delay_seconds:
+        job.run_after = max(job.run_after, run_after)
+    else:
+        # An explicit refresh shouldn't wait out someone else's debounce
+        job.run_after = min(job.run_after, run_after)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def claim_graph_build_jobs(db: Session, worker_id: str) -> List[GraphBuildJob]:
+    """
+    Claim every due pending job for one build.
+
+    On PostgreSQL candidates are selected with FOR UPDATE SKIP LOCKED so concurrent
+    workers never block on each other. SQLite ignores the row lock, so the claim
+    itself is a conditional UPDATE on status and only rows this worker flipped
+    are returned.
+    """
+    now = datetime.utcnow()
+    query = (
+        db.query(GraphBuildJob.id)
+        .filter(GraphBuildJob.status == "pending", GraphBuildJob.run_after <= now)
+        .order_by(GraphBuildJob.id)
+    )
+    if db.bind.dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    job_ids = [row.id for row in query.all()]
+    if not job_ids:
+        db.rollback()
+        return []
+
+    db.query(GraphBuildJob).filter(
+        GraphBuildJob.id.in_(job_ids),
+        GraphBuildJob.status == "pending"
+    ).update(
+        {"status": "running", "worker_id": worker_id, "started_at": now, "heartbeat_at": now},
+        synchronize_session=False
+    )
+    db.commit()
+
+    return (
+        db.query(GraphBuildJob)
+        .filter(
+            GraphBuildJob.id.in_(job_ids),
+            GraphBuildJob.status == "running",
+            GraphBuildJob.worker_id == worker_id
+        )
+        .order_by(GraphBuildJob.id)
+        .all()
+    )
+
+def _owned(db: Session, jobs: List[GraphBuildJob], worker_id: str):
+    """Query for the jobs that are still running under worker_id"""
+    return db.query(GraphBuildJob).filter(
+        GraphBuildJob.id.in_([job.id for job in jobs]),
+        GraphBuildJob.worker_id == worker_id,
+        GraphBuildJob.status == "running"
+    )
+
+def heartbeat_graph_build_jobs(db: Session, jobs: List[GraphBuildJob], worker_id: str) -> int:
+    """
+    Renew the lease on claimed jobs so a long build isn't mistaken for a dead worker.
+
+    Returns:
+        How many jobs this worker still holds
+    """
+    count = _owned(db, jobs, worker_id).update(
+        {"heartbeat_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    return count
+
+def complete_graph_build_jobs(db: Session, jobs: List[GraphBuildJob], worker_id: str, snapshot_version: int) -> int:
+    """
+    Mark claimed jobs done, pointing them at the snapshot the build produced.
+
+    Only jobs still running under worker_id are touched: a job requeued and
+    claimed by another worker belongs to that worker now.
+
+    Returns:
+        How many jobs were marked done
+    """
+    count = _owned(db, jobs, worker_id).update(
+        {"status": "done", "finished_at": datetime.utcnow(), "snapshot_version": snapshot_version},
+        synchronize_session=False
+    )
+    db.commit()
+    return count
+
+def fail_graph_build_jobs(db: Session, jobs: List[GraphBuildJob], worker_id: str, error: str) -> int:
+    """Mark claimed jobs failed, if worker_id still holds them; returns how many were"""
+    count = _owned(db, jobs, worker_id).update(
+        {"status": "failed", "error": error, "finished_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    return count
+
+def requeue_stale_graph_build_jobs(db: Session, timeout_seconds: float) -> int:
+    """Put jobs back in the queue whose worker stopped heartbeating mid-build"""
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout_seconds)
+    count = db.query(GraphBuildJob).filter(
+        GraphBuildJob.status == "running",
+        func.coalesce(GraphBuildJob.heartbeat_at, GraphBuildJob.started_at) < cutoff
+    ).update(
+        {"status": "pending", "worker_id": None, "started_at": None, "heartbeat_at": None},
+        synchronize_session=False
+    )
+    db.commit()
+    return count
+
+async def wait_for_graph_build(
+    db: Session,
+    job_id: int,
+    timeout_seconds: float,
+    poll_seconds: float = 0.5
+) -> Optional[LoadedSnapshot]:
+    """
+    Wait for a queued job to finish and return the latest graph snapshot.
+
+    Raises:
+        RuntimeError: if the job failed
+        TimeoutError: if the job didn't finish within timeout_seconds
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_seconds
+    while True:
+        # Expire cached state so each poll sees the worker's writes
+        db.expire_all()
+        job = db.get(GraphBuildJob, job_id)
+        if job is not None and job.status == "done":
+            return get_latest_snapshot(db)
+        if job is not None and job.status == "failed":
+            raise RuntimeError(job.error or "Knowledge graph build failed")
+        if loop.time() >= deadline:
+            raise TimeoutError(f"Knowledge graph build {job_id} did not finish in {timeout_seconds}s")
+        db.rollback()
+        await asyncio.sleep(poll_seconds)
@@ -0,0 +1,59 @@
+import networkx as nx
+from typing import Dict, Optional, Tuple
+
+from app.core.config import config
+from app.model.layout import Positions, force_layout
+
+def _structure(G: nx.Graph) -> Tuple[frozenset, frozenset]:
+    edges = frozenset(
+        (min(u, v), max(u, v), round(data.get("weight", 0.5), 4))
+        for u, v, data in G.edges(data=True)
+    )
+    return frozenset(G.nodes()), edges
+
+def _previous_structure(graph_data: Dict) -> Tuple[frozenset, frozenset]:
+    edges = frozenset(
+        (min(link["source"], link["target"]), max(link["source"], link["target"]), round(link["strength"], 4))
+        for link in graph_data.get("links", [])
+    )
+    return frozenset(node["id"] for node in graph_data.get("nodes", [])), edges
+
+def layout_graph(G: nx.Graph, previous: Optional[Dict] = None) -> Positions:
+    """
+    Compute node positions for a topic graph, reusing the previous snapshot's layout.
+
+    If the graph is structurally identical to the previous snapshot its positions
+    are returned unchanged. If only a small share of nodes changed (at most
+    GRAPH_LAYOUT_WARM_START_MAX_CHANGE), the previous positions seed a short, cool
+    simulation so existing nodes barely move. Otherwise the layout starts from scratch.
+
+    Args:
+        G: NetworkX graph of topics and relationships
+        previous: Frontend payload of the previous snapshot, with x/y on its nodes
+
+    Returns:
+        Dictionary mapping each topic to an (x, y) tuple, rounded for a compact payload
+    """
+    previous_pos = {
+        node["id"]: (node["x"], node["y"])
+        for node in (previous or {}).get("nodes", [])
+        if "x" in node and "y" in node
+    }
+
+    if previous_pos and len(previous_pos) == len(previous.get("nodes", [])):
+        if _structure(G) == _previous_structure(previous):
+            return previous_pos
+
+    n = G.number_of_nodes()
+    changed = len(set(G.nodes()) ^ set(previous_pos))
+    if previous_pos and n and changed <= config.GRAPH_LAYOUT_WARM_START_MAX_CHANGE * n:
+        pos = force_layout(
+            G,
+            initial=previous_pos,
+            iterations=config.GRAPH_LAYOUT_WARM_ITERATIONS,
+            temperature=0.02
+        )
+    else:
+        pos = force_layout(G, iterations=config.GRAPH_LAYOUT_ITERATIONS)
+
+    return {node: (round(x, 4), round(y, 4)) for node, (x, y) in pos.items()}
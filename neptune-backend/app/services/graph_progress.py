@@ -0,0 +1,73 @@
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Receives (event name, payload); called from build threads
+ProgressEmitter = Callable[[str, Dict[str, Any]], None]
+
+class BuildProgress:
+    """
+    Fans out progress events of the in-process graph build to stream subscribers.
+
+    Events of the current build are kept so a subscriber that joins a build
+    already in flight first receives everything emitted so far.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: List[tuple] = []
+        self._subscribers: List[ProgressEmitter] = []
+
+    def start(self):
+        """Begin a new build; subscribers are told to discard the previous one"""
+        with self._lock:
+            self._events = []
+        self.emit("reset", {})
+
+    def emit(self, event: str, data: Dict[str, Any]):
+        with self._lock:
+            self._events.append((event, data))
+            for subscriber in self._subscribers:
+                subscriber(event, data)
+
+    def subscribe(self, subscriber: ProgressEmitter):
+        """Register a subscriber and replay the current build's events to it"""
+        with self._lock:
+            for event, data in self._events:
+                subscriber(event, data)
+            self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: ProgressEmitter):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+class TopicNodeTracker:
+    """Accumulates note ids per topic during a build and emits the node as it grows"""
+
+    def __init__(self, emit: Optional[ProgressEmitter]):
+        self._emit = emit
+        self._note_ids: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, topic: str, note_id: str):
+        if self._emit is None:
+            return
+        with self._lock:
+            note_ids = self._note_ids.setdefault(topic, [])
+            if note_id in note_ids:
+                return
+            note_ids.append(note_id)
+            # Same shape as graph_to_frontend_format nodes
+            node = {
+                "id": topic,
+                "label": topic,
+                "size": len(note_ids) * 20,
+                "noteCount": len(note_ids),
+                "noteIds": list(note_ids)
+            }
+        self._emit("node", node)
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+class GraphRebuildScheduler:
+    """
+    Coalesces knowledge graph rebuild triggers and runs at most one build at a time.
+
+    Every trigger restarts a debounce timer, so a burst of autosaves becomes a single
+    build once the burst has been quiet for debounce_seconds. Triggers that arrive
+    while a build is running mark it stale; as soon as it finishes the scheduler
+    starts a follow-up build that supersedes it. The pipeline is synchronous, so a
+    stale build is superseded rather than interrupted.
+    """
+
+    def __init__(self, build: Callable[[], Awaitable[Any]], debounce_seconds: float = 2.0):
+        """
+        Args:
+            build: Coroutine function that runs one full rebuild and returns its result
+            debounce_seconds: Quiet period required after the last trigger before building
+        """
+        self._build = build
+        self.debounce_seconds = debounce_seconds
+        self._requested = 0  # Bumped on every trigger
+        self._built = 0  # Trigger count the last finished build started from
+        self._timer: Optional[asyncio.Task] = None
+        self._build_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_building(self) -> bool:
+        return self._build_task is not None and not self._build_task.done()
+
+    @property
+    def is_stale(self) -> bool:
+        """True when triggers arrived after the last build started"""
+        return self._requested != self._built
+
+    def trigger(self):
+        """Request a rebuild after the debounce window. Must be called from the event loop."""
+        self._requested += 1
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().create_task(self._fire_after_debounce())
+
+    async def refresh(self) -> Any:
+        """
+        Build now and return the result, skipping the debounce window.
+
+        If a build is already running the caller joins it (and its follow-up if it
+        turns out stale) instead of starting another one.
+        """
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        # Shield so a disconnecting client doesn't cancel a build other callers share
+        return await asyncio.shield(self._ensure_build())
+
+    async def _fire_after_debounce(self):
+        await asyncio.sleep(self.debounce_seconds)
+        self._timer = None
+        self._ensure_build()
+
+    def _ensure_build(self) -> asyncio.Task:
+        if not self.is_building:
+            self._build_task = asyncio.get_running_loop().create_task(self._run())
+            # Errors are already logged; mark them retrieved for builds nobody awaits
+            self._build_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._build_task
+
+    async def _run(self) -> Any:
+        while True:
+            generation = self._requested
+            try:
+                result = await self._build()
+            except Exception as e:
+                print(f"Error rebuilding knowledge graph: {e}")
+                raise
+            self._built = generation
+
+            # Newer triggers still debouncing will start their own build
+            if self._requested == generation or self._timer is not None:
+                return result
@@ -0,0 +1,195 @@
+import hashlib
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+
+from app.core.config import config
+from app.db.models import GraphSnapshot
+from app.services import wire_format
+
+class LoadedSnapshot:
+    """A graph snapshot held in memory together with its pre-encoded response body"""
+
+    def __init__(self, version: int, data: Dict, body: bytes):
+        self.version = version
+        self.data = data
+        self.body = body  # UTF-8 JSON, encoded once per version rather than per request
+        self.etag = f'"graph-v{version}"'
+        # (columnar, media type, encoding) -> (body, applied encoding), filled as clients ask
+        self._variants: Dict[tuple, Tuple[bytes, Optional[str]]] = {}
+
+    def etag_for(
+        self,
+        columnar: bool = False,
+        media_type: str = wire_format.JSON,
+        encoding: Optional[str] = None
+    ) -> str:
+        """ETag of one representation: wire format, media type and applied content coding"""
+        suffix = (
+            ("-columnar" if columnar else "")
+            + ("-msgpack" if media_type == wire_format.MSGPACK else "")
+            + (f"-{encoding}" if encoding else "")
+        )
+        if not suffix:
+            return self.etag
+        return f'"graph-v{self.version}{suffix}"'
+
+    def render(
+        self,
+        columnar: bool = False,
+        media_type: str = wire_format.JSON,
+        encoding: Optional[str] = None
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        The snapshot in the requested wire format, encoded and compressed once per version.
+
+        Returns:
+            (body, applied content encoding or None)
+        """
+        key = (columnar, media_type, encoding)
+        variant = self._variants.get(key)
+        if variant is None:
+            if columnar or media_type != wire_format.JSON:
+                body = wire_format.encode(wire_format.to_columnar(self.data) if columnar else self.data, media_type)
+            else:
+                body = self.body
+            variant = wire_format.compress(body, encoding, config.RESPONSE_COMPRESSION_MIN_BYTES)
+            self._variants[key] = variant
+        return variant
+
+# Most recent snapshot this process has seen
+_current: Optional[LoadedSnapshot] = None
+
+def _encode(graph_data: Dict) -> bytes:
+    return wire_format.dumps(graph_data)
+
+def save_graph_snapshot(db: Session, graph_data: Dict) -> LoadedSnapshot:
+    """
+    Persist a built graph as a new version, unless it is identical to the latest one.
+
+    Older versions beyond GRAPH_SNAPSHOT_RETENTION are deleted.
+
+    Returns:
+        The snapshot now current, with a new version only if the graph changed
+    """
+    global _current
+    body = _encode(graph_data)
+    digest = hashlib.sha256(body).hexdigest()
+
+    latest = db.query(GraphSnapshot).order_by(GraphSnapshot.id.desc()).first()
+    if latest is not None and latest.content_hash == digest:
+        snapshot = LoadedSnapshot(latest.id, graph_data, body)
+    else:
+        row = GraphSnapshot(
+            data=body.decode("utf-8"),
+            content_hash=digest,
+            node_count=len(graph_data.get("nodes", [])),
+            link_count=len(graph_data.get("links", []))
+        )
+        db.add(row)
+        db.flush()
+
+        if config.GRAPH_SNAPSHOT_RETENTION > 0:
+            db.query(GraphSnapshot).filter(
+                GraphSnapshot.id <= row.id - config.GRAPH_SNAPSHOT_RETENTION
+            ).delete(synchronize_session=False)
+        db.commit()
+        snapshot = LoadedSnapshot(row.id, graph_data, body)
+
+    if _current is None or snapshot.version >= _current.version:
+        _current = snapshot
+    return snapshot
+
+def get_latest_snapshot(db: Session) -> Optional[LoadedSnapshot]:
+    """
+    Return the newest snapshot, loading it from the database only when another
+    process has written a newer version than the one held in memory.
+    """
+    global _current
+    version = db.query(GraphSnapshot.id).order_by(GraphSnapshot.id.desc()).limit(1).scalar()
+    if version is None:
+        return None
+    if _current is None or _current.version != version:
+        _current = load_snapshot(db, version)
+    return _current
+
+def load_snapshot(db: Session, version: int) -> Optional[LoadedSnapshot]:
+    """Load a specific snapshot version, or None if it doesn't exist (or was pruned)"""
+    data = db.query(GraphSnapshot.data).filter(GraphSnapshot.id == version).scalar()
+    if data is None:
+        return None
+    return LoadedSnapshot(version, wire_format.loads(data), data.encode("utf-8"))
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def _link_key(link: Dict) -> tuple:
+    # Graph is undirected, so (a, b) and (b, a) are the same link
+    source, target = link["source"], link["target"]
+    return (source, target) if source <= target else (target, source)
+
+def diff_graph_data(old: Dict, new: Dict) -> Dict:
+    """
+    Compute node and link changes between two frontend graph payloads.
+
+    Returns:
+        Dictionary with addedNodes, updatedNodes and addedLinks, updatedLinks holding
+        full objects, and removedNodes (ids) and removedLinks ({source, target}) holding keys
+    """
+    old_nodes = {node["id"]: node for node in old.get("nodes", [])}
+    new_nodes = {node["id"]: node for node in new.get("nodes", [])}
+    old_links = {_link_key(link): link for link in old.get("links", [])}
+    new_links = {_link_key(link): link for link in new.get("links", [])}
+
+    return {
+        "addedNodes": [node for node_id, node in new_nodes.items() if node_id not in old_nodes],
+        "updatedNodes": [
+            node for node_id, node in new_nodes.items()
+            if node_id in old_nodes and old_nodes[node_id] != node
+        ],
+        "removedNodes": [node_id for node_id in old_nodes if node_id not in new_nodes],
+        "addedLinks": [link for key, link in new_links.items() if key not in old_links],
+        "updatedLinks": [
+            link for key, link in new_links.items()
+            if key in old_links and old_links[key] != link
+        ],
+        "removedLinks": [
+            {"source": key[0], "target": key[1]} for key in old_links if key not in new_links
+        ],
+    }
+
+# Recent diffs keyed by (since, version); polling clients mostly ask for the same pair
+_diff_cache: Dict[tuple, Dict] = {}
+_DIFF_CACHE_SIZE = 32
+
+def get_graph_changes(db: Session, since: int) -> Optional[Dict]:
+    """
+    Describe how the graph changed after version `since`.
+
+    Returns:
+        None if no graph has been built yet. Otherwise a dictionary with the current
+        "version" and either "full": False plus "changes", or "full": True plus the
+        whole "graph" when `since` is unknown or has been pruned.
+    """
+    latest = get_latest_snapshot(db)
+    if latest is None:
+        return None
+    if since == latest.version:
+        return {"version": latest.version, "since": since, "full": False, "changes": diff_graph_data({}, {})}
+
+    key = (since, latest.version)
+    if key not in _diff_cache:
+        base = load_snapshot(db, since) if 0 < since < latest.version else None
+        if base is None:
+            return {"version": latest.version, "since": since, "full": True, "graph": latest.data}
+
+        if len(_diff_cache) >= _DIFF_CACHE_SIZE:
+            _diff_cache.pop(next(iter(_diff_cache)))
+        _diff_cache[key] = diff_graph_data(base.data, latest.data)
+
+    return {"version": latest.version, "since": since, "full": False, "changes": _diff_cache[key]}
@@ -0,0 +1,346 @@
+import json
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+
+from app.core.config import config
+from app.services.graph_layout import Positions
+
+MAGIC = b"NPTGRAPH"
+FORMAT_VERSION = 1
+# Arrays start on cache-line boundaries so memory-mapped views are aligned for any dtype
+ALIGNMENT = 64
+
+class TopicNode:
+    """One node of a CompactGraph, materialized on demand"""
+    __slots__ = ("index", "label", "type", "size", "note_count")
+
+    def __init__(self, index: int, label: str, type: str, size: float, note_count: int):
+        self.index = index
+        self.label = label
+        self.type = type
+        self.size = size
+        self.note_count = note_count
+
+    def __repr__(self) -> str:
+        return f"TopicNode({self.index}, {self.label!r}, notes={self.note_count})"
+
+def _pack_strings(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """UTF-8 encode strings into one byte array plus n + 1 offsets"""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.array([len(b) for b in encoded], dtype=np.int64), out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+class _StringTable:
+    """Strings stored as offsets into a byte array, decoded only when accessed"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+        self._lookup: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def index(self, s: str) -> int:
+        """Position of s; raises KeyError if absent. Builds the lookup table on first use"""
+        if self._lookup is None:
+            self._lookup = {self[i]: i for i in range(len(self))}
+        return self._lookup[s]
+
+class CompactGraph:
+    """
+    Read-optimized, array-backed form of the topic graph.
+
+    Nodes are interned to integer ids 0..n-1. Adjacency is CSR (indptr, indices,
+    weights) with both directions of each undirected edge stored, so neighbours of
+    node i are indices[indptr[i]:indptr[i + 1]]. Note membership is a CSR
+    topic-by-note incidence matrix over interned note ids. Labels and note ids are
+    UTF-8 string tables decoded on access.
+
+    Everything lives in NumPy arrays, so a graph saved with save() loads with
+    load() as read-only memory-mapped views: loading is O(1) and processes mapping
+    the same file share its pages.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], types: List[str]):
+        self.arrays = arrays
+        self.types = types
+        self.labels = _StringTable(arrays["label_offsets"], arrays["label_bytes"])
+        self.note_keys = _StringTable(arrays["note_offsets"], arrays["note_bytes"])
+        self.node_type = arrays["node_type"]
+        self.size = arrays["size"]
+        self.positions = arrays["positions"]
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.weights = arrays["weights"]
+        self.note_indptr = arrays["note_indptr"]
+        self.note_indices = arrays["note_indices"]
+        self._note_topics: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def edge_count(self) -> int:
+        rows = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        return int(np.count_nonzero(rows <= self.indices))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def has_positions(self) -> bool:
+        return len(self.positions) > 0 and not np.isnan(self.positions).all()
+
+    # Construction
+
+    @classmethod
+    def from_networkx(cls, G: nx.Graph, pos: Optional[Positions] = None) -> "CompactGraph":
+        """
+        Convert a topic graph as built by create_topic_graph.
+
+        Keeps node type, size, note_ids and edge weight; other attributes are dropped.
+
+        Args:
+            G: Undirected topic graph
+            pos: Optional node positions, e.g. from layout_graph
+        """
+        labels = list(G.nodes())
+        ids = {label: i for i, label in enumerate(labels)}
+        n = len(labels)
+
+        type_codes = {}
+        node_type = np.zeros(n, dtype=np.uint8)
+        size = np.zeros(n, dtype=np.float32)
+        positions = np.full((n, 2), np.nan, dtype=np.float32) if pos is not None else np.zeros((0, 2), dtype=np.float32)
+        note_keys = {}
+        note_indptr = np.zeros(n + 1, dtype=np.int64)
+        note_indices = []
+        for i, (label, data) in enumerate(G.nodes(data=True)):
+            node_type[i] = type_codes.setdefault(data.get("type", "topic"), len(type_codes))
+            size[i] = data.get("size", 30)
+            if pos is not None and label in pos:
+                positions[i] = pos[label]
+            members = list(dict.fromkeys(
+                note_keys.setdefault(str(note_id), len(note_keys)) for note_id in data.get("note_ids", ())
+            ))
+            note_indices.extend(members)
+            note_indptr[i + 1] = note_indptr[i] + len(members)
+        types = sorted(type_codes, key=type_codes.get)
+        if len(types) > 255:
+            raise ValueError("CompactGraph supports at most 255 node types")
+
+        edges = [(ids[u], ids[v], data.get("weight", 0.5)) for u, v, data in G.edges(data=True)]
+        src = np.array([u for u, _, _ in edges], dtype=np.int64)
+        dst = np.array([v for _, v, _ in edges], dtype=np.int64)
+        weight = np.array([w for _, _, w in edges], dtype=np.float32)
+        # Store both directions, self-loops once
+        loop = src == dst
+        rows = np.concatenate([src, dst[~loop]])
+        cols = np.concatenate([dst, src[~loop]])
+        weights = np.concatenate([weight, weight[~loop]])
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+
+        label_offsets, label_bytes = _pack_strings(labels)
+        note_offsets, note_bytes = _pack_strings(list(note_keys))
+        return cls({
+            "label_offsets": label_offsets,
+            "label_bytes": label_bytes,
+            "node_type": node_type,
+            "size": size,
+            "positions": positions,
+            "indptr": indptr,
+            "indices": cols[order].astype(np.int32),
+            "weights": weights[order],
+            "note_offsets": note_offsets,
+            "note_bytes": note_bytes,
+            "note_indptr": note_indptr,
+            "note_indices": np.array(note_indices, dtype=np.int32),
+        }, types)
+
+    def to_networkx(self) -> nx.Graph:
+        """Rebuild the NetworkX graph, with the attributes create_topic_graph sets"""
+        G = nx.Graph()
+        for node in self.nodes():
+            note_ids = self.note_ids(node.index)
+            G.add_node(
+                node.label,
+                type=node.type,
+                size=node.size,
+                note_count=len(note_ids),
+                note_ids=note_ids
+            )
+        labels = [self.labels[i] for i in range(self.node_count)]
+        G.add_weighted_edges_from((labels[u], labels[v], w) for u, v, w in self.edges())
+        return G
+
+    # Queries
+
+    def node_id(self, label: str) -> int:
+        """Interned id of a label; raises KeyError if absent"""
+        return self.labels.index(label)
+
+    def node(self, i: int) -> TopicNode:
+        return TopicNode(
+            i,
+            self.labels[i],
+            self.types[self.node_type[i]],
+            float(self.size[i]),
+            int(self.note_indptr[i + 1] - self.note_indptr[i])
+        )
+
+    def nodes(self) -> Iterator[TopicNode]:
+        for i in range(self.node_count):
+            yield self.node(i)
+
+    def edges(self) -> Iterator[Tuple[int, int, float]]:
+        """Each undirected edge once, as (u, v, weight) with u <= v"""
+        rows = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        keep = np.nonzero(rows <= self.indices)[0]
+        for u, v, w in zip(rows[keep].tolist(), self.indices[keep].tolist(), self.weights[keep].tolist()):
+            yield u, v, w
+
+    def neighbors(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(neighbour ids, edge weights) of node i, as array views"""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def note_ids(self, i: int) -> List[str]:
+        """Notes of topic i, in the order the source graph listed them"""
+        members = self.note_indices[self.note_indptr[i]:self.note_indptr[i + 1]]
+        return [self.note_keys[j] for j in members.tolist()]
+
+    def topics_of_note(self, note_id: str) -> List[int]:
+        """Ids of the topics a note belongs to, via the transposed incidence built on first use"""
+        if self._note_topics is None:
+            order = np.argsort(self.note_indices, kind="stable")
+            topics = np.repeat(np.arange(self.node_count, dtype=np.int32), np.diff(self.note_indptr))[order]
+            indptr = np.zeros(len(self.note_keys) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.note_indices, minlength=len(self.note_keys)), out=indptr[1:])
+            self._note_topics = (indptr, topics)
+        try:
+            j = self.note_keys.index(str(note_id))
+        except KeyError:
+            return []
+        indptr, topics = self._note_topics
+        return topics[indptr[j]:indptr[j + 1]].tolist()
+
+    # Persistence
+
+    def save(self, path: str):
+        """Write the graph to a single binary file, replacing it atomically"""
+        header = {"version": FORMAT_VERSION, "types": self.types, "arrays": {}}
+        offset = 0
+        layout = []
+        for name, array in self.arrays.items():
+            array = np.ascontiguousarray(array)
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            header["arrays"][name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            layout.append((offset, array))
+            offset += array.nbytes
+        encoded = json.dumps(header).encode("utf-8")
+        data_start = -(-(len(MAGIC) + 8 + len(encoded)) // ALIGNMENT) * ALIGNMENT
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.array([len(encoded), data_start], dtype="<u4").tobytes())
+            f.write(encoded)
+            for array_offset, array in layout:
+                f.seek(data_start + array_offset)
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CompactGraph":
+        """
+        Open a graph written by save().
+
+        Args:
+            path: File to open
+            mmap: Map the file read-only instead of reading it into memory
+        """
+        if mmap:
+            buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            buffer = np.fromfile(path, dtype=np.uint8)
+        if buffer[:len(MAGIC)].tobytes() != MAGIC:
+            raise ValueError(f"{path} is not a compact graph file")
+        header_length, data_start = np.frombuffer(buffer[len(MAGIC):len(MAGIC) + 8].tobytes(), dtype="<u4")
+        header = json.loads(buffer[len(MAGIC) + 8:len(MAGIC) + 8 + header_length].tobytes())
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact graph version {header['version']}")
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            start = int(data_start) + spec["offset"]
+            count = int(np.prod(spec["shape"]))
+            arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+        return cls(arrays, header["types"])
+
+def save_topic_graph(G: Optional[nx.Graph], pos: Optional[Positions] = None):
+    """
+    Write the built graph to GRAPH_STORE_PATH, if set, for other processes to map.
+
+    An empty graph (or None) removes the stored one, so readers never see a graph
+    whose notes are gone. Failures are logged rather than raised, since the store
+    is a side output that must not fail the build, and remove the stale file.
+    """
+    if not config.GRAPH_STORE_PATH:
+        return
+    try:
+        if G is None or G.number_of_nodes() == 0:
+            if os.path.exists(config.GRAPH_STORE_PATH):
+                os.remove(config.GRAPH_STORE_PATH)
+        else:
+            CompactGraph.from_networkx(G, pos).save(config.GRAPH_STORE_PATH)
+    except Exception as e:
+        print(f"Error saving topic graph to {config.GRAPH_STORE_PATH}: {e}")
+        # The previous build's graph no longer matches the notes, so don't leave it to be read
+        try:
+            os.remove(config.GRAPH_STORE_PATH)
+        except OSError:
+            pass
+
+# Graph mapped by this process, with the identity of the file it was mapped from
+_loaded: Optional[Tuple[Tuple[int, int], CompactGraph]] = None
+_loaded_lock = threading.Lock()
+
+def load_topic_graph() -> Optional[CompactGraph]:
+    """
+    Memory-map the graph last written to GRAPH_STORE_PATH, or None if there is none.
+
+    The mapping is reused until a build replaces the file, which save() does
+    atomically, so a new inode means a new graph.
+    """
+    global _loaded
+    if not config.GRAPH_STORE_PATH:
+        return None
+    try:
+        stat = os.stat(config.GRAPH_STORE_PATH)
+    except OSError:
+        return None
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+    with _loaded_lock:
+        if _loaded is None or _loaded[0] != stamp:
+            _loaded = (stamp, CompactGraph.load(config.GRAPH_STORE_PATH))
+        return _loaded[1]
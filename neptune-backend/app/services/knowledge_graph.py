@@ -1,31 +1,55 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, AsyncIterator
 import asyncio
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from fastapi import BackgroundTasks, APIRouter, Depends
 from datetime import datetime
 
-from app.services.llm_service import extract_topics_from_notes
+from app.services.llm_service import llm_service, extract_note_topics, consolidate_topics
+from app.services.topic_cache import content_hash, lookup_note_topics, store_note_topics
 from app.services.visualize_topics import create_topic_graph, graph_to_frontend_format
+from app.services.graph_layout import layout_graph
+from app.services.graph_store import save_topic_graph
+from app.services.graph_scheduler import GraphRebuildScheduler
+from app.services.graph_jobs import enqueue_graph_build, wait_for_graph_build
+from app.services.graph_snapshots import LoadedSnapshot, save_graph_snapshot, get_latest_snapshot
+from app.services.graph_progress import BuildProgress, ProgressEmitter, TopicNodeTracker, format_sse
 from app.db.models import FileSystem  # Import your file system model
-from app.db.database import get_db
+from app.db.database import get_db, SessionLocal
+from app.core.config import config
 
-# Cache for the latest graph data
-latest_graph_data = None
+def get_topic_extractor(backend: str = None):
+    """
+    Return the topic cache model name and extraction function for a backend.
+    
+    Args:
+        backend: "llm" or "keybert", defaults to TOPIC_BACKEND
+    """
+    backend = backend or config.TOPIC_BACKEND
+    if backend == "keybert":
+        from app.services.local_topics import extract_note_topics_locally
+        # v2: topics are picked per note; earlier cached picks depended on the other notes in the batch
+        return f"keybert-v2:{config.EMBEDDING_MODEL}", extract_note_topics_locally
+    if backend == "llm":
+        return llm_service.model_name, extract_note_topics
+    raise ValueError(f"Unknown topic backend: {backend}")
 
-async def generate_knowledge_graph(db: Session) -> Dict:
+def build_knowledge_graph(db: Session, emit: Optional[ProgressEmitter] = None) -> Dict:
     """
-    Generate knowledge graph from all notes in the database
+    Generate knowledge graph from all notes in the database.
+    
+    Synchronous: runs blocking database and LLM calls, so call it from a worker
+    thread or process rather than directly on the event loop.
     
     Args:
         db: Database session
+        emit: Optional progress callback receiving "node" events as topics are
+            extracted and "link" events as relationships are scored
         
     Returns:
         Dictionary with nodes and links for the frontend visualization
     """
-    global latest_graph_data
-    
     # Fetch all file content from database
-    notes = db.query(FileSystem).filter(FileSystem.type == "file").all()
+    notes = db.query(FileSystem).options(undefer(FileSystem.content)).filter(FileSystem.type == "file").all()
     
     # Format notes for processing
     formatted_notes = [
@@ -39,59 +63,214 @@ async def generate_knowledge_graph(db: Session) -> Dict:
     
     # Only process if we have notes with content
     if formatted_notes:
-        # Extract topics
-        topics_data = extract_topics_from_notes(formatted_notes)
+        # Reuse cached topics and only send changed notes to the LLM
+        model_name, extract_topics = get_topic_extractor()
+        cached_topics, changed_notes = lookup_note_topics(db, formatted_notes, model_name)
+        
+        # Cached topics can be shown straight away
+        nodes = TopicNodeTracker(emit)
+        for note_id, topic in cached_topics.items():
+            nodes.add(topic, note_id)
+        
+        # Notes with identical content only need to be classified once
+        hashes = {note["id"]: content_hash(note["content"]) for note in changed_notes}
+        unique_notes = {}
+        notes_by_hash = {}
+        for note in changed_notes:
+            unique_notes.setdefault(hashes[note["id"]], note)
+            notes_by_hash.setdefault(hashes[note["id"]], []).append(note["id"])
+        
+        def on_topic(item):
+            for note_id in notes_by_hash[hashes[item["note_id"]]]:
+                nodes.add(item["topic"], note_id)
+        
+        extracted = extract_topics(
+            list(unique_notes.values()),
+            on_topic=on_topic if emit is not None else None
+        )
+        topic_by_hash = {hashes[item["note_id"]]: item["topic"] for item in extracted}
+        changed_topics = {note_id: topic_by_hash[note_hash] for note_id, note_hash in hashes.items()}
+        store_note_topics(
+            db,
+            [{"topic": topic, "note_id": note_id} for note_id, topic in changed_topics.items()],
+            hashes,
+            model_name
+        )
+        
+        # Consolidate in original note order
+        topics_data = consolidate_topics([
+            {
+                "topic": cached_topics.get(note["id"], changed_topics.get(note["id"])),
+                "note_id": note["id"]
+            }
+            for note in formatted_notes
+        ])
         
         # Generate graph
         if topics_data:
-            graph = create_topic_graph(topics_data)
-            graph_data = graph_to_frontend_format(graph)
+            def on_edges(edges):
+                for topic1, topic2, strength in edges:
+                    emit("link", {"source": topic1, "target": topic2, "strength": strength})
             
-            # Update cache
-            latest_graph_data = graph_data
+            graph = create_topic_graph(topics_data, on_edges=on_edges if emit is not None else None)
             
-            return graph_data
+            # Lay out server-side, starting from the current snapshot so nodes stay put
+            previous = get_latest_snapshot(db)
+            positions = layout_graph(graph, previous.data if previous else None)
+            save_topic_graph(graph, positions)
+            return graph_to_frontend_format(graph, positions)
     
     # Return empty graph if no data
+    save_topic_graph(None)
     return {"nodes": [], "links": []}
 
-def get_cached_graph_data() -> Dict:
-    """Get the latest cached knowledge graph data"""
-    if latest_graph_data is None:
+def build_knowledge_graph_snapshot(db: Session, emit: Optional[ProgressEmitter] = None) -> LoadedSnapshot:
+    """Build the graph and persist it as the current versioned snapshot"""
+    return save_graph_snapshot(db, build_knowledge_graph(db, emit))
+
+async def generate_knowledge_graph(db: Session) -> Dict:
+    """Build and persist the graph on a worker thread so the event loop stays responsive"""
+    snapshot = await asyncio.to_thread(build_knowledge_graph_snapshot, db)
+    return snapshot.data
+
+def use_build_worker() -> bool:
+    """Whether rebuilds are queued for the out-of-process worker instead of run in the API"""
+    return config.GRAPH_BUILD_MODE == "worker"
+
+def get_cached_graph_data(db: Session) -> Dict:
+    """Get the latest persisted knowledge graph data"""
+    snapshot = get_latest_snapshot(db)
+    if snapshot is None:
         return {"nodes": [], "links": []}
-    return latest_graph_data
+    return snapshot.data
 
-async def update_knowledge_graph_async(db: Session):
-    """Update the knowledge graph in the background"""
-    await generate_knowledge_graph(db)
+# Progress of the in-process build, for streaming clients
+build_progress = BuildProgress()
 
-def schedule_knowledge_graph_update(background_tasks: BackgroundTasks, db: Session):
-    """Schedule a background task to update the knowledge graph"""
-    background_tasks.add_task(update_knowledge_graph_async, db)
+async def rebuild_knowledge_graph() -> LoadedSnapshot:
+    """Run one full rebuild with its own database session"""
+    def build():
+        build_progress.start()
+        db = SessionLocal()
+        try:
+            return build_knowledge_graph_snapshot(db, build_progress.emit)
+        finally:
+            db.close()
+    return await asyncio.to_thread(build)
+
+# Coalesces rebuild triggers so autosave bursts produce a single build
+graph_rebuild_scheduler = GraphRebuildScheduler(
+    rebuild_knowledge_graph,
+    debounce_seconds=config.GRAPH_REBUILD_DEBOUNCE_SECONDS
+)
+
+def schedule_knowledge_graph_update(db: Session):
+    """Request a debounced knowledge graph rebuild. Call from an async request handler."""
+    if use_build_worker():
+        enqueue_graph_build(db, delay_seconds=config.GRAPH_REBUILD_DEBOUNCE_SECONDS)
+    else:
+        graph_rebuild_scheduler.trigger()
+
+async def refresh_knowledge_graph_now(db: Session) -> Optional[LoadedSnapshot]:
+    """Rebuild immediately, joining a build that is already running"""
+    if use_build_worker():
+        job = enqueue_graph_build(db)
+        return await wait_for_graph_build(db, job.id, config.GRAPH_REFRESH_TIMEOUT_SECONDS)
+    return await graph_rebuild_scheduler.refresh()
+
+async def stream_knowledge_graph_build(db: Session) -> AsyncIterator[str]:
+    """
+    Refresh the graph and yield Server-Sent Events as it is built.
+    
+    Emits "reset" when a build (re)starts, "node" and "link" events as topics
+    are extracted and relationships scored, and finally "complete" with the
+    snapshot version. Joins a build already in flight, replaying its events.
+    With the out-of-process worker, progress isn't visible to the API, so the
+    finished snapshot is streamed once the job completes.
+    """
+    if use_build_worker():
+        try:
+            snapshot = await refresh_knowledge_graph_now(db)
+        except (TimeoutError, RuntimeError) as e:
+            yield format_sse("error", {"detail": str(e)})
+            return
+        yield format_sse("reset", {})
+        if snapshot is not None:
+            for node in snapshot.data.get("nodes", []):
+                yield format_sse("node", node)
+            for link in snapshot.data.get("links", []):
+                yield format_sse("link", link)
+        yield format_sse("complete", {"version": snapshot.version if snapshot else None})
+        return
+    
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    def subscriber(event, data):
+        # Called from build threads
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+    
+    build_progress.subscribe(subscriber)
+    refresh = asyncio.ensure_future(graph_rebuild_scheduler.refresh())
+    try:
+        while True:
+            next_event = asyncio.ensure_future(queue.get())
+            await asyncio.wait({next_event, refresh}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event.done():
+                yield format_sse(*next_event.result())
+                continue
+            next_event.cancel()
+            break
+        
+        # Flush anything emitted just before the build finished
+        while not queue.empty():
+            yield format_sse(*queue.get_nowait())
+        
+        try:
+            snapshot = refresh.result()
+        except Exception as e:
+            yield format_sse("error", {"detail": str(e)})
+            return
+        yield format_sse("complete", {
+            "version": snapshot.version,
+            "nodes": len(snapshot.data.get("nodes", [])),
+            "links": len(snapshot.data.get("links", []))
+        })
+    finally:
+        build_progress.unsubscribe(subscriber)
+        refresh.cancel()
+
+def load_latest_graph_on_startup():
+    """Load the newest persisted snapshot so the first request after boot isn't empty"""
+    db = SessionLocal()
+    try:
+        snapshot = get_latest_snapshot(db)
+        if snapshot is not None:
+            print(f"Loaded knowledge graph snapshot v{snapshot.version}")
+    except Exception as e:
+        print(f"Could not load knowledge graph snapshot: {e}")
+    finally:
+        db.close()
 
 router = APIRouter()
 
 @router.get("/", response_model=Dict)
-async def get_knowledge_graph(
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
+async def get_knowledge_graph(db: Session = Depends(get_db)):
     """
     Get the knowledge graph data for visualization.
     This endpoint will return cached data if available,
-    and trigger a refresh in the background.
+    and trigger a build in the background if nothing has been built yet.
     """
-    # Get current cached data
-    graph_data = get_cached_graph_data()
-    
-    # Schedule update for next time
-    background_tasks.add_task(generate_knowledge_graph, db)
-    
-    return graph_data
+    snapshot = get_latest_snapshot(db)
+    if snapshot is None:
+        schedule_knowledge_graph_update(db)
+        return {"nodes": [], "links": []}
+    return snapshot.data
 
 @router.post("/refresh", response_model=Dict)
 async def refresh_knowledge_graph(db: Session = Depends(get_db)):
     """
     Force refresh the knowledge graph and wait for the results
     """
-    return await generate_knowledge_graph(db)
\ No newline at end of file
+    snapshot = await refresh_knowledge_graph_now(db)
+    return snapshot.data if snapshot is not None else {"nodes": [], "links": []}
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+class LLMResponseCache:
+    """
+    On-disk cache of chat completion responses backed by SQLite.
+
+    Entries are keyed by a hash of the model, messages and request parameters.
+    They expire after ttl_seconds, and once more than max_entries are stored the
+    least recently used ones are evicted. The database uses WAL mode so several
+    API workers can share one file.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 100_000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_responses_last_access ON llm_responses (last_access)"
+        )
+        self._size = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, messages: Any, **params) -> str:
+        """Hash the full request so any change in prompt or parameters is a different entry"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds and created_at + self.ttl_seconds < now:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._size -= 1
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return response
+
+    def set(self, key: str, model: str, response: str):
+        """Store a response and evict least recently used entries past max_entries"""
+        now = time.time()
+        with self._lock:
+            existed = self._conn.execute(
+                "SELECT 1 FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now)
+            )
+            if not existed:
+                self._size += 1
+            if self.max_entries and self._size > self.max_entries:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the least recently used ones down to max_entries"""
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        # Other processes may share the file, so recount before trimming
+        self._size = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        excess = self._size - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN "
+                "(SELECT key FROM llm_responses ORDER BY last_access LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+            self._size -= excess
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current number of entries"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self._size,
+        }
+
+
+class TopicEdgeCache:
+    """
+    Persistent relationship scores keyed by (topic_a, topic_b, model).
+
+    Pairs are stored in sorted order so (a, b) and (b, a) share one entry. This lets
+    a rebuild score only the pairs that involve topics it hasn't seen before.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS topic_edges (
+                topic_a TEXT NOT NULL,
+                topic_b TEXT NOT NULL,
+                model TEXT NOT NULL,
+                strength REAL NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (topic_a, topic_b, model)
+            )
+            """
+        )
+
+    @staticmethod
+    def pair_key(topic1: str, topic2: str) -> Tuple[str, str]:
+        return (topic1, topic2) if topic1 <= topic2 else (topic2, topic1)
+
+    def get_many(self, pairs: List[Tuple[str, str]], model: str) -> Dict[Tuple[str, str], float]:
+        """Return cached strengths for the given pairs, keyed by sorted pair"""
+        wanted = {self.pair_key(a, b) for a, b in pairs}
+        if not wanted:
+            return {}
+        topics = sorted({topic for pair in wanted for topic in pair})
+        found = {}
+        with self._lock:
+            # Chunk the IN list to stay under SQLite's bound-parameter limit
+            for start in range(0, len(topics), 500):
+                chunk = topics[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT topic_a, topic_b, strength FROM topic_edges "
+                    f"WHERE model = ? AND topic_a IN ({placeholders})",
+                    (model, *chunk)
+                ).fetchall()
+                for topic_a, topic_b, strength in rows:
+                    if (topic_a, topic_b) in wanted:
+                        found[(topic_a, topic_b)] = strength
+        return found
+
+    def set_many(self, scores: Dict[Tuple[str, str], float], model: str):
+        """Store strengths for scored pairs"""
+        now = time.time()
+        rows = [
+            (*self.pair_key(a, b), model, strength, now)
+            for (a, b), strength in scores.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO topic_edges (topic_a, topic_b, model, strength, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM topic_edges")
@@ -0,0 +1,284 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import config
+
+class LLMUnavailableError(RuntimeError):
+    """
+    The API is rate limiting or failing persistently.
+
+    Raised instead of degrading results so a rebuild fails (and keeps the last good
+    graph) rather than silently producing "unclassified" topics and default edges.
+    """
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until enough capacity has refilled"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._level = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        Take amount from the bucket, waiting for it to refill if needed.
+
+        Amounts above capacity are clamped so a single large request can't block forever.
+
+        Returns:
+            Seconds spent waiting
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._level >= amount:
+                    self._level -= amount
+                    return waited
+                wait = max(self._paused_until - now, (amount - self._level) / self.rate)
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, amount: float):
+        """Charge (positive) or refund (negative) the difference once the real cost is known"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level - amount)
+
+    def pause(self, seconds: float):
+        """Hold every caller back, e.g. for the Retry-After of a 429"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and rejects calls for
+    reset_seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        if not self.failure_threshold:
+            return True
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or (self.failure_threshold and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+def retryable_errors() -> Tuple[type, ...]:
+    """OpenAI errors worth retrying; openai is imported here, on the first request, not at startup"""
+    import openai
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Server-requested delay in seconds from a 429 response, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+class RateLimiter:
+    """
+    Paces OpenAI requests to request and token budgets, retries retryable errors
+    with jittered exponential backoff, and stops calling through a circuit breaker.
+
+    One instance is shared by every call site in the process so concurrent rebuilds
+    draw from the same quota.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_retries: int = 4,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 30.0,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0
+    ):
+        """
+        Args:
+            requests_per_minute: Request budget, 0 for unlimited
+            tokens_per_minute: Prompt plus completion token budget, 0 for unlimited
+            max_retries: Retries per request after the first attempt
+            backoff_base_seconds: First backoff delay, doubled on every retry
+            backoff_max_seconds: Upper bound on a single backoff delay
+            failure_threshold: Consecutive failures that open the circuit, 0 disables it
+            reset_seconds: How long the circuit stays open before a trial request
+        """
+        # Capacity of one minute's budget allows short bursts up to the quota
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self._counters = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "circuit_rejections": 0,
+            "tokens": 0,
+        }
+        self._throttled_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["throttled_seconds"] = round(self._throttled_seconds, 3)
+        stats["circuit"] = self.breaker.state
+        return stats
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps concurrent retries from arriving in lockstep
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+    def call(self, send: Callable[[], Any], estimated_tokens: int = 0) -> Any:
+        """
+        Run one API request within the budgets, retrying retryable errors.
+
+        Args:
+            send: Performs the request and returns the response
+            estimated_tokens: Expected prompt plus completion tokens, reconciled
+                with the response's usage afterwards
+
+        Raises:
+            LLMUnavailableError: if the circuit is open or a 429 outlasted every retry
+            The last error for other failures once retries are exhausted
+        """
+        import openai
+
+        retryable = retryable_errors()
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self._count("circuit_rejections")
+                raise LLMUnavailableError("OpenAI circuit breaker is open after repeated failures")
+
+            waited = 0.0
+            if self.requests is not None:
+                waited += self.requests.acquire(1)
+            if self.tokens is not None and estimated_tokens:
+                waited += self.tokens.acquire(estimated_tokens)
+            if waited:
+                with self._lock:
+                    self._throttled_seconds += waited
+
+            self._count("requests")
+            try:
+                response = send()
+            except retryable as e:
+                self.breaker.record_failure()
+                self._count("failures")
+                retry_after = None
+                if isinstance(e, openai.RateLimitError):
+                    self._count("rate_limited")
+                    retry_after = _retry_after(e)
+                if attempt == self.max_retries:
+                    if isinstance(e, openai.RateLimitError):
+                        raise LLMUnavailableError(f"OpenAI rate limit persisted after {attempt + 1} attempts") from e
+                    raise
+                delay = max(retry_after or 0.0, self._backoff(attempt))
+                if retry_after is not None:
+                    # The quota is shared, so everyone else waits too
+                    for bucket in (self.requests, self.tokens):
+                        if bucket is not None:
+                            bucket.pause(retry_after)
+                self._count("retries")
+                time.sleep(delay)
+                continue
+            except Exception:
+                # Bad requests and the like won't get better by retrying, and don't mean the API is down
+                self.breaker.record_success()
+                raise
+
+            self.breaker.record_success()
+            usage = getattr(response, "usage", None)
+            used = getattr(usage, "total_tokens", None) if usage is not None else None
+            if used:
+                self._count("tokens", used)
+                if self.tokens is not None:
+                    self.tokens.adjust(used - estimated_tokens)
+            return response
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """The process-wide limiter configured from LLM_* settings"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(
+                    requests_per_minute=config.LLM_REQUESTS_PER_MINUTE,
+                    tokens_per_minute=config.LLM_TOKENS_PER_MINUTE,
+                    max_retries=config.LLM_MAX_RETRIES,
+                    backoff_base_seconds=config.LLM_BACKOFF_BASE_SECONDS,
+                    backoff_max_seconds=config.LLM_BACKOFF_MAX_SECONDS,
+                    failure_threshold=config.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                    reset_seconds=config.LLM_CIRCUIT_RESET_SECONDS
+                )
+    return _rate_limiter
@@ -1,66 +1,397 @@
 import os
-from typing import List, Dict, Any
-from openai import OpenAI
+import json
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Callable
 from dotenv import load_dotenv
 
+from app.core.config import config
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_limits import LLMUnavailableError, RateLimiter, get_rate_limiter
+from app.services.note_chunking import chunk_markdown, estimate_tokens
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
 load_dotenv()
 
+# Characters of note content sent to the model per note in batched requests
+NOTE_CHAR_LIMIT = 3000
+# Approximate prompt tokens added per note by the batch JSON framing
+BATCH_ITEM_OVERHEAD_TOKENS = 16
+
+TOPIC_INSTRUCTIONS = """Choose something more general but not too much. I want a little more generalization because I want to combine some notes into a single topic. But I don't want it too general such that it combines every note."""
+
 class LLMService:
-    def __init__(self, model_name="gpt-4o"):
+    def __init__(
+        self,
+        model_name="gpt-4o",
+        max_concurrency: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+        base_url: Optional[str] = None,
+        batch_token_budget: Optional[int] = None,
+        cache: Optional[LLMResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        """
+        Args:
+            model_name: Chat model used for topic extraction
+            max_concurrency: Maximum number of requests in flight at once
+            request_timeout: Per-request timeout in seconds
+            base_url: Optional OpenAI-compatible endpoint (defaults to OPENAI_BASE_URL or the OpenAI API)
+            batch_token_budget: Prompt token budget per batched request; 0 extracts one note per request
+            cache: Response cache shared by every call site (defaults to the on-disk cache from config)
+            rate_limiter: Quota, retry and circuit breaker policy (defaults to the process-wide limiter)
+        """
         self.model_name = model_name
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            print("Warning: OPENAI_API_KEY not found in environment")
-        self.client = OpenAI(api_key=api_key)
+        self.max_concurrency = max_concurrency or config.LLM_MAX_CONCURRENCY
+        self.request_timeout = request_timeout or config.LLM_REQUEST_TIMEOUT
+        self.batch_token_budget = (
+            config.LLM_BATCH_TOKEN_BUDGET if batch_token_budget is None else batch_token_budget
+        )
+        self.base_url = base_url
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        if cache is None and config.LLM_CACHE_ENABLED:
+            cache = LLMResponseCache(
+                config.LLM_CACHE_PATH,
+                ttl_seconds=config.LLM_CACHE_TTL_SECONDS,
+                max_entries=config.LLM_CACHE_MAX_ENTRIES
+            )
+        self.cache = cache
+        # Caps requests in flight across nested pools (notes, then chunks of a note)
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    @property
+    def client(self) -> "OpenAI":
+        """The OpenAI client, built on first use so importing this module stays cheap"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    api_key = os.getenv("OPENAI_API_KEY")
+                    if not api_key:
+                        print("Warning: OPENAI_API_KEY not found in environment")
+                    # Retries are handled by the rate limiter so they respect the shared quota
+                    self._client = OpenAI(
+                        api_key=api_key, base_url=self.base_url, timeout=self.request_timeout, max_retries=0
+                    )
+        return self._client
+
+    @client.setter
+    def client(self, client: "OpenAI"):
+        self._client = client
     
-    def extract_topic_from_note(self, note_content: str, note_id: str) -> Dict[str, Any]:
-        """Extract a single topic from a note"""
+    def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        bypass_cache: bool = False,
+        client: Optional["OpenAI"] = None,
+        **params
+    ) -> str:
+        """
+        Run a chat completion and return the message content, serving repeats from the cache.
+        
+        Args:
+            messages: Chat messages to send
+            model: Model name, defaults to the service model
+            bypass_cache: Skip the cache lookup and always call the API (the result is still stored)
+            client: Optional OpenAI client to use instead of the service client
+            **params: Extra completion parameters (max_tokens, temperature, response_format, ...)
+        
+        Raises:
+            LLMUnavailableError: if the API is persistently rate limiting or failing
+            Any other error from the OpenAI client; failures are never cached.
+        """
+        model = model or self.model_name
+        key = None
+        if self.cache is not None:
+            key = LLMResponseCache.make_key(model, messages, **params)
+            if not bypass_cache:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+        
+        estimated_tokens = sum(estimate_tokens(message["content"]) for message in messages) + params.get("max_tokens", 0)
+        with self._request_slots:
+            response = self.rate_limiter.call(
+                lambda: (client or self.client).chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **params
+                ),
+                estimated_tokens
+            )
+        content = response.choices[0].message.content
+        
+        if key is not None and content is not None:
+            self.cache.set(key, model, content)
+        return content
+    
+    def _topic_for_text(self, text: str) -> str:
+        """Ask the model for a one-word topic for a piece of note content"""
         prompt = f"""
         Generate a single general topic (1 word) that best summarizes this note content. It doesn't have to describe the significance of the note as such.
-        Choose something more general but not too much. I want a little more generalization because I want to combine some notes into a single topic. But I don't want it too general such that it combines every note.
+        {TOPIC_INSTRUCTIONS}
 
         Note content:
-        {note_content[:3000]}
+        {text}
         
         Return ONLY the topic, nothing else.
         """
+        return self.chat_completion(
+            [{"role": "user", "content": prompt}],
+            max_tokens=10
+        ).strip()
+    
+    def _reduce_chunk_topics(self, chunk_topics: List[str]) -> str:
+        """Combine the topics of a note's chunks into one topic for the note"""
+        counts = Counter(chunk_topics)
+        if len(counts) == 1:
+            return chunk_topics[0]
+        
+        prompt = f"""
+        These are topics of consecutive sections of one note: {", ".join(chunk_topics)}.
+        Generate a single general topic (1 word) that best summarizes the whole note.
+        {TOPIC_INSTRUCTIONS}
         
+        Return ONLY the topic, nothing else.
+        """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
+            return self.chat_completion(
+                [{"role": "user", "content": prompt}],
                 max_tokens=10
-            )
-            topic = response.choices[0].message.content.strip()
-            return {"topic": topic, "note_id": note_id}
+            ).strip()
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            print(f"Error reducing chunk topics, using the most common one: {e}")
+            return counts.most_common(1)[0][0]
+    
+    def extract_topic_from_note(self, note_content: str, note_id: str) -> Dict[str, Any]:
+        """
+        Extract a single topic from a note.
+        
+        Notes longer than NOTE_CHUNK_TOKENS are split along markdown headings into at
+        most NOTE_MAX_CHUNKS chunks. Chunks are classified in parallel and their
+        topics reduced to one, with an extra request only when the chunks disagree.
+        """
+        try:
+            if estimate_tokens(note_content) <= config.NOTE_CHUNK_TOKENS:
+                return {"topic": self._topic_for_text(note_content), "note_id": note_id}
+            
+            chunks = chunk_markdown(note_content, config.NOTE_CHUNK_TOKENS, config.NOTE_MAX_CHUNKS)
+            
+            def chunk_topic(chunk):
+                try:
+                    return self._topic_for_text(chunk)
+                except LLMUnavailableError:
+                    raise
+                except Exception as e:
+                    print(f"Error extracting chunk topic for note {note_id}: {e}")
+                    return None
+            
+            chunk_topics = [topic for topic in self.map_concurrent(chunk_topic, chunks) if topic]
+            if not chunk_topics:
+                raise RuntimeError("no chunk could be classified")
+            return {"topic": self._reduce_chunk_topics(chunk_topics), "note_id": note_id}
+        except LLMUnavailableError:
+            # Don't let an outage turn every note into "unclassified"
+            raise
         except Exception as e:
             print(f"Error extracting topic: {e}")
             return {"topic": "unclassified", "note_id": note_id}
     
-    def process_notes(self, notes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process notes and return consolidated topics"""
-        # Extract topics for each note
-        extracted_topics = []
+    def extract_topics_from_batch(self, notes: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Extract topics for several notes with a single structured-JSON request.
+        
+        Returns:
+            Mapping of note_id to topic for every note the model answered for.
+            Notes that are missing or malformed in the response are left out.
+        """
+        notes_json = json.dumps(
+            [{"id": note["id"], "content": note["content"][:NOTE_CHAR_LIMIT]} for note in notes],
+            ensure_ascii=False
+        )
+        prompt = f"""
+        For each note below, generate a single general topic (1 word) that best summarizes its content. It doesn't have to describe the significance of the note as such.
+        {TOPIC_INSTRUCTIONS}
+
+        Notes (JSON array of objects with "id" and "content"):
+        {notes_json}
+        
+        Return ONLY a JSON object of the form {{"topics": {{"<note id>": "<topic>", ...}}}} with one entry per note id.
+        """
+        
+        try:
+            content = self.chat_completion(
+                [{"role": "user", "content": prompt}],
+                max_tokens=16 * len(notes) + 32,
+                response_format={"type": "json_object"}
+            )
+            parsed = json.loads(content).get("topics", {})
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            print(f"Error extracting batched topics: {e}")
+            return {}
+        
+        if not isinstance(parsed, dict):
+            return {}
+        
+        topics = {}
         for note in notes:
-            result = self.extract_topic_from_note(note["content"], note["id"])
-            extracted_topics.append(result)
-        
-        # Consolidate duplicate topics
-        topic_map = {}
-        for item in extracted_topics:
-            topic = item["topic"]
-            note_id = item["note_id"]
+            topic = parsed.get(note["id"])
+            if isinstance(topic, str) and topic.strip():
+                topics[note["id"]] = topic.strip()
+        return topics
+    
+    def _build_batches(self, notes: List[Dict[str, Any]], token_budget: int) -> List[List[Dict[str, Any]]]:
+        """Greedily pack notes into batches whose estimated prompt size fits the token budget"""
+        batches = []
+        current = []
+        current_tokens = 0
+        for note in notes:
+            tokens = estimate_tokens(note["content"][:NOTE_CHAR_LIMIT]) + BATCH_ITEM_OVERHEAD_TOKENS
+            if current and current_tokens + tokens > token_budget:
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(note)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def map_concurrent(self, fn, items: List[Any], on_result: Optional[Callable[[Any, Any], None]] = None) -> List[Any]:
+        """
+        Apply fn to every item on a thread pool capped at max_concurrency, preserving order.
+        
+        Args:
+            fn: Function to apply
+            items: Inputs
+            on_result: Optional callback(item, result), called as each item finishes
+        """
+        if len(items) <= 1 or self.max_concurrency <= 1:
+            results = []
+            for item in items:
+                result = fn(item)
+                if on_result is not None:
+                    on_result(item, result)
+                results.append(result)
+            return results
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(items))) as executor:
+            if on_result is None:
+                # map() yields results in submission order
+                return list(executor.map(fn, items))
             
-            if topic in topic_map:
-                topic_map[topic].append(note_id)
-            else:
-                topic_map[topic] = [note_id]
+            futures = {executor.submit(fn, item): index for index, item in enumerate(items)}
+            results = [None] * len(items)
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                on_result(items[index], results[index])
+            return results
+    
+    def extract_topics_batched(
+        self,
+        notes: List[Dict[str, Any]],
+        token_budget: Optional[int] = None,
+        on_topic: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract one topic per note, packing several notes into each request.
         
-        # Format as requested: list of topics with note_ids
-        return [
-            {"topic": topic, "note_ids": note_ids}
-            for topic, note_ids in topic_map.items()
-        ]
+        Batches are bounded by token_budget and sent concurrently. Notes too long
+        for one chunk, and notes the model did not return a usable topic for, are
+        extracted individually.
+        """
+        batchable = [note for note in notes if estimate_tokens(note["content"]) <= config.NOTE_CHUNK_TOKENS]
+        batches = self._build_batches(batchable, token_budget or self.batch_token_budget)
+        
+        topics = {}
+        def on_batch(batch, batch_topics):
+            if on_topic is not None:
+                for note in batch:
+                    if note["id"] in batch_topics:
+                        on_topic({"topic": batch_topics[note["id"]], "note_id": note["id"]})
+        
+        for batch_topics in self.map_concurrent(self.extract_topics_from_batch, batches, on_batch):
+            topics.update(batch_topics)
+        
+        missing = [note for note in notes if note["id"] not in topics]
+        if missing:
+            print(f"Extracting {len(missing)} long or unanswered notes individually")
+            for item in self.map_concurrent(
+                lambda note: self.extract_topic_from_note(note["content"], note["id"]),
+                missing,
+                on_result=None if on_topic is None else lambda note, item: on_topic(item)
+            ):
+                topics[item["note_id"]] = item["topic"]
+        
+        return [{"topic": topics[note["id"]], "note_id": note["id"]} for note in notes]
+    
+    def extract_topics(
+        self,
+        notes: List[Dict[str, Any]],
+        on_topic: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract one topic per note, in the same order as the input notes.
+        
+        Requests run on a thread pool capped at max_concurrency, so total latency
+        is roughly len(notes) / max_concurrency round-trips. With a batch token
+        budget configured, several notes share each request.
+        
+        Args:
+            notes: List of dictionaries with note content and IDs
+            on_topic: Optional callback receiving each {"topic", "note_id"} result as soon as it arrives
+        """
+        if self.batch_token_budget and len(notes) > 1:
+            return self.extract_topics_batched(notes, on_topic=on_topic)
+        
+        return self.map_concurrent(
+            lambda note: self.extract_topic_from_note(note["content"], note["id"]),
+            notes,
+            on_result=None if on_topic is None else lambda note, item: on_topic(item)
+        )
+
+    def process_notes(self, notes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process notes and return consolidated topics"""
+        return consolidate_topics(self.extract_topics(notes))
+
+def consolidate_topics(extracted_topics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Group per-note extraction results by topic.
+
+    Args:
+        extracted_topics: List of {"topic": ..., "note_id": ...} results
+
+    Returns:
+        List of topics with associated note IDs
+        [{"topic": "algebra", "note_ids": ["note1", "note3"]}, ...]
+    """
+    topic_map = {}
+    for item in extracted_topics:
+        topic = item["topic"]
+        note_id = item["note_id"]
+        
+        if topic in topic_map:
+            topic_map[topic].append(note_id)
+        else:
+            topic_map[topic] = [note_id]
+    
+    # Format as requested: list of topics with note_ids
+    return [
+        {"topic": topic, "note_ids": note_ids}
+        for topic, note_ids in topic_map.items()
+    ]
 
 # Create a singleton instance
 llm_service = LLMService()
@@ -80,15 +411,31 @@ def extract_topics_from_notes(notes: List[Dict[str, Any]]) -> List[Dict[str, Any
     """
     return llm_service.process_notes(notes)
 
-def get_llm_response(prompt: str) -> str:
+def extract_note_topics(
+    notes: List[Dict[str, Any]],
+    on_topic: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Extract a topic for each note without consolidating them.
+    
+    Args:
+        notes: List of dictionaries with note content and IDs
+        on_topic: Optional callback receiving each result as soon as it arrives
+        
+    Returns:
+        List of per-note results in input order
+        [{"topic": "algebra", "note_id": "note1"}, ...]
+    """
+    return llm_service.extract_topics(notes, on_topic=on_topic)
+
+def get_llm_response(prompt: str, bypass_cache: bool = False) -> str:
     """Legacy function for compatibility"""
     try:
-        response = llm_service.client.chat.completions.create(
-            model=llm_service.model_name,
-            messages=[{"role": "user", "content": prompt}],
+        return llm_service.chat_completion(
+            [{"role": "user", "content": prompt}],
+            bypass_cache=bypass_cache,
             max_tokens=100
-        )
-        return response.choices[0].message.content.strip()
+        ).strip()
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -100,4 +447,14 @@ def get_available_models() -> list:
         models = llm_service.client.models.list()
         return [model.id for model in models.data if "gpt" in model.id]
     except:
-        return ["gpt-3.5-turbo", "gpt-4"]
\ No newline at end of file
+        return ["gpt-3.5-turbo", "gpt-4"]
+
+def get_llm_client_stats() -> Dict[str, Any]:
+    """Request, retry, throttling and circuit breaker counters of the shared rate limiter"""
+    return llm_service.rate_limiter.stats()
+
+def get_llm_cache_stats() -> Dict[str, int]:
+    """Hit/miss counters for the shared LLM response cache"""
+    if llm_service.cache is None:
+        return {"hits": 0, "misses": 0, "evictions": 0, "size": 0}
+    return llm_service.cache.stats()
\ No newline at end of file
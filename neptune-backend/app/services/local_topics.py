@@ -0,0 +1,55 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import config
+
+def get_note_graph_model():
+    """
+    The NoteGraphModel used for KeyBERT topics.
+
+    Construction is cheap: KeyBERT loads on first use through the model registry,
+    on top of the same sentence-transformer the embedding relationship backend and
+    search use, so enabling all of them keeps a single model in memory.
+    """
+    from app.model.NoteGraphModel import NoteGraphModel
+    return NoteGraphModel(domain_model=None, keyword_model=config.EMBEDDING_MODEL)
+
+def warm_up_models():
+    """Load the local models the configured backends use, in the background"""
+    from app.model.model_registry import get_keybert, get_sentence_transformer, registry
+
+    def warm_up():
+        try:
+            if config.TOPIC_BACKEND == "keybert":
+                get_keybert(config.EMBEDDING_MODEL)
+            elif config.RELATIONSHIP_BACKEND == "embedding" or config.NOTE_INDEX_ENABLED:
+                get_sentence_transformer(config.EMBEDDING_MODEL)
+        except Exception as e:
+            print(f"Error warming up models: {e}")
+
+    if config.MODEL_WARMUP:
+        threading.Thread(target=warm_up, name="model-warmup", daemon=True).start()
+    registry.start_idle_unloader(config.MODEL_IDLE_UNLOAD_SECONDS)
+
+def extract_note_topics_locally(
+    notes: List[Dict[str, Any]],
+    on_topic: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Extract a topic for each note with KeyBERT on CPU, with no network calls.
+
+    Args:
+        notes: List of dictionaries with note content and IDs
+        on_topic: Optional callback receiving each result
+
+    Returns:
+        List of per-note results in input order
+        [{"topic": "algebra", "note_id": "note1"}, ...]
+    """
+    if not notes:
+        return []
+    results = get_note_graph_model().extract_topics(notes, batch_size=config.LOCAL_TOPIC_BATCH_SIZE)
+    if on_topic is not None:
+        for item in results:
+            on_topic(item)
+    return results
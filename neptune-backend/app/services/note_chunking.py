@@ -0,0 +1,69 @@
+import re
+from typing import List
+
+HEADING_PATTERN = re.compile(r"^ {0,3}#{1,6}\s", re.MULTILINE)
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+def split_sections(text: str) -> List[str]:
+    """Split markdown into sections, each starting at a heading (text before the first heading is its own section)"""
+    starts = [match.start() for match in HEADING_PATTERN.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    starts.append(len(text))
+    return [text[start:end] for start, end in zip(starts, starts[1:]) if text[start:end].strip()]
+
+def _split_oversized(section: str, max_tokens: int) -> List[str]:
+    """Break a section that alone exceeds max_tokens at paragraph, then character, boundaries"""
+    max_chars = max_tokens * 4
+    pieces = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", section):
+        while len(paragraph) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and estimate_tokens(current) + estimate_tokens(paragraph) > max_tokens:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+def chunk_markdown(text: str, max_tokens: int, max_chunks: int = 0) -> List[str]:
+    """
+    Split a markdown note into chunks of at most max_tokens along heading boundaries.
+
+    Consecutive sections are packed together while they fit; a section larger than
+    the budget is split by paragraph. If more than max_chunks chunks result, evenly
+    spaced ones are kept so the whole note stays represented.
+
+    Args:
+        text: Markdown content
+        max_tokens: Estimated token budget per chunk
+        max_chunks: Upper bound on returned chunks, 0 for no limit
+
+    Returns:
+        List of chunks in document order
+    """
+    chunks = []
+    current = ""
+    for section in split_sections(text):
+        parts = [section] if estimate_tokens(section) <= max_tokens else _split_oversized(section, max_tokens)
+        for part in parts:
+            if current and estimate_tokens(current) + estimate_tokens(part) > max_tokens:
+                chunks.append(current)
+                current = ""
+            current += part
+    if current.strip():
+        chunks.append(current)
+
+    if max_chunks and len(chunks) > max_chunks:
+        step = len(chunks) / max_chunks
+        chunks = [chunks[int(i * step)] for i in range(max_chunks)]
+    return chunks
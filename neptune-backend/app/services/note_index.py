@@ -0,0 +1,364 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, so run a single API process
+    fcntl = None
+
+def content_fingerprint(text: str) -> int:
+    """64-bit hash of note content, stored per row so stale embeddings can be detected"""
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little", signed=True)
+
+class NoteEmbeddingIndex:
+    """
+    Persistent exact-search index of unit-length note embeddings.
+
+    Vectors live in a memory-mapped float32 matrix with parallel memory-mapped
+    arrays of note ids and content fingerprints; rows are kept dense (a removal
+    moves the last row into the gap) so a query is one matrix-vector product over
+    the used rows. Capacity doubles when full.
+
+    Several processes (API workers, the graph worker) can share one index: every
+    operation holds an flock on index.lock (exclusive for writes, shared for
+    reads) and first reloads the row map if another process replaced meta.json
+    since this one last saw it. Growing writes new files and renames them into
+    place, so other processes' existing mappings stay valid until they reload.
+    """
+
+    def __init__(self, path: str, model_name: str = ""):
+        """
+        Args:
+            path: Directory holding the index files
+            model_name: Embedding model; an index built with another model is discarded
+        """
+        self.path = path
+        self.model_name = model_name
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._vectors: Optional[np.memmap] = None
+        self._ids: Optional[np.memmap] = None
+        self._fingerprints: Optional[np.memmap] = None
+        self._rows: Dict[int, int] = {}
+        self._meta_stamp = None  # identity of the meta.json last loaded or written
+        self.count = 0
+        self.capacity = 0
+        self.dim = 0
+        with self._locked(exclusive=False):
+            pass
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """Serialize with other threads and processes, then pick up their changes"""
+        with self._lock:
+            outermost = self._lock_depth == 0
+            if outermost and fcntl is not None:
+                os.makedirs(self.path, exist_ok=True)
+                if self._lock_file is None:
+                    self._lock_file = open(self._file("index.lock"), "a+")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._lock_depth += 1
+            try:
+                if outermost:
+                    self._refresh()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if outermost and fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self._file("meta.json"))
+        except OSError:
+            return None
+        # meta.json is always replaced, never rewritten, so a new inode means new contents
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        """Reload counts and the row map if meta.json changed since we last saw it"""
+        stamp = self._stamp()
+        if stamp == self._meta_stamp:
+            return
+        self._meta_stamp = stamp
+        self._vectors = self._ids = self._fingerprints = None
+        self._rows = {}
+        self.count = self.capacity = self.dim = 0
+        try:
+            with open(self._file("meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        if meta.get("model") != self.model_name:
+            print(f"Note index was built with {meta.get('model')}, rebuilding for {self.model_name}")
+            return
+        self.count, self.capacity, self.dim = meta["count"], meta["capacity"], meta["dim"]
+        self._open("r+")
+        self._rows = {int(note_id): row for row, note_id in enumerate(self._ids[:self.count])}
+
+    def _open(self, mode: str, suffix: str = ""):
+        shape = (self.capacity, self.dim)
+        self._vectors = np.memmap(self._file("vectors.f32" + suffix), dtype=np.float32, mode=mode, shape=shape)
+        self._ids = np.memmap(self._file("ids.i64" + suffix), dtype=np.int64, mode=mode, shape=(self.capacity,))
+        self._fingerprints = np.memmap(self._file("fingerprints.i64" + suffix), dtype=np.int64, mode=mode, shape=(self.capacity,))
+
+    def _save_meta(self):
+        for array in (self._vectors, self._ids, self._fingerprints):
+            array.flush()
+        meta = {"model": self.model_name, "count": self.count, "capacity": self.capacity, "dim": self.dim}
+        tmp = self._file(f"meta.json.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file("meta.json"))
+        self._meta_stamp = self._stamp()
+
+    def _grow(self, dim: int):
+        """Create the files on first use, or double their capacity"""
+        os.makedirs(self.path, exist_ok=True)
+        old = None
+        if self._vectors is not None:
+            old = (
+                np.array(self._vectors[:self.count]),
+                np.array(self._ids[:self.count]),
+                np.array(self._fingerprints[:self.count])
+            )
+            self._vectors = self._ids = self._fingerprints = None
+        self.dim = dim
+        self.capacity = max(1024, self.capacity * 2)
+        # Write new files beside the old ones and rename them over, so processes
+        # still mapping the old files never see them truncated
+        suffix = f".{os.getpid()}.tmp"
+        self._open("w+", suffix)
+        if old is not None:
+            self._vectors[:self.count], self._ids[:self.count], self._fingerprints[:self.count] = old
+        for name in ("vectors.f32", "ids.i64", "fingerprints.i64"):
+            os.replace(self._file(name + suffix), self._file(name))
+
+    def __len__(self) -> int:
+        with self._locked(exclusive=False):
+            return self.count
+
+    def fingerprints(self) -> Dict[int, int]:
+        """Content fingerprint of every indexed note, keyed by note id"""
+        with self._locked(exclusive=False):
+            return {note_id: int(self._fingerprints[row]) for note_id, row in self._rows.items()}
+
+    def fingerprint(self, note_id: int) -> Optional[int]:
+        """Content fingerprint of one note, or None if it isn't indexed"""
+        with self._locked(exclusive=False):
+            row = self._rows.get(note_id)
+            return None if row is None else int(self._fingerprints[row])
+
+    def upsert(self, note_id: int, vector: np.ndarray, fingerprint: int = 0):
+        """Insert or replace a note's embedding (normalized here)"""
+        self.upsert_many([(note_id, vector, fingerprint)])
+
+    def upsert_many(self, items: List[Tuple[int, np.ndarray, int]]):
+        """Insert or replace several (note_id, vector, fingerprint) entries, saving once"""
+        with self._locked(exclusive=True):
+            for note_id, vector, fingerprint in items:
+                vector = np.asarray(vector, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                if norm:
+                    vector = vector / norm
+                if self.dim and vector.shape[0] != self.dim:
+                    raise ValueError(f"Expected a {self.dim}-dimensional vector, got {vector.shape[0]}")
+                row = self._rows.get(note_id)
+                if row is None:
+                    if self.count == self.capacity:
+                        self._grow(vector.shape[0])
+                    row = self.count
+                    self.count += 1
+                    self._rows[note_id] = row
+                    self._ids[row] = note_id
+                self._vectors[row] = vector
+                self._fingerprints[row] = fingerprint
+            if items:
+                self._save_meta()
+
+    def remove(self, note_id: int) -> bool:
+        """Drop a note; returns False if it wasn't indexed"""
+        with self._locked(exclusive=True):
+            row = self._rows.pop(note_id, None)
+            if row is None:
+                return False
+            last = self.count - 1
+            if row != last:
+                moved = int(self._ids[last])
+                self._vectors[row] = self._vectors[last]
+                self._ids[row] = moved
+                self._fingerprints[row] = self._fingerprints[last]
+                self._rows[moved] = row
+            self.count = last
+            self._save_meta()
+            return True
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Return the k notes most similar to a query embedding.
+
+        Returns:
+            List of (note_id, cosine similarity), best first
+        """
+        with self._locked(exclusive=False):
+            if not self.count:
+                return []
+            query = np.asarray(query, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+            scores = self._vectors[:self.count] @ query
+            k = min(k, self.count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._ids[row]), float(scores[row])) for row in top]
+
+    @contextmanager
+    def sync_guard(self):
+        """
+        Yields whether this process may run a full sync: only one process at a
+        time does, the others skip rather than redo the same work.
+        """
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file("sync.lock"), "a+") as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+def _note_text(name: str, content: str) -> str:
+    return f"{name}\n{content}" if name else content
+
+_index: Optional[NoteEmbeddingIndex] = None
+_index_lock = threading.Lock()
+# One thread applies updates in the order they were scheduled, off the event loop
+_updates = ThreadPoolExecutor(max_workers=1, thread_name_prefix="note-index")
+
+def get_note_index() -> NoteEmbeddingIndex:
+    """The process-wide note index stored at NOTE_INDEX_PATH"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NoteEmbeddingIndex(config.NOTE_INDEX_PATH, config.EMBEDDING_MODEL)
+    return _index
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Embed texts with the shared sentence-transformer as unit-length float32 rows"""
+    from app.services.topic_embeddings import get_encoder
+    return get_encoder().encode(
+        texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True
+    ).astype(np.float32)
+
+def index_note(note_id: int, name: str, content: str):
+    """Embed one note and store it, skipping notes whose content is unchanged"""
+    index = get_note_index()
+    text = _note_text(name, content or "")
+    fingerprint = content_fingerprint(text)
+    if not (content or "").strip():
+        index.remove(note_id)
+        return
+    if index.fingerprint(note_id) == fingerprint:
+        return
+    index.upsert(note_id, embed_texts([text])[0], fingerprint)
+
+def _run_update(fn, *args):
+    try:
+        fn(*args)
+    except Exception as e:
+        print(f"Error updating note index: {e}")
+
+def schedule_note_index_update(note_id: int, name: str, content: str):
+    """Re-embed a note in the background after it was saved"""
+    if config.NOTE_INDEX_ENABLED:
+        _updates.submit(_run_update, index_note, note_id, name, content)
+
+def schedule_note_index_removal(note_id: int):
+    """Drop a deleted note from the index in the background"""
+    if config.NOTE_INDEX_ENABLED:
+        _updates.submit(_run_update, lambda: get_note_index().remove(note_id))
+
+def sync_note_index(db: Session, batch_size: int = 256):
+    """
+    Bring the index in line with the database: embed new or changed notes in
+    batches and drop notes that no longer exist. Meant for startup, since edits
+    made while the server was down never reached the incremental updates.
+    """
+    index = get_note_index()
+    with index.sync_guard() as acquired:
+        if not acquired:
+            print("Note index sync already running in another process, skipping")
+            return
+        _sync(db, index, batch_size)
+
+def _sync(db: Session, index: NoteEmbeddingIndex, batch_size: int):
+    from app.db.models import FileSystem
+
+    indexed = index.fingerprints()
+    seen = set()
+    pending = []
+
+    def flush():
+        vectors = embed_texts([text for _, text, _ in pending])
+        index.upsert_many([
+            (note_id, vector, fingerprint)
+            for (note_id, _, fingerprint), vector in zip(pending, vectors)
+        ])
+        pending.clear()
+
+    rows = db.query(FileSystem.id, FileSystem.name, FileSystem.content).filter(FileSystem.type == "file")
+    for note_id, name, content in rows.yield_per(batch_size):
+        if not (content or "").strip():
+            continue
+        seen.add(note_id)
+        text = _note_text(name, content)
+        fingerprint = content_fingerprint(text)
+        if indexed.get(note_id) != fingerprint:
+            pending.append((note_id, text, fingerprint))
+            if len(pending) >= batch_size:
+                flush()
+    if pending:
+        flush()
+
+    for note_id in set(indexed) - seen:
+        index.remove(note_id)
+    print(f"Note index holds {len(index)} notes")
+
+def schedule_note_index_sync():
+    """Run sync_note_index in the background with its own session"""
+    if not config.NOTE_INDEX_ENABLED:
+        return
+
+    def sync():
+        from app.db.database import SessionLocal
+        db = SessionLocal()
+        try:
+            sync_note_index(db)
+        finally:
+            db.close()
+
+    _updates.submit(_run_update, sync)
+
+def search_notes(query: str, k: int = 10) -> List[Tuple[int, float]]:
+    """Embed a query and return the k most similar (note_id, score) pairs"""
+    return get_note_index().search(embed_texts([query])[0], k)
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import event
+
+from app.db.models import FileSystem
+from app.services.filesystem_listing import list_page, parse_fields
+
+
+def _tree(db_session):
+    folder = FileSystem(name="Math", type="folder")
+    db_session.add(folder)
+    db_session.flush()
+    db_session.add_all([
+        FileSystem(name=f"Note {i}", type="file", parent_id=folder.id, content="x" * 10000)
+        for i in range(5)
+    ])
+    db_session.commit()
+    return folder.id
+
+
+def test_pages_follow_the_cursor_without_loading_content(db_session):
+    folder_id = _tree(db_session)
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    in_folder = lambda query: query.filter(FileSystem.parent_id == folder_id)
+    first, cursor = list_page(db_session, parse_fields(None), 2, None, in_folder)
+    second, cursor = list_page(db_session, parse_fields(None), 2, cursor, in_folder)
+    last, end = list_page(db_session, parse_fields(None), 2, cursor, in_folder)
+
+    assert [row["name"] for row in first + second + last] == [f"Note {i}" for i in range(5)]
+    assert end is None
+    assert set(first[0]) == {"id", "name", "type", "parent_id"}
+    assert not any("content" in statement for statement in statements)
+
+
+def test_fields_projection(db_session):
+    folder_id = _tree(db_session)
+
+    rows, _ = list_page(db_session, parse_fields("name,content"), 1, folder_id)
+    assert set(rows[0]) == {"id", "name", "content"}
+    assert len(rows[0]["content"]) == 10000
+
+    with pytest.raises(ValueError):
+        parse_fields("name,password")
+
+
+def test_content_is_deferred_on_orm_queries(db_session):
+    _tree(db_session)
+    note = db_session.query(FileSystem).filter(FileSystem.type == "file").first()
+    assert "content" not in note.__dict__
+    assert note.content == "x" * 10000
+
+
+def test_no_limit_returns_every_row(db_session):
+    folder_id = _tree(db_session)
+
+    rows, cursor = list_page(db_session, parse_fields(None), None, None, lambda query: query.filter(FileSystem.parent_id == folder_id))
+
+    assert len(rows) == 5
+    assert cursor is None
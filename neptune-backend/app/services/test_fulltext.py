@@ -0,0 +1,35 @@
+from app.db.models import FileSystem
+from app.services import fulltext
+from app.services.fulltext import InvertedIndex, highlight_snippet, search_note_text
+
+
+def test_inverted_index_ranks_and_requires_every_term():
+    index = InvertedIndex()
+    index.add(1, "Calculus", "Derivatives and integrals of functions")
+    index.add(2, "Physics", "Integrals show up in physics, integrals everywhere")
+    index.add(3, "History", "The history of calculus")
+
+    assert [note_id for note_id, _ in index.search("integrals")] == [2, 1]
+    assert [note_id for note_id, _ in index.search("calculus")] == [1, 3]
+    assert index.search("calculus integrals") == index.search("integrals calculus")
+    assert [note_id for note_id, _ in index.search("history calculus")] == [3]
+
+    index.remove(2)
+    index.add(1, "Calculus", "Limits only")
+    assert index.search("integrals") == []
+
+
+def test_search_note_text_is_maintained_and_highlights(db_session, monkeypatch):
+    monkeypatch.setattr(fulltext, "_index", None)
+    db_session.add(FileSystem(id=1, name="Algebra", type="file", content="Groups, rings and fields."))
+    db_session.commit()
+
+    assert search_note_text(db_session, "rings")[0]["snippet"] == "Groups, <mark>rings</mark> and fields."
+
+    fulltext.index_note_text(db_session, 2, "Topology", "Open sets and rings of sets")
+    fulltext.remove_note_text(db_session, 1)
+    db_session.add(FileSystem(id=2, name="Topology", type="file", content="Open sets and rings of sets"))
+    db_session.commit()
+
+    assert [result["id"] for result in search_note_text(db_session, "rings")] == [2]
+    assert highlight_snippet("x " * 200 + "target", "target").endswith("<mark>target</mark>")
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import worker
+from app.core.config import config
+from app.db.models import GraphBuildJob
+from app.services.graph_jobs import (
+    claim_graph_build_jobs,
+    complete_graph_build_jobs,
+    enqueue_graph_build,
+    fail_graph_build_jobs,
+    heartbeat_graph_build_jobs,
+    requeue_stale_graph_build_jobs,
+)
+from app.services.graph_snapshots import LoadedSnapshot
+
+
+def _age(db, job, **fields):
+    """Move a job's timestamps into the past"""
+    for name, seconds in fields.items():
+        setattr(job, name, datetime.utcnow() - timedelta(seconds=seconds))
+    db.commit()
+
+
+def test_enqueue_reuses_the_pending_job(db_session):
+    first = enqueue_graph_build(db_session, delay_seconds=5)
+    pushed_back = first.run_after
+    later = enqueue_graph_build(db_session, delay_seconds=30)
+
+    assert later.id == first.id
+    # A debounced trigger pushes run_after back...
+    assert later.run_after > pushed_back
+    assert db_session.query(GraphBuildJob).count() == 1
+
+    # ...but never pulls it forward
+    shorter = enqueue_graph_build(db_session, delay_seconds=1)
+    assert shorter.run_after == later.run_after
+
+    # An explicit refresh doesn't wait out the debounce
+    now = enqueue_graph_build(db_session)
+    assert now.id == first.id
+    assert now.run_after <= datetime.utcnow()
+
+
+def test_enqueue_starts_a_new_job_once_the_pending_one_is_claimed(db_session):
+    first = enqueue_graph_build(db_session)
+    claim_graph_build_jobs(db_session, "a")
+
+    second = enqueue_graph_build(db_session)
+
+    assert second.id != first.id
+    assert second.status == "pending"
+
+
+def test_claim_is_exclusive_and_waits_for_run_after(db_session):
+    enqueue_graph_build(db_session, delay_seconds=60)
+    assert claim_graph_build_jobs(db_session, "a") == []
+
+    job = enqueue_graph_build(db_session)
+    claimed = claim_graph_build_jobs(db_session, "a")
+    again = claim_graph_build_jobs(db_session, "b")
+
+    assert [claimed_job.id for claimed_job in claimed] == [job.id]
+    assert claimed[0].worker_id == "a"
+    assert claimed[0].heartbeat_at is not None
+    assert again == []
+
+
+def test_stale_jobs_are_requeued_unless_heartbeating(db_session):
+    enqueue_graph_build(db_session)
+    jobs = claim_graph_build_jobs(db_session, "a")
+    # Long past the timeout since it started, but the worker is still alive
+    _age(db_session, jobs[0], started_at=600)
+    heartbeat_graph_build_jobs(db_session, jobs, "a")
+
+    assert requeue_stale_graph_build_jobs(db_session, timeout_seconds=60) == 0
+
+    _age(db_session, jobs[0], heartbeat_at=120)
+    assert requeue_stale_graph_build_jobs(db_session, timeout_seconds=60) == 1
+    db_session.refresh(jobs[0])
+    assert jobs[0].status == "pending"
+    assert jobs[0].worker_id is None
+
+
+def test_only_the_current_owner_finishes_a_job(db_session):
+    enqueue_graph_build(db_session)
+    stale = claim_graph_build_jobs(db_session, "a")
+    _age(db_session, stale[0], heartbeat_at=120)
+    requeue_stale_graph_build_jobs(db_session, timeout_seconds=60)
+    current = claim_graph_build_jobs(db_session, "b")
+
+    # The first worker comes back from its long build after losing the job
+    assert heartbeat_graph_build_jobs(db_session, stale, "a") == 0
+    assert fail_graph_build_jobs(db_session, stale, "a", "late") == 0
+    assert complete_graph_build_jobs(db_session, stale, "a", None) == 0
+    db_session.refresh(current[0])
+    assert current[0].status == "running"
+    assert current[0].worker_id == "b"
+
+    assert complete_graph_build_jobs(db_session, current, "b", None) == 1
+    db_session.refresh(current[0])
+    assert current[0].status == "done"
+    # Finished jobs can't be finished again
+    assert fail_graph_build_jobs(db_session, current, "b", "late") == 0
+
+
+@pytest.fixture
+def worker_session(db_session, monkeypatch):
+    # The in-memory database is per connection, which SQLite shares within a thread
+    monkeypatch.setattr(worker, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=db_session.bind))
+    monkeypatch.setattr(config, "GRAPH_JOB_HEARTBEAT_SECONDS", 0)
+    return db_session
+
+
+def test_run_pending_build_completes_jobs(worker_session, monkeypatch):
+    monkeypatch.setattr(worker, "build_knowledge_graph_snapshot", lambda db: LoadedSnapshot(None, {}, b"{}"))
+    assert worker.run_pending_build("w") is False
+
+    job = enqueue_graph_build(worker_session)
+    assert worker.run_pending_build("w") is True
+
+    worker_session.refresh(job)
+    assert job.status == "done"
+    assert job.finished_at is not None
+    assert worker.run_pending_build("w") is False
+
+
+def test_run_pending_build_records_failures(worker_session, monkeypatch):
+    def fail(db):
+        raise ValueError("no notes")
+
+    monkeypatch.setattr(worker, "build_knowledge_graph_snapshot", fail)
+    job = enqueue_graph_build(worker_session)
+
+    assert worker.run_pending_build("w") is True
+
+    worker_session.refresh(job)
+    assert job.status == "failed"
+    assert job.error == "no notes"
@@ -0,0 +1,57 @@
+import networkx as nx
+
+from app.model import layout
+from app.services.graph_layout import force_layout, layout_graph
+from app.services.visualize_topics import graph_to_frontend_format
+
+def _ring(n):
+    G = nx.Graph()
+    for i in range(n):
+        G.add_edge(f"t{i}", f"t{(i + 1) % n}", weight=0.5)
+    return G
+
+def test_force_layout_spreads_nodes():
+    pos = force_layout(_ring(10))
+
+    assert len(pos) == 10
+    coords = list(pos.values())
+    assert len(set(coords)) == 10
+
+def test_unchanged_graph_reuses_previous_positions():
+    G = _ring(20)
+    previous = graph_to_frontend_format(G, layout_graph(G))
+
+    assert layout_graph(G, previous) == {node["id"]: (node["x"], node["y"]) for node in previous["nodes"]}
+
+def test_warm_start_keeps_existing_nodes_close():
+    G = _ring(20)
+    previous = graph_to_frontend_format(G, layout_graph(G))
+    before = {node["id"]: (node["x"], node["y"]) for node in previous["nodes"]}
+
+    G.add_edge("t0", "new", weight=0.5)
+    after = layout_graph(G, previous)
+
+    assert "new" in after
+    moved = max(abs(after[n][0] - x) + abs(after[n][1] - y) for n, (x, y) in before.items())
+    assert moved < 0.2
+
+def test_blocked_repulsion_matches_a_single_block(monkeypatch):
+    G = nx.gnm_random_graph(60, 150, seed=3)
+    whole = force_layout(G, iterations=5)
+
+    monkeypatch.setattr(layout, "REPULSION_BLOCK_PAIRS", 100)
+    blocked = force_layout(G, iterations=5)
+
+    assert max(abs(whole[n][0] - blocked[n][0]) + abs(whole[n][1] - blocked[n][1]) for n in G) < 1e-9
+
+def test_directed_edges_pull_both_ways():
+    G = nx.DiGraph()
+    G.add_edge("a", "b", weight=1.0)
+    G.add_node("c")
+
+    pos = force_layout(G)
+
+    def distance(u, v):
+        return ((pos[u][0] - pos[v][0]) ** 2 + (pos[u][1] - pos[v][1]) ** 2) ** 0.5
+
+    assert distance("a", "b") < min(distance("a", "c"), distance("b", "c"))
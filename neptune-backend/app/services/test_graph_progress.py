@@ -0,0 +1,24 @@
+from app.services.graph_progress import BuildProgress, TopicNodeTracker, format_sse
+
+def test_subscriber_receives_replay_then_live_events():
+    progress = BuildProgress()
+    progress.start()
+    progress.emit("node", {"id": "a"})
+
+    received = []
+    progress.subscribe(lambda event, data: received.append((event, data)))
+    progress.emit("link", {"source": "a", "target": "b", "strength": 0.5})
+
+    assert [event for event, _ in received] == ["reset", "node", "link"]
+
+def test_node_tracker_grows_nodes_per_topic():
+    emitted = []
+    nodes = TopicNodeTracker(lambda event, data: emitted.append(data))
+    nodes.add("Physics", "1")
+    nodes.add("Physics", "2")
+    nodes.add("Physics", "2")
+
+    assert len(emitted) == 2
+    assert emitted[-1]["noteIds"] == ["1", "2"]
+    assert emitted[-1]["size"] == 40
+    assert format_sse("node", {"id": "a"}) == 'event: node\ndata: {"id": "a"}\n\n'
@@ -0,0 +1,76 @@
+import asyncio
+
+from app.services.graph_scheduler import GraphRebuildScheduler
+
+
+class CountingBuild:
+    def __init__(self, duration=0.05):
+        self.duration = duration
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self):
+        self.calls += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.duration)
+        self.running -= 1
+        return {"build": self.calls}
+
+
+def test_triggers_within_debounce_window_coalesce():
+    async def scenario():
+        build = CountingBuild()
+        scheduler = GraphRebuildScheduler(build, debounce_seconds=0.05)
+        for _ in range(10):
+            scheduler.trigger()
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        return build
+
+    build = asyncio.run(scenario())
+    assert build.calls == 1
+
+
+def test_trigger_during_build_runs_one_follow_up():
+    async def scenario():
+        build = CountingBuild(duration=0.1)
+        scheduler = GraphRebuildScheduler(build, debounce_seconds=0.01)
+        scheduler.trigger()
+        await asyncio.sleep(0.05)  # first build is running
+        scheduler.trigger()
+        scheduler.trigger()
+        await asyncio.sleep(0.4)
+        return build, scheduler
+
+    build, scheduler = asyncio.run(scenario())
+    assert build.calls == 2
+    assert build.max_running == 1
+    assert not scheduler.is_stale
+
+
+def test_refresh_joins_running_build():
+    async def scenario():
+        build = CountingBuild(duration=0.1)
+        scheduler = GraphRebuildScheduler(build, debounce_seconds=10)
+        results = await asyncio.gather(scheduler.refresh(), scheduler.refresh(), scheduler.refresh())
+        return build, results
+
+    build, results = asyncio.run(scenario())
+    assert build.calls == 1
+    assert results == [{"build": 1}] * 3
+
+
+def test_refresh_waits_for_follow_up_of_stale_build():
+    async def scenario():
+        build = CountingBuild(duration=0.1)
+        scheduler = GraphRebuildScheduler(build, debounce_seconds=0.01)
+        scheduler.trigger()
+        await asyncio.sleep(0.05)
+        scheduler.trigger()
+        return build, await scheduler.refresh()
+
+    build, result = asyncio.run(scenario())
+    assert build.calls == 2
+    assert result == {"build": 2}
@@ -0,0 +1,82 @@
+from app.services import graph_snapshots
+from app.services.graph_snapshots import etag_matches, get_latest_snapshot, save_graph_snapshot
+
+
+def _graph(*topics):
+    return {"nodes": [{"id": topic} for topic in topics], "links": []}
+
+
+def test_unchanged_graph_keeps_its_version(db_session, monkeypatch):
+    monkeypatch.setattr(graph_snapshots, "_current", None)
+
+    first = save_graph_snapshot(db_session, _graph("a"))
+    again = save_graph_snapshot(db_session, _graph("a"))
+    changed = save_graph_snapshot(db_session, _graph("a", "b"))
+
+    assert again.version == first.version
+    assert changed.version > first.version
+    assert get_latest_snapshot(db_session).data == _graph("a", "b")
+
+
+def test_snapshot_is_reloaded_after_restart(db_session, monkeypatch):
+    monkeypatch.setattr(graph_snapshots, "_current", None)
+    saved = save_graph_snapshot(db_session, _graph("a"))
+
+    # A fresh process has nothing in memory
+    monkeypatch.setattr(graph_snapshots, "_current", None)
+    loaded = get_latest_snapshot(db_session)
+
+    assert loaded.version == saved.version
+    assert loaded.body == saved.body
+
+
+def test_old_snapshots_are_pruned(db_session, monkeypatch):
+    monkeypatch.setattr(graph_snapshots, "_current", None)
+    monkeypatch.setattr(graph_snapshots.config, "GRAPH_SNAPSHOT_RETENTION", 2)
+
+    versions = [save_graph_snapshot(db_session, _graph(str(i))).version for i in range(4)]
+
+    assert graph_snapshots.load_snapshot(db_session, versions[0]) is None
+    assert graph_snapshots.load_snapshot(db_session, versions[-2]) is not None
+
+
+def test_etag_matches():
+    assert etag_matches('"graph-v3"', '"graph-v3"')
+    assert etag_matches('W/"graph-v3", "graph-v1"', '"graph-v3"')
+    assert etag_matches("*", '"graph-v3"')
+    assert not etag_matches('"graph-v2"', '"graph-v3"')
+    assert not etag_matches(None, '"graph-v3"')
+
+
+def test_graph_changes_since_version(db_session, monkeypatch):
+    monkeypatch.setattr(graph_snapshots, "_current", None)
+    monkeypatch.setattr(graph_snapshots, "_diff_cache", {})
+    v1 = save_graph_snapshot(db_session, {
+        "nodes": [{"id": "a", "noteCount": 1}, {"id": "b", "noteCount": 1}, {"id": "c", "noteCount": 1}],
+        "links": [{"source": "a", "target": "b", "strength": 0.5}, {"source": "b", "target": "c", "strength": 0.5}],
+    }).version
+    v2 = save_graph_snapshot(db_session, {
+        "nodes": [{"id": "a", "noteCount": 2}, {"id": "b", "noteCount": 1}, {"id": "d", "noteCount": 1}],
+        "links": [{"source": "b", "target": "a", "strength": 0.9}, {"source": "a", "target": "d", "strength": 0.4}],
+    }).version
+
+    result = graph_snapshots.get_graph_changes(db_session, v1)
+
+    assert result["version"] == v2 and result["full"] is False
+    changes = result["changes"]
+    assert [node["id"] for node in changes["addedNodes"]] == ["d"]
+    assert [node["id"] for node in changes["updatedNodes"]] == ["a"]
+    assert changes["removedNodes"] == ["c"]
+    assert changes["addedLinks"] == [{"source": "a", "target": "d", "strength": 0.4}]
+    assert changes["updatedLinks"] == [{"source": "b", "target": "a", "strength": 0.9}]
+    assert changes["removedLinks"] == [{"source": "b", "target": "c"}]
+
+
+def test_graph_changes_fall_back_to_full_graph(db_session, monkeypatch):
+    monkeypatch.setattr(graph_snapshots, "_current", None)
+    save_graph_snapshot(db_session, _graph("a"))
+
+    result = graph_snapshots.get_graph_changes(db_session, 999)
+
+    assert result["full"] is True
+    assert result["graph"] == _graph("a")
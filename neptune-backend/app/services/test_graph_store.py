@@ -0,0 +1,79 @@
+import networkx as nx
+
+from app.core.config import config
+from app.services.graph_store import CompactGraph, load_topic_graph, save_topic_graph
+
+
+def _topic_graph():
+    G = nx.Graph()
+    G.add_node("Algebra", type="topic", size=40, note_count=2, note_ids=["1", "2"])
+    G.add_node("Geometry", type="topic", size=20, note_count=1, note_ids=["2"])
+    G.add_node("Kernels", type="topic", size=20, note_count=1, note_ids=["3"])
+    G.add_edge("Algebra", "Geometry", weight=0.75)
+    G.add_edge("Geometry", "Kernels", weight=0.25)
+    return G
+
+
+def test_networkx_round_trip_and_queries():
+    G = _topic_graph()
+    compact = CompactGraph.from_networkx(G)
+
+    assert compact.node_count == 3 and compact.edge_count == 2
+    geometry = compact.node_id("Geometry")
+    neighbours, weights = compact.neighbors(geometry)
+    assert sorted(zip((compact.labels[i] for i in neighbours), weights.tolist())) == [("Algebra", 0.75), ("Kernels", 0.25)]
+    assert compact.node(compact.node_id("Algebra")).note_count == 2
+    assert sorted(compact.labels[i] for i in compact.topics_of_note("2")) == ["Algebra", "Geometry"]
+    assert compact.topics_of_note("missing") == []
+
+    restored = compact.to_networkx()
+    assert dict(restored.nodes(data=True)) == dict(G.nodes(data=True))
+    assert sorted(restored.edges(data="weight")) == sorted(G.edges(data="weight"))
+
+
+def test_save_and_memory_mapped_load(tmp_path):
+    G = _topic_graph()
+    path = str(tmp_path / "graph.bin")
+    CompactGraph.from_networkx(G, {"Algebra": (0.5, -0.5)}).save(path)
+
+    loaded = CompactGraph.load(path)
+    assert not loaded.indices.flags.writeable
+    assert loaded.positions[loaded.node_id("Algebra")].tolist() == [0.5, -0.5]
+    assert loaded.note_ids(loaded.node_id("Algebra")) == ["1", "2"]
+    assert sorted(loaded.to_networkx().edges(data="weight")) == sorted(G.edges(data="weight"))
+
+
+def test_empty_graph():
+    compact = CompactGraph.from_networkx(nx.Graph())
+    assert compact.node_count == 0 and list(compact.edges()) == []
+
+
+def test_stored_graph_is_read_back_and_cleared(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "GRAPH_STORE_PATH", str(tmp_path / "graph.bin"))
+    assert load_topic_graph() is None
+
+    save_topic_graph(_topic_graph())
+    assert load_topic_graph().labels[load_topic_graph().topics_of_note("3")[0]] == "Kernels"
+
+    # A rebuild is picked up without restarting
+    G = _topic_graph()
+    G.add_node("Sets", type="topic", size=20, note_count=1, note_ids=["4"])
+    save_topic_graph(G)
+    assert load_topic_graph().node_count == 4
+
+    # No notes left: the stale graph goes away
+    save_topic_graph(nx.Graph())
+    assert load_topic_graph() is None
+
+
+def test_failed_save_drops_the_stale_graph(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "GRAPH_STORE_PATH", str(tmp_path / "graph.bin"))
+    save_topic_graph(_topic_graph())
+
+    def fail(self, path):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(CompactGraph, "save", fail)
+    save_topic_graph(_topic_graph())
+
+    assert load_topic_graph() is None
@@ -0,0 +1,51 @@
+import time
+
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_service import LLMService
+
+
+def test_chat_completion_is_served_from_cache(fake_openai, tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+    service = LLMService(base_url=fake_openai.base_url, cache=cache)
+    messages = [{"role": "user", "content": "hello"}]
+
+    assert service.chat_completion(messages, max_tokens=10) == "topic"
+    assert service.chat_completion(messages, max_tokens=10) == "topic"
+    assert len(fake_openai.requests) == 1
+
+    # Different parameters are a different entry, bypass always calls the API
+    service.chat_completion(messages, max_tokens=20)
+    service.chat_completion(messages, max_tokens=10, bypass_cache=True)
+    assert len(fake_openai.requests) == 3
+    assert cache.stats()["hits"] == 1
+
+    # The cache survives a restart
+    reopened = LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+    assert reopened.get(LLMResponseCache.make_key("gpt-4o", messages, max_tokens=10)) == "topic"
+
+
+def test_cache_expires_entries(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=0.05)
+    cache.set("k", "model", "value")
+    assert cache.get("k") == "value"
+
+    time.sleep(0.1)
+
+    assert cache.get("k") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_entries=2)
+    cache.set("a", "model", "1")
+    time.sleep(0.01)
+    cache.set("b", "model", "2")
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", "model", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from app.services.llm_limits import LLMUnavailableError, RateLimiter, TokenBucket
+from app.services.llm_service import LLMService
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate_per_second=20, capacity=2)
+
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # Two from the burst, then two refilled at 20/s
+    assert 0.08 <= elapsed < 0.5
+
+
+def test_retries_rate_limited_requests_with_backoff(fake_openai):
+    fake_openai.fail_next(2, status=429, retry_after="0.05")
+    limiter = RateLimiter(max_retries=3, backoff_base_seconds=0.01)
+    service = LLMService(base_url=fake_openai.base_url, rate_limiter=limiter)
+
+    assert service.chat_completion([{"role": "user", "content": "hi"}]) == "topic"
+
+    stats = limiter.stats()
+    assert stats["requests"] == 3
+    assert stats["retries"] == 2
+    assert stats["rate_limited"] == 2
+    assert stats["circuit"] == "closed"
+
+
+def test_circuit_opens_instead_of_degrading_topics(fake_openai):
+    fake_openai.fail_next(100, status=429)
+    limiter = RateLimiter(max_retries=1, backoff_base_seconds=0.01, failure_threshold=2, reset_seconds=60)
+    service = LLMService(max_concurrency=1, base_url=fake_openai.base_url, rate_limiter=limiter)
+
+    with pytest.raises(LLMUnavailableError):
+        service.extract_topics([{"id": str(i), "content": f"note-{i}"} for i in range(5)])
+
+    with pytest.raises(LLMUnavailableError):
+        service.chat_completion([{"role": "user", "content": "hi"}])
+    # Two failed attempts opened the circuit; later calls never reached the server
+    assert len(fake_openai.requests) == 2
+    assert limiter.stats()["circuit"] == "open"
+    assert limiter.stats()["circuit_rejections"] >= 1
@@ -0,0 +1,96 @@
+import json
+import re
+import time
+
+from app.services.llm_service import LLMService
+from app.services.note_chunking import chunk_markdown
+
+
+def _topic_from_prompt(body):
+    # Each test note's content is "note-<n>", echo it back as the topic
+    return re.search(r"note-\d+", body["messages"][-1]["content"]).group(0)
+
+
+def test_extract_topics_preserves_order(fake_openai):
+    fake_openai.responder = _topic_from_prompt
+    service = LLMService(max_concurrency=4, base_url=fake_openai.base_url)
+    notes = [{"id": str(i), "content": f"note-{i}"} for i in range(12)]
+
+    results = service.extract_topics(notes)
+
+    assert results == [{"topic": f"note-{i}", "note_id": str(i)} for i in range(12)]
+
+
+def test_extract_topics_is_bounded_parallel(fake_openai):
+    fake_openai.responder = _topic_from_prompt
+    fake_openai.delay = 0.2
+    service = LLMService(max_concurrency=4, base_url=fake_openai.base_url)
+    notes = [{"id": str(i), "content": f"note-{i}"} for i in range(8)]
+
+    start = time.monotonic()
+    service.extract_topics(notes)
+    elapsed = time.monotonic() - start
+
+    assert fake_openai.max_in_flight == 4
+    # Two waves of four requests, not eight sequential round-trips
+    assert elapsed < 8 * 0.2
+
+
+def test_extract_topic_times_out(fake_openai):
+    fake_openai.delay = 1.0
+    service = LLMService(max_concurrency=2, request_timeout=0.2, base_url=fake_openai.base_url)
+    service.client = service.client.with_options(max_retries=0)
+
+    assert service.extract_topic_from_note("note-1", "1") == {"topic": "unclassified", "note_id": "1"}
+
+
+def test_extract_topics_batched_packs_notes_and_falls_back(fake_openai):
+    def responder(body):
+        prompt = body["messages"][-1]["content"]
+        if body.get("response_format"):
+            # Answer for every note in the batch except note-3
+            ids = re.findall(r'"id": "(\d+)"', prompt)
+            return json.dumps({"topics": {i: f"note-{i}" for i in ids if i != "3"}})
+        return _topic_from_prompt(body)
+
+    fake_openai.responder = responder
+    service = LLMService(max_concurrency=2, batch_token_budget=100, base_url=fake_openai.base_url)
+    notes = [{"id": str(i), "content": f"note-{i} " + "x" * 80} for i in range(6)]
+
+    results = service.extract_topics(notes)
+
+    assert results == [{"topic": f"note-{i}", "note_id": str(i)} for i in range(6)]
+    batched = [body for body in fake_openai.requests if body.get("response_format")]
+    single = [body for body in fake_openai.requests if not body.get("response_format")]
+    assert 1 < len(batched) < len(notes)
+    assert len(single) == 1
+
+
+def test_chunk_markdown_splits_on_headings_and_caps_chunks():
+    sections = [f"# Section {i}\n" + "word " * 200 for i in range(10)]
+
+    chunks = chunk_markdown("\n".join(sections), max_tokens=300, max_chunks=4)
+
+    assert len(chunks) == 4
+    assert all(chunk.lstrip().startswith("# Section") for chunk in chunks)
+    assert chunks[0].startswith("# Section 0") and "Section 9" not in chunks[0]
+
+
+def test_long_note_is_classified_by_chunks_and_reduced(fake_openai):
+    def responder(body):
+        prompt = fake_openai.prompt(body)
+        if "consecutive sections" in prompt:
+            return "Calculus"
+        return re.search(r"# (\w+)", prompt).group(1)
+
+    fake_openai.responder = responder
+    fake_openai.delay = 0.1
+    service = LLMService(max_concurrency=4, base_url=fake_openai.base_url)
+    note = "\n".join(f"# {name}\n" + "text " * 500 for name in ["Derivatives", "Integrals", "Limits"])
+
+    result = service.extract_topic_from_note(note, "1")
+
+    assert result == {"topic": "Calculus", "note_id": "1"}
+    # Three chunk requests in parallel, then one reduce
+    assert len(fake_openai.requests) == 4
+    assert fake_openai.max_in_flight == 3
@@ -0,0 +1,76 @@
+from app.model.NoteGraphModel import NoteGraphModel
+
+
+class FakeKeyBERT:
+    """Returns canned keywords per document, like KeyBERT's multi-document API"""
+
+    def __init__(self, keywords):
+        self.keywords = keywords
+        self.calls = []
+
+    def extract_keywords(self, docs, **kwargs):
+        self.calls.append(docs)
+        if isinstance(docs, str):
+            return self.keywords[docs]
+        result = [self.keywords[doc] for doc in docs]
+        return result[0] if len(docs) == 1 else result
+
+
+KEYWORDS = {
+    "a": [("derivative", 0.6), ("calculus", 0.5)],
+    "b": [("calculus", 0.6), ("integral", 0.5)],
+    "c": [("kernel", 0.7)],
+}
+
+
+def test_extract_topics_batches_and_picks_each_notes_top_keyword():
+    # Models load lazily, so constructing one needs neither keybert nor transformers
+    model = NoteGraphModel(domain_model=None)
+    model.kw_model = FakeKeyBERT(KEYWORDS)
+    notes = [{"id": "1", "content": "a"}, {"id": "2", "content": "b"}, {"id": "3", "content": "c"}]
+
+    results = model.extract_topics(notes, batch_size=2)
+
+    assert results == [
+        {"topic": "Derivative", "note_id": "1"},
+        {"topic": "Calculus", "note_id": "2"},
+        {"topic": "Kernel", "note_id": "3"},
+    ]
+    assert model.kw_model.calls == [["a", "b"], ["c"]]
+
+
+def test_incremental_extraction_matches_full_build():
+    model = NoteGraphModel(domain_model=None)
+    model.kw_model = FakeKeyBERT(KEYWORDS)
+    notes = [{"id": "1", "content": "a"}, {"id": "2", "content": "b"}, {"id": "3", "content": "c"}]
+
+    full = model.extract_topics(notes)
+    # An incremental rebuild only re-extracts the notes that missed the topic cache
+    incremental = [model.extract_topics([note])[0] for note in notes]
+
+    assert incremental == full
+
+
+def test_incremental_rebuild_matches_full_rebuild(db_session, monkeypatch):
+    from app.db.models import FileSystem
+    from app.services import knowledge_graph, local_topics, visualize_topics
+    from app.services.topic_cache import invalidate_note_topics
+
+    model = NoteGraphModel(domain_model=None)
+    model.kw_model = FakeKeyBERT(KEYWORDS)
+    monkeypatch.setattr(local_topics, "get_note_graph_model", lambda: model)
+    monkeypatch.setattr(knowledge_graph.config, "TOPIC_BACKEND", "keybert")
+    monkeypatch.setattr(visualize_topics, "get_relationship_finder", lambda backend=None: lambda topics: [])
+
+    notes = [FileSystem(name=name, type="file", content=name) for name in "abc"]
+    db_session.add_all(notes)
+    db_session.commit()
+
+    def topics():
+        graph = knowledge_graph.build_knowledge_graph(db_session)
+        return {node["id"]: sorted(node["noteIds"]) for node in graph["nodes"]}
+
+    full = topics()
+    # Editing a note drops only its cached topic, so the next build extracts it alone
+    invalidate_note_topics(db_session, notes[0].id)
+    assert topics() == full
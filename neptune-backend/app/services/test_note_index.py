@@ -0,0 +1,68 @@
+import numpy as np
+
+from app.services.note_index import NoteEmbeddingIndex
+
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_search_returns_nearest_notes(tmp_path):
+    index = NoteEmbeddingIndex(str(tmp_path), "test-model")
+    vectors = _vectors(50)
+    index.upsert_many([(i, vector, i) for i, vector in enumerate(vectors)])
+
+    results = index.search(vectors[7], k=3)
+
+    assert results[0][0] == 7
+    assert abs(results[0][1] - 1.0) < 1e-5
+    assert len(results) == 3
+
+
+def test_updates_persist_and_grow(tmp_path):
+    index = NoteEmbeddingIndex(str(tmp_path), "test-model")
+    vectors = _vectors(1500)
+    index.upsert_many([(i, vector, i) for i, vector in enumerate(vectors)])
+    index.remove(3)
+    index.upsert(10, vectors[20], 99)
+
+    reopened = NoteEmbeddingIndex(str(tmp_path), "test-model")
+
+    assert len(reopened) == 1499
+    assert 3 not in reopened.fingerprints()
+    assert reopened.fingerprints()[10] == 99
+    assert reopened.search(vectors[1499], k=1)[0][0] == 1499
+    # An index built with a different model starts over
+    assert len(NoteEmbeddingIndex(str(tmp_path), "other-model")) == 0
+
+
+def test_instances_sharing_a_path_see_each_others_writes(tmp_path):
+    # Two API workers each hold their own index over the same files
+    first = NoteEmbeddingIndex(str(tmp_path), "test-model")
+    second = NoteEmbeddingIndex(str(tmp_path), "test-model")
+    vectors = _vectors(1100)
+
+    first.upsert_many([(i, vector, i) for i, vector in enumerate(vectors[:600])])
+    # Appends after the first worker's rows rather than over them, and grows the files
+    second.upsert_many([(i, vector, i) for i, vector in enumerate(vectors[600:], start=600)])
+    first.remove(5)
+    second.upsert(7, vectors[8], 42)
+
+    for index in (first, second, NoteEmbeddingIndex(str(tmp_path), "test-model")):
+        assert len(index) == 1099
+        assert index.fingerprint(5) is None
+        assert index.fingerprint(7) == 42
+        assert index.fingerprint(1000) == 1000
+        assert index.search(vectors[1099], k=1)[0][0] == 1099
+
+
+def test_only_one_process_syncs_at_a_time(tmp_path):
+    first = NoteEmbeddingIndex(str(tmp_path), "test-model")
+    second = NoteEmbeddingIndex(str(tmp_path), "test-model")
+
+    with first.sync_guard() as acquired:
+        assert acquired
+        with second.sync_guard() as also_acquired:
+            assert not also_acquired
+    with second.sync_guard() as acquired:
+        assert acquired
@@ -0,0 +1,8 @@
+from app.import_benchmark import DEFERRED_MODULES, measure_import
+
+
+def test_api_import_defers_rendering_and_llm_libraries():
+    _, imported = measure_import("app.main")
+
+    assert "app.main" in imported
+    assert [name for name in DEFERRED_MODULES if name in imported] == []
@@ -0,0 +1,72 @@
+from app.db.models import NoteTopic
+from app.services.topic_cache import (
+    UNCLASSIFIED_TOPIC,
+    content_hash,
+    invalidate_note_topics,
+    lookup_note_topics,
+    store_note_topics,
+)
+
+MODEL = "test-model"
+
+
+def _note(note_id, content):
+    return {"id": str(note_id), "content": content}
+
+
+def _store(db_session, notes, topics):
+    store_note_topics(
+        db_session,
+        [{"topic": topic, "note_id": note["id"]} for note, topic in zip(notes, topics)],
+        {note["id"]: content_hash(note["content"]) for note in notes},
+        MODEL
+    )
+
+
+def test_unchanged_notes_hit_and_edited_notes_miss(db_session):
+    notes = [_note(1, "vectors and matrices"), _note(2, "process scheduling")]
+    assert lookup_note_topics(db_session, notes, MODEL) == ({}, notes)
+    _store(db_session, notes, ["Linear Algebra", "Operating Systems"])
+
+    edited = _note(2, "page tables")
+    hits, misses = lookup_note_topics(db_session, [notes[0], edited], MODEL)
+
+    assert hits == {"1": "Linear Algebra"}
+    assert misses == [edited]
+    # Topics extracted by another model don't count
+    assert lookup_note_topics(db_session, notes, "other-model")[0] == {}
+
+
+def test_identical_content_is_extracted_once(db_session):
+    original = _note(1, "vectors and matrices")
+    _store(db_session, [original], ["Linear Algebra"])
+
+    copy = _note(2, "vectors and matrices")
+    hits, misses = lookup_note_topics(db_session, [copy], MODEL)
+
+    assert hits == {"2": "Linear Algebra"}
+    assert misses == []
+    # The copy got its own row, so it stays cached after the original goes
+    invalidate_note_topics(db_session, 1)
+    assert lookup_note_topics(db_session, [copy], MODEL)[0] == {"2": "Linear Algebra"}
+
+
+def test_store_replaces_and_skips_failed_extractions(db_session):
+    note = _note(1, "vectors and matrices")
+    _store(db_session, [note], ["Algebra"])
+    _store(db_session, [note], ["Linear Algebra"])
+    _store(db_session, [_note(2, "unparseable")], [UNCLASSIFIED_TOPIC])
+
+    rows = db_session.query(NoteTopic).all()
+    assert [(row.note_id, row.topic) for row in rows] == [(1, "Linear Algebra")]
+
+
+def test_invalidate_drops_only_that_note(db_session):
+    notes = [_note(1, "vectors and matrices"), _note(2, "process scheduling")]
+    _store(db_session, notes, ["Linear Algebra", "Operating Systems"])
+
+    invalidate_note_topics(db_session, 1)
+    hits, misses = lookup_note_topics(db_session, notes, MODEL)
+
+    assert hits == {"2": "Operating Systems"}
+    assert misses == [notes[0]]
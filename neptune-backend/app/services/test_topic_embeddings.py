@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.services.topic_embeddings import similarity_edges
+
+
+def _unit(rows):
+    vectors = np.array(rows, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_similarity_edges_thresholds_pairs():
+    topics = ["calculus", "statistics", "history"]
+    embeddings = _unit([[1, 0.1, 0], [1, 0.3, 0], [0, 0, 1]])
+
+    edges = similarity_edges(topics, embeddings, top_k=0, threshold=0.5)
+
+    assert [(a, b) for a, b, _ in edges] == [("calculus", "statistics")]
+    assert 0.9 < edges[0][2] <= 1.0
+
+
+def test_similarity_edges_keeps_top_k_neighbours():
+    rng = np.random.default_rng(0)
+    topics = [f"topic-{i}" for i in range(50)]
+    embeddings = _unit(rng.normal(size=(50, 16)))
+
+    edges = similarity_edges(topics, embeddings, top_k=3, threshold=-1.0)
+
+    degree = {topic: 0 for topic in topics}
+    for a, b, _ in edges:
+        degree[a] += 1
+        degree[b] += 1
+    # Every topic keeps its own top 3, plus any pair selected by the other side
+    assert min(degree.values()) >= 3
+    assert len(edges) <= 50 * 3
+    assert len({(a, b) for a, b, _ in edges}) == len(edges)
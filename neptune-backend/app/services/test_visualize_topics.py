@@ -0,0 +1,71 @@
+import json
+import re
+
+from openai import OpenAI
+
+from app.services import visualize_topics
+from app.services.llm_cache import TopicEdgeCache
+
+
+def _rate_every_pair(body):
+    numbers = re.findall(r"^\s*(\d+)\. ", body["messages"][-1]["content"], re.MULTILINE)
+    return json.dumps({number: 0.5 for number in numbers})
+
+
+def test_find_topic_relationships_only_scores_new_pairs(fake_openai, tmp_path, monkeypatch):
+    fake_openai.responder = _rate_every_pair
+    monkeypatch.setattr(visualize_topics, "_edge_cache", TopicEdgeCache(str(tmp_path / "edges.sqlite3")))
+    client = OpenAI(base_url=fake_openai.base_url, api_key="test-key")
+
+    edges = visualize_topics.find_topic_relationships(["a", "b", "c"], client=client)
+    assert len(edges) == 3
+
+    fake_openai.requests.clear()
+    edges = visualize_topics.find_topic_relationships(["a", "b", "c", "d"], client=client)
+
+    assert len(edges) == 6
+    prompt = fake_openai.requests[0]["messages"][-1]["content"]
+    # Only the three pairs involving the new topic were sent
+    assert len(re.findall(r"^\s*\d+\. ", prompt, re.MULTILINE)) == 3
+    assert " and d" in prompt
+
+
+def test_find_topic_relationships_shards_pairs(fake_openai, tmp_path, monkeypatch):
+    fake_openai.responder = _rate_every_pair
+    monkeypatch.setattr(visualize_topics, "_edge_cache", TopicEdgeCache(str(tmp_path / "edges.sqlite3")))
+    monkeypatch.setattr(visualize_topics.config, "RELATIONSHIP_SHARD_TOKEN_BUDGET", 100)
+    client = OpenAI(base_url=fake_openai.base_url, api_key="test-key")
+    topics = [f"topic{i}" for i in range(10)]
+
+    edges = visualize_topics.find_topic_relationships(topics, client=client)
+
+    assert len(edges) == 45
+    assert len(fake_openai.requests) > 1
+
+
+def test_pairs_scored_zero_get_no_edges(fake_openai, tmp_path, monkeypatch):
+    fake_openai.responder = lambda body: json.dumps({
+        number: 0.0 for number in re.findall(r"^\s*(\d+)\. ", body["messages"][-1]["content"], re.MULTILINE)
+    })
+    monkeypatch.setattr(visualize_topics, "_edge_cache", TopicEdgeCache(str(tmp_path / "edges.sqlite3")))
+    client = OpenAI(base_url=fake_openai.base_url, api_key="test-key")
+
+    assert visualize_topics.find_topic_relationships(["a", "b", "c"], client=client) == []
+    # Cached zeros don't fall back to default edges either
+    fake_openai.requests.clear()
+    assert visualize_topics.find_topic_relationships(["a", "b", "c"], client=client) == []
+    assert fake_openai.requests == []
+
+
+def test_unscored_pairs_get_default_edges(fake_openai, tmp_path, monkeypatch):
+    fake_openai.fail_next(10, status=500)
+    monkeypatch.setattr(visualize_topics, "_edge_cache", TopicEdgeCache(str(tmp_path / "edges.sqlite3")))
+    client = OpenAI(base_url=fake_openai.base_url, api_key="test-key", max_retries=0)
+
+    edges = visualize_topics.find_topic_relationships(["a", "b", "c"], client=client)
+
+    assert sorted(edges) == [
+        ("a", "b", visualize_topics.DEFAULT_RELATIONSHIP_STRENGTH),
+        ("a", "c", visualize_topics.DEFAULT_RELATIONSHIP_STRENGTH),
+        ("b", "c", visualize_topics.DEFAULT_RELATIONSHIP_STRENGTH),
+    ]
@@ -0,0 +1,80 @@
+import gzip
+
+from starlette.requests import Request
+
+from app.api.routes.knowledge_graph import snapshot_response
+from app.core.config import config
+from app.services import graph_snapshots, wire_format
+from app.services.graph_snapshots import save_graph_snapshot
+
+GRAPH = {
+    "nodes": [
+        {"id": "Algebra", "label": "Algebra", "size": 40, "noteCount": 2, "noteIds": ["1", "2"], "x": 0.1, "y": 0.2},
+        {"id": "Geometry", "label": "Geometry", "size": 20, "noteCount": 1, "noteIds": ["2"], "x": -0.3, "y": 0.4},
+    ],
+    "links": [{"source": "Algebra", "target": "Geometry", "strength": 0.7}],
+}
+
+
+def test_columnar_round_trip_dictionary_encodes_ids():
+    columns = wire_format.to_columnar(GRAPH)
+
+    assert columns["ids"] == ["Algebra", "Geometry"]
+    assert columns["notes"] == ["1", "2"]
+    assert columns["noteIndex"] == [0, 1, 1]
+    assert (columns["source"], columns["target"]) == ([0], [1])
+    assert wire_format.from_columnar(columns) == GRAPH
+
+
+def test_negotiation_respects_accept_headers():
+    assert wire_format.negotiate_encoding("gzip, deflate") == "gzip"
+    assert wire_format.negotiate_encoding("gzip;q=0") is None
+    assert wire_format.negotiate_encoding(None) is None
+    assert wire_format.negotiate_media_type("application/json") == wire_format.JSON
+
+
+def test_snapshot_variants_are_encoded_once(db_session, monkeypatch):
+    monkeypatch.setattr(graph_snapshots, "_current", None)
+    monkeypatch.setattr(graph_snapshots.config, "RESPONSE_COMPRESSION_MIN_BYTES", 1)
+    snapshot = save_graph_snapshot(db_session, GRAPH)
+
+    body, encoding = snapshot.render(columnar=True, encoding="gzip")
+    assert encoding == "gzip"
+    assert wire_format.from_columnar(wire_format.loads(gzip.decompress(body))) == GRAPH
+    assert snapshot.render(columnar=True, encoding="gzip")[0] is body
+    assert snapshot.render() == (snapshot.body, None)
+    assert snapshot.etag_for(columnar=True) != snapshot.etag
+
+
+def _request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/knowledge-graph/",
+        "query_string": b"",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_each_representation_has_its_own_etag_and_varies(db_session, monkeypatch):
+    monkeypatch.setattr(graph_snapshots, "_current", None)
+    monkeypatch.setattr(config, "RESPONSE_COMPRESSION_MIN_BYTES", 1)
+    snapshot = save_graph_snapshot(db_session, GRAPH)
+
+    plain = snapshot_response(snapshot, _request())
+    gzipped = snapshot_response(snapshot, _request(accept_encoding="gzip"))
+
+    assert plain.headers["ETag"] == snapshot.etag
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] != plain.headers["ETag"]
+    assert plain.headers["Vary"] == gzipped.headers["Vary"] == "Accept, Accept-Encoding"
+
+    # A cached identity copy doesn't validate a gzip request, and vice versa
+    stale = snapshot_response(snapshot, _request(accept_encoding="gzip", if_none_match=plain.headers["ETag"]), conditional=True)
+    assert stale.status_code == 200
+
+    fresh = snapshot_response(snapshot, _request(accept_encoding="gzip", if_none_match=gzipped.headers["ETag"]), conditional=True)
+    assert fresh.status_code == 304
+    assert fresh.headers["Vary"] == "Accept, Accept-Encoding"
+    assert fresh.headers["ETag"] == gzipped.headers["ETag"]
+    assert not fresh.body
@@ -0,0 +1,109 @@
+import hashlib
+from typing import List, Dict, Any, Tuple
+from sqlalchemy.orm import Session
+
+from app.db.models import NoteTopic
+
+# Topic returned by the LLM service when extraction fails; never cached so it gets retried
+UNCLASSIFIED_TOPIC = "unclassified"
+
+def content_hash(content: str) -> str:
+    """Return a stable hash of note content used as the cache key"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def lookup_note_topics(
+    db: Session,
+    notes: List[Dict[str, Any]],
+    model_name: str
+) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+    """
+    Split notes into those with a cached topic and those that still need extraction.
+
+    A note is a hit if its own cached row matches the current content hash, or if
+    any other note with identical content has already been classified by the model.
+
+    Args:
+        db: Database session
+        notes: List of dictionaries with note content and IDs
+        model_name: Name of the model the topics were extracted with
+
+    Returns:
+        Tuple of ({note_id: topic} for hits, list of notes that missed the cache)
+    """
+    if not notes:
+        return {}, []
+
+    hashes = {note["id"]: content_hash(note["content"]) for note in notes}
+
+    rows = (
+        db.query(NoteTopic)
+        .filter(NoteTopic.model_name == model_name)
+        .filter(NoteTopic.content_hash.in_(set(hashes.values())))
+        .all()
+    )
+    by_note = {(str(row.note_id), row.content_hash): row.topic for row in rows}
+    by_hash = {row.content_hash: row.topic for row in rows}
+
+    hits = {}
+    misses = []
+    for note in notes:
+        note_hash = hashes[note["id"]]
+        topic = by_note.get((note["id"], note_hash), by_hash.get(note_hash))
+        if topic is None:
+            misses.append(note)
+        else:
+            hits[note["id"]] = topic
+
+    # Notes that were satisfied through identical content get their own row,
+    # so the next lookup doesn't depend on the other note still existing
+    stale = [note_id for note_id in hits if (note_id, hashes[note_id]) not in by_note]
+    if stale:
+        store_note_topics(
+            db,
+            [{"topic": hits[note_id], "note_id": note_id} for note_id in stale],
+            {note_id: hashes[note_id] for note_id in stale},
+            model_name
+        )
+
+    return hits, misses
+
+def store_note_topics(
+    db: Session,
+    results: List[Dict[str, Any]],
+    hashes: Dict[str, str],
+    model_name: str
+):
+    """
+    Persist freshly extracted topics, replacing any previous row for the same note and model.
+
+    Args:
+        db: Database session
+        results: List of {"topic": ..., "note_id": ...} extraction results
+        hashes: Mapping of note_id to the content hash the topic was extracted from
+        model_name: Name of the model the topics were extracted with
+    """
+    results = [item for item in results if item["topic"] != UNCLASSIFIED_TOPIC]
+    if not results:
+        return
+
+    note_ids = [int(item["note_id"]) for item in results]
+    db.query(NoteTopic).filter(
+        NoteTopic.model_name == model_name,
+        NoteTopic.note_id.in_(note_ids)
+    ).delete(synchronize_session=False)
+
+    db.add_all([
+        NoteTopic(
+            note_id=int(item["note_id"]),
+            content_hash=hashes[item["note_id"]],
+            model_name=model_name,
+            topic=item["topic"]
+        )
+        for item in results
+    ])
+    db.commit()
+
+def invalidate_note_topics(db: Session, note_id: int):
+    """Drop every cached topic for a note, e.g. after its content changed or it was deleted"""
+    db.query(NoteTopic).filter(NoteTopic.note_id == note_id).delete(synchronize_session=False)
+    db.commit()
@@ -0,0 +1,102 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import config
+
+# Topic strings recur across rebuilds, so each one is only embedded once per process
+_embedding_cache: Dict[str, np.ndarray] = {}
+
+def get_encoder():
+    """The sentence-transformer for EMBEDDING_MODEL, loaded on first use and shared through the model registry"""
+    from app.model.model_registry import get_sentence_transformer
+    return get_sentence_transformer(config.EMBEDDING_MODEL)
+
+def embed_topics(topics: List[str]) -> np.ndarray:
+    """
+    Embed topics as unit-length vectors, reusing embeddings computed earlier.
+
+    Returns:
+        float32 array of shape (len(topics), dim)
+    """
+    missing = [topic for topic in dict.fromkeys(topics) if topic not in _embedding_cache]
+    if missing:
+        vectors = get_encoder().encode(missing, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+        for topic, vector in zip(missing, vectors):
+            _embedding_cache[topic] = vector.astype(np.float32)
+    return np.stack([_embedding_cache[topic] for topic in topics])
+
+def similarity_edges(
+    topics: List[str],
+    embeddings: np.ndarray,
+    top_k: int = 5,
+    threshold: float = 0.3
+) -> List[Tuple[str, str, float]]:
+    """
+    Build sparse edges from cosine similarity of unit-length embeddings.
+
+    Each topic keeps at most its top_k most similar neighbours, and only pairs at
+    or above threshold become edges. A pair selected from either side is kept once.
+
+    Args:
+        topics: List of topic strings
+        embeddings: Array of shape (len(topics), dim), rows normalized to unit length
+        top_k: Maximum neighbours per topic (0 keeps every pair above threshold)
+        threshold: Minimum cosine similarity for an edge
+
+    Returns:
+        List of tuples (topic1, topic2, strength) representing edges
+    """
+    n = len(topics)
+    if n < 2:
+        return []
+
+    similarity = embeddings @ embeddings.T
+    np.fill_diagonal(similarity, -np.inf)
+
+    if top_k and top_k < n - 1:
+        # Mask everything outside each row's top_k before thresholding
+        neighbours = np.argpartition(-similarity, top_k, axis=1)[:, :top_k]
+        keep = np.zeros_like(similarity, dtype=bool)
+        np.put_along_axis(keep, neighbours, True, axis=1)
+        keep |= keep.T
+        similarity = np.where(keep, similarity, -np.inf)
+
+    rows, cols = np.nonzero(np.triu(similarity >= threshold, k=1))
+    strengths = np.clip(similarity[rows, cols], 0.1, 1.0)
+    return [
+        (topics[i], topics[j], round(float(strength), 4))
+        for i, j, strength in zip(rows.tolist(), cols.tolist(), strengths.tolist())
+    ]
+
+def find_topic_relationships_by_embedding(
+    topics: List[str],
+    top_k: Optional[int] = None,
+    threshold: Optional[float] = None,
+    on_edges: Optional[Callable[[List[Tuple[str, str, float]]], None]] = None
+) -> List[Tuple[str, str, float]]:
+    """
+    Find relationships between topics locally from embedding similarity, with no LLM calls.
+
+    Args:
+        topics: List of topic strings
+        top_k: Maximum neighbours per topic, defaults to RELATIONSHIP_TOP_K
+        threshold: Minimum cosine similarity, defaults to RELATIONSHIP_THRESHOLD
+        on_edges: Optional callback receiving the edges once computed
+
+    Returns:
+        List of tuples (topic1, topic2, strength) representing edges
+    """
+    if len(topics) < 2:
+        return []
+
+    edges = similarity_edges(
+        topics,
+        embed_topics(topics),
+        top_k=config.RELATIONSHIP_TOP_K if top_k is None else top_k,
+        threshold=config.RELATIONSHIP_THRESHOLD if threshold is None else threshold
+    )
+    print(f"Found {len(edges)} embedding relationships between {len(topics)} topics")
+    if on_edges is not None and edges:
+        on_edges(edges)
+    return edges
@@ -1,46 +1,72 @@
 import networkx as nx
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-from openai import OpenAI
 import os
 import itertools
 from dotenv import load_dotenv
-from .llm_service import extract_topics_from_notes
-from typing import List, Dict, Any, Tuple
+import json
+from .llm_service import extract_topics_from_notes, llm_service, estimate_tokens
+from .llm_cache import TopicEdgeCache
+from .llm_limits import LLMUnavailableError
+from .graph_layout import Positions, force_layout
+from app.core.config import config
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple, Optional, Callable
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 # Load environment variables
 load_dotenv()
 
-def find_topic_relationships(topics: List[str], client: OpenAI = None) -> List[Tuple[str, str, float]]:
+# Model used to score topic pairs, part of the edge cache key
+RELATIONSHIP_MODEL = "gpt-4o"
+# Strength used when scoring a pair failed outright
+DEFAULT_RELATIONSHIP_STRENGTH = 0.3
+
+_edge_cache = None
+
+def get_edge_cache() -> Optional[TopicEdgeCache]:
+    """Shared on-disk cache of scored topic pairs, or None when LLM caching is disabled"""
+    global _edge_cache
+    if _edge_cache is None and config.LLM_CACHE_ENABLED:
+        _edge_cache = TopicEdgeCache(config.LLM_CACHE_PATH)
+    return _edge_cache
+
+def _shard_topic_pairs(pairs: List[Tuple[str, str]], token_budget: int) -> List[List[Tuple[str, str]]]:
+    """Split pairs into shards whose estimated prompt and response size fits the token budget"""
+    shards = []
+    current = []
+    current_tokens = 0
+    for pair in pairs:
+        # The pair line in the prompt plus its '"n": 0.5,' entry in the response
+        tokens = estimate_tokens(f"{len(current) + 1}. {pair[0]} and {pair[1]}") + 8
+        if current and current_tokens + tokens > token_budget:
+            shards.append(current)
+            current = []
+            current_tokens = 0
+        current.append(pair)
+        current_tokens += tokens
+    if current:
+        shards.append(current)
+    return shards
+
+def _score_topic_pairs(
+    pairs: List[Tuple[str, str]],
+    client: "OpenAI" = None,
+    bypass_cache: bool = False
+) -> Dict[Tuple[str, str], float]:
     """
-    Find relationships between topics using the OpenAI API with a generous approach.
+    Ask the LLM to rate one shard of topic pairs.
     
-    Args:
-        topics: List of topic strings
-        client: Optional OpenAI client, will create one if not provided
-        
     Returns:
-        List of tuples (topic1, topic2, strength) representing edges
+        Mapping of every pair in the shard to its strength. Pairs the model
+        left out are scored 0.0 so they aren't sent again on the next rebuild.
     """
-    if client is None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        client = OpenAI(api_key=api_key)
-    
-    # No need to find relationships if there are too few topics
-    if len(topics) < 2:
-        return []
-    
-    # Generate all possible pairs of topics
-    topic_pairs = list(itertools.combinations(topics, 2))
-    
-    # Create a prompt asking to rate each specific pair
-    topic_pairs_text = "\n".join([f"- {pair[0]} and {pair[1]}" for pair in topic_pairs])
+    topic_pairs_text = "\n".join([f"{i}. {pair[0]} and {pair[1]}" for i, pair in enumerate(pairs, 1)])
     
     prompt = f"""
     I have a set of topics from which I want to build a knowledge graph. I need to identify EVERY possible 
     connection between these topics, even if the relationship is tenuous or indirect.
     
-    Please rate the relationship strength between each of the following topic pairs on a scale from 0.1 to 1.0:
+    Please rate the relationship strength between each of the following numbered topic pairs on a scale from 0.1 to 1.0:
     
     {topic_pairs_text}
     
@@ -51,73 +77,159 @@ def find_topic_relationships(topics: List[str], client: OpenAI = None) -> List[T
     - Consider ANY type of relationship: subjects taught together, historical connections, conceptual overlap,
       shared methods, complementary ideas, or topics that might appear in the same text or course
     
-    Format your response as a JSON object with pairs as keys and strength as values:
+    Format your response as a JSON object with pair numbers as keys and strength as values:
     {{
-        "{topics[0]}-{topics[1]}": 0.7,
-        "{topics[0]}-{topics[2]}": 0.3,
+        "1": 0.7,
+        "2": 0.3,
         ...
     }}
     """
     
-    print("Finding relationships between topics...")
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=1500,
-            response_format={"type": "json_object"}
-        )
-        
-        import json
-        content = response.choices[0].message.content
-        result = json.loads(content)
-        
-        # Convert the pair-based format to our tuple format
-        edges = []
-        for pair_key, strength in result.items():
-            try:
-                # Try to split by hyphen first
-                if '-' in pair_key:
-                    topic1, topic2 = pair_key.split('-')
-                # Otherwise try other formats
-                elif ' and ' in pair_key:
-                    topic1, topic2 = pair_key.split(' and ')
-                else:
-                    continue
-                    
-                topic1 = topic1.strip()
-                topic2 = topic2.strip()
-                
-                if topic1 in topics and topic2 in topics:
-                    edges.append((topic1, topic2, float(strength)))
-            except:
-                # If any error occurs, just skip this pair
-                continue
+    content = llm_service.chat_completion(
+        [{"role": "user", "content": prompt}],
+        model=RELATIONSHIP_MODEL,
+        bypass_cache=bypass_cache,
+        client=client,
+        temperature=0.7,
+        max_tokens=8 * len(pairs) + 50,
+        response_format={"type": "json_object"}
+    )
+    result = json.loads(content)
+    
+    scores = {pair: 0.0 for pair in pairs}
+    for key, strength in result.items():
+        try:
+            index = int(key) - 1
+            if 0 <= index < len(pairs):
+                scores[pairs[index]] = float(strength)
+        except (TypeError, ValueError):
+            # If the key or value is malformed, just skip this pair
+            continue
+    return scores
+
+def find_topic_relationships(
+    topics: List[str],
+    client: "OpenAI" = None,
+    bypass_cache: bool = False,
+    on_edges: Optional[Callable[[List[Tuple[str, str, float]]], None]] = None
+) -> List[Tuple[str, str, float]]:
+    """
+    Find relationships between topics using the OpenAI API with a generous approach.
+    
+    Pairs already scored on a previous run are read from the edge cache. The
+    remaining pairs are split into token-bounded shards that are scored
+    concurrently, so a rebuild only pays for pairs involving new topics.
+    
+    Args:
+        topics: List of topic strings
+        client: Optional OpenAI client, defaults to the shared LLM service client
+        bypass_cache: Rescore every pair instead of reusing cached scores
+        on_edges: Optional callback receiving edges as soon as they are known
+            (cached edges first, then each scored shard)
         
-        # If we didn't get any edges, create default relationships
-        if not edges:
-            for t1, t2 in topic_pairs:
-                edges.append((t1, t2, 0.3))  # Default modest relationship
-                
-        print(f"Found {len(edges)} relationships between topics")
-        return edges
-    
-    except Exception as e:
-        print(f"Error finding topic relationships: {e}")
-        # Create default relationships if there's an error
-        edges = []
-        for t1, t2 in topic_pairs:
-            edges.append((t1, t2, 0.3))  # Default modest relationship
-        print(f"Created {len(edges)} default relationships between topics")
-        return edges
+    Returns:
+        List of tuples (topic1, topic2, strength) representing edges
+    """
+    # No need to find relationships if there are too few topics
+    if len(topics) < 2:
+        return []
+    
+    # Generate all possible pairs of topics
+    topic_pairs = list(itertools.combinations(topics, 2))
+    
+    edge_cache = get_edge_cache()
+    cached = {}
+    if edge_cache is not None and not bypass_cache:
+        cached = edge_cache.get_many(topic_pairs, RELATIONSHIP_MODEL)
+    pending = [pair for pair in topic_pairs if TopicEdgeCache.pair_key(*pair) not in cached]
+    
+    emitted = set()
+    def emit(new_edges):
+        new_edges = [edge for edge in new_edges if edge[2] > 0 and (edge[0], edge[1]) not in emitted]
+        if on_edges is not None and new_edges:
+            emitted.update((t1, t2) for t1, t2, _ in new_edges)
+            on_edges(new_edges)
+    
+    emit([
+        (t1, t2, cached[TopicEdgeCache.pair_key(t1, t2)])
+        for t1, t2 in topic_pairs
+        if TopicEdgeCache.pair_key(t1, t2) in cached
+    ])
+    
+    print(f"Finding relationships between topics ({len(pending)} of {len(topic_pairs)} pairs need scoring)...")
+    shards = _shard_topic_pairs(pending, config.RELATIONSHIP_SHARD_TOKEN_BUDGET)
+    
+    def score_shard(shard):
+        try:
+            return _score_topic_pairs(shard, client=client, bypass_cache=bypass_cache)
+        except LLMUnavailableError:
+            # Default edges for a whole rate-limited graph would be garbage; fail the build instead
+            raise
+        except Exception as e:
+            print(f"Error finding topic relationships: {e}")
+            return None
+    
+    scored = {}
+    failed = set()
+    def on_shard(shard, shard_scores):
+        if shard_scores is not None:
+            emit([(t1, t2, shard_scores[(t1, t2)]) for t1, t2 in shard])
+    
+    for shard, shard_scores in zip(shards, llm_service.map_concurrent(score_shard, shards, on_shard)):
+        if shard_scores is None:
+            failed.update(shard)
+        else:
+            scored.update(shard_scores)
+    
+    if edge_cache is not None and scored:
+        edge_cache.set_many(scored, RELATIONSHIP_MODEL)
+    
+    edges = []
+    for t1, t2 in topic_pairs:
+        if (t1, t2) in scored:
+            strength = scored[(t1, t2)]
+        elif (t1, t2) in failed:
+            # Only pairs that couldn't be scored get the default modest relationship;
+            # a pair scored (or cached) as 0 is unrelated and gets no edge
+            strength = DEFAULT_RELATIONSHIP_STRENGTH
+        else:
+            strength = cached.get(TopicEdgeCache.pair_key(t1, t2), 0.0)
+        if strength > 0:
+            edges.append((t1, t2, strength))
+    
+    # Default edges for failed shards (or the whole graph) are only known at the end
+    emit(edges)
+    
+    print(f"Found {len(edges)} relationships between topics")
+    return edges
+
+def get_relationship_finder(backend: str = None):
+    """
+    Return the function used to score topic relationships.
+    
+    Args:
+        backend: "llm" or "embedding", defaults to RELATIONSHIP_BACKEND
+    """
+    backend = backend or config.RELATIONSHIP_BACKEND
+    if backend == "embedding":
+        from .topic_embeddings import find_topic_relationships_by_embedding
+        return find_topic_relationships_by_embedding
+    if backend == "llm":
+        return find_topic_relationships
+    raise ValueError(f"Unknown relationship backend: {backend}")
 
-def create_topic_graph(topics_data: List[Dict[str, Any]]) -> nx.Graph:
+def create_topic_graph(
+    topics_data: List[Dict[str, Any]],
+    relationship_backend: str = None,
+    on_edges: Optional[Callable[[List[Tuple[str, str, float]]], None]] = None
+) -> nx.Graph:
     """
     Create a NetworkX graph from topic extraction results.
     
     Args:
         topics_data: List of topic dictionaries, each with 'topic' and 'note_ids' fields
+        relationship_backend: "llm" or "embedding", defaults to RELATIONSHIP_BACKEND
+        on_edges: Optional callback receiving relationship edges as they are scored
         
     Returns:
         NetworkX graph with topic nodes and relationship edges
@@ -140,22 +252,30 @@ def create_topic_graph(topics_data: List[Dict[str, Any]]) -> nx.Graph:
         )
     
     # Find and add relationships between topics
-    topic_relationships = find_topic_relationships(topic_names)
+    find_relationships = get_relationship_finder(relationship_backend)
+    if on_edges is None:
+        topic_relationships = find_relationships(topic_names)
+    else:
+        topic_relationships = find_relationships(topic_names, on_edges=on_edges)
     for topic1, topic2, strength in topic_relationships:
         G.add_edge(topic1, topic2, weight=strength)
     
     return G
 
-def visualize_graph_plotly(G: nx.Graph, filename: str = "topic_graph.html"):
+def visualize_graph_plotly(G: nx.Graph, filename: str = "topic_graph.html", pos: Optional[Positions] = None):
     """
     Create an interactive Plotly visualization of the topic graph
     
     Args:
         G: NetworkX graph of topics
         filename: Output HTML file name
+        pos: Precomputed node positions, e.g. from the graph snapshot
     """
-    # Create a spring layout for node positions
-    pos = nx.spring_layout(G, k=0.4, iterations=50, seed=42)
+    # Rendering libraries load here, not when the API starts
+    import plotly.graph_objects as go
+
+    if pos is None:
+        pos = force_layout(G)
     
     # Create node trace
     node_x = []
@@ -232,18 +352,22 @@ def visualize_graph_plotly(G: nx.Graph, filename: str = "topic_graph.html"):
     
     return fig
 
-def visualize_graph_matplotlib(G: nx.Graph, filename: str = "topic_graph.png"):
+def visualize_graph_matplotlib(G: nx.Graph, filename: str = "topic_graph.png", pos: Optional[Positions] = None):
     """
     Create a static Matplotlib visualization of the topic graph
     
     Args:
         G: NetworkX graph of topics
         filename: Output PNG file name
+        pos: Precomputed node positions, e.g. from the graph snapshot
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(12, 10))
     
     # Generate layout
-    pos = nx.spring_layout(G, k=0.4, iterations=50, seed=42)
+    if pos is None:
+        pos = force_layout(G)
     
     # Get node sizes based on note count
     node_sizes = [G.nodes[node].get('size', 300) for node in G.nodes()]
@@ -301,25 +425,30 @@ def visualize_topic_relationships(topics_data, filename_base="topic_relationship
     
     return G
 
-def graph_to_frontend_format(G: nx.Graph) -> Dict:
+def graph_to_frontend_format(G: nx.Graph, pos: Optional[Positions] = None) -> Dict:
     """
     Convert NetworkX graph to a frontend-friendly JSON structure
     
     Args:
         G: NetworkX graph of topics and relationships
+        pos: Node positions; when given each node carries x and y so clients can
+            skip their own layout
         
     Returns:
         Dictionary with nodes and links arrays for frontend visualization
     """
     nodes = []
     for node, data in G.nodes(data=True):
-        nodes.append({
+        item = {
             "id": node,
             "label": node,
             "size": data.get("size", 30),
             "noteCount": data.get("note_count", 0),
             "noteIds": data.get("note_ids", [])
-        })
+        }
+        if pos is not None:
+            item["x"], item["y"] = pos[node]
+        nodes.append(item)
     
     links = []
     for u, v, data in G.edges(data=True):
@@ -0,0 +1,146 @@
+import gzip
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: MessagePack is only offered when installed
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is used when brotli isn't installed
+    brotli = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def _default(value: Any) -> Any:
+    # orjson writes datetimes as ISO 8601 itself
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(data: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+def loads(body) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+def to_columnar(graph_data: Dict) -> Dict:
+    """
+    Re-encode a frontend graph payload column-wise.
+
+    Node ids and note ids are stored once, in "ids" and "notes"; everything else
+    refers to them by position. Nodes are parallel arrays indexed by node position,
+    links are parallel source/target/strength arrays of node positions, and node
+    note ids are CSR: the notes of node i are
+    notes[noteIndex[noteOffsets[i]:noteOffsets[i + 1]]]. "label" is dropped since
+    it always equals the id.
+    """
+    nodes = graph_data.get("nodes", [])
+    links = graph_data.get("links", [])
+    ids = [node["id"] for node in nodes]
+    position = {node_id: i for i, node_id in enumerate(ids)}
+
+    notes: Dict[Any, int] = {}
+    note_offsets = [0]
+    note_index: List[int] = []
+    for node in nodes:
+        note_index.extend(notes.setdefault(note_id, len(notes)) for note_id in node.get("noteIds", []))
+        note_offsets.append(len(note_index))
+
+    columns = {
+        "format": "columnar",
+        "ids": ids,
+        "size": [node.get("size", 30) for node in nodes],
+        "noteCount": [node.get("noteCount", 0) for node in nodes],
+        "notes": list(notes),
+        "noteOffsets": note_offsets,
+        "noteIndex": note_index,
+        "source": [position[link["source"]] for link in links],
+        "target": [position[link["target"]] for link in links],
+        "strength": [link.get("strength", 0.5) for link in links],
+    }
+    if nodes and "x" in nodes[0]:
+        columns["x"] = [node.get("x") for node in nodes]
+        columns["y"] = [node.get("y") for node in nodes]
+    return columns
+
+def from_columnar(columns: Dict) -> Dict:
+    """Inverse of to_columnar"""
+    ids = columns["ids"]
+    notes = columns["notes"]
+    offsets = columns["noteOffsets"]
+    note_index = columns["noteIndex"]
+    has_positions = "x" in columns
+
+    nodes = []
+    for i, node_id in enumerate(ids):
+        node = {
+            "id": node_id,
+            "label": node_id,
+            "size": columns["size"][i],
+            "noteCount": columns["noteCount"][i],
+            "noteIds": [notes[j] for j in note_index[offsets[i]:offsets[i + 1]]],
+        }
+        if has_positions:
+            node["x"], node["y"] = columns["x"][i], columns["y"][i]
+        nodes.append(node)
+    links = [
+        {"source": ids[source], "target": ids[target], "strength": strength}
+        for source, target, strength in zip(columns["source"], columns["target"], columns["strength"])
+    ]
+    return {"nodes": nodes, "links": links}
+
+def _accepts(header: Optional[str], value: str) -> bool:
+    """Whether a comma-separated Accept-style header lists value without q=0"""
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() == value:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """MessagePack when the client asks for it and it is installed, JSON otherwise"""
+    if msgpack is not None and _accepts(accept, MSGPACK):
+        return MSGPACK
+    return JSON
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred content coding the client accepts: "br", "gzip" or None"""
+    if brotli is not None and _accepts(accept_encoding, "br"):
+        return "br"
+    if _accepts(accept_encoding, "gzip"):
+        return "gzip"
+    return None
+
+def encode(data: Any, media_type: str = JSON) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    return dumps(data)
+
+def compress(body: bytes, encoding: Optional[str], min_bytes: int) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress body with encoding unless it is below min_bytes (0 disables compression).
+
+    Returns:
+        (body, applied encoding or None)
+    """
+    if encoding is None or not min_bytes or len(body) < min_bytes:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
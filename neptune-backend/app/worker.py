@@ -0,0 +1,110 @@
+"""
+Out-of-process knowledge graph builder.
+
+Run alongside the API with GRAPH_BUILD_MODE=worker:
+
+    python -m app.worker
+
+Any number of API processes can enqueue rebuilds; one or more workers claim
+them from the graph_build_jobs table and store the result as a graph snapshot.
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+import traceback
+
+from app.core.config import config
+from app.db.database import SessionLocal
+from app.services.graph_jobs import (
+    claim_graph_build_jobs,
+    complete_graph_build_jobs,
+    fail_graph_build_jobs,
+    heartbeat_graph_build_jobs,
+    requeue_stale_graph_build_jobs,
+)
+from app.services.knowledge_graph import build_knowledge_graph_snapshot
+
+class Heartbeat:
+    """Renews the lease on claimed jobs from a background thread while a build runs"""
+
+    def __init__(self, jobs, worker_id: str, interval_seconds: float):
+        self.jobs = jobs
+        self.worker_id = worker_id
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="graph-job-heartbeat", daemon=True)
+
+    def _run(self):
+        # The build holds the worker's session, so heartbeats use their own
+        while not self._stop.wait(self.interval_seconds):
+            db = SessionLocal()
+            try:
+                if not heartbeat_graph_build_jobs(db, self.jobs, self.worker_id):
+                    print(f"Worker {self.worker_id} lost its graph build jobs to another worker")
+            except Exception as e:
+                print(f"Error renewing graph build jobs: {e}")
+            finally:
+                db.close()
+
+    def __enter__(self):
+        if self.interval_seconds:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+def run_pending_build(worker_id: str) -> bool:
+    """
+    Claim due jobs and run one build for all of them.
+
+    Returns:
+        True if a build ran, False if the queue was empty
+    """
+    db = SessionLocal()
+    try:
+        requeued = requeue_stale_graph_build_jobs(db, config.GRAPH_JOB_TIMEOUT_SECONDS)
+        if requeued:
+            print(f"Requeued {requeued} stale graph build jobs")
+
+        jobs = claim_graph_build_jobs(db, worker_id)
+        if not jobs:
+            return False
+
+        print(f"Building knowledge graph for jobs {[job.id for job in jobs]}")
+        try:
+            with Heartbeat(jobs, worker_id, config.GRAPH_JOB_HEARTBEAT_SECONDS):
+                snapshot = build_knowledge_graph_snapshot(db)
+        except Exception as e:
+            traceback.print_exc()
+            db.rollback()
+            finished = fail_graph_build_jobs(db, jobs, worker_id, str(e))
+        else:
+            finished = complete_graph_build_jobs(db, jobs, worker_id, snapshot.version)
+        if finished < len(jobs):
+            print(f"{len(jobs) - finished} graph build jobs were requeued during the build and left to their new worker")
+        return True
+    finally:
+        db.close()
+
+def run_worker(poll_seconds: float, once: bool = False):
+    """Poll the job queue forever, or until it is empty when once is set"""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Graph build worker {worker_id} started")
+    while True:
+        ran = run_pending_build(worker_id)
+        if not ran:
+            if once:
+                return
+            time.sleep(poll_seconds)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run queued knowledge graph builds")
+    parser.add_argument("--poll-seconds", type=float, default=config.GRAPH_WORKER_POLL_SECONDS)
+    parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args()
+    run_worker(args.poll_seconds, once=args.once)
@@ -3,6 +3,8 @@
 import { useEffect, useState } from "react";
 import { Folder, FileText } from "lucide-react";
 
+const PAGE_SIZE = 500;
+
 const buildTree = (items) => {
   if (!Array.isArray(items)) {
     console.warn("Expected items to be an array, but got:", items);
@@ -124,13 +126,24 @@ const FileSystemDisplay = ({ onClick, selectedItem }) => {
       try {
         setLoading(true);
         setError(null);
-        const res = await fetch("http://localhost:8000/api/filesystem");
-
-        if (!res.ok) {
-          throw new Error(`Failed to fetch file system: ${res.status}`);
-        }
+        // Page through the listing, following the cursor the API returns
+        const data = [];
+        let after = null;
+        do {
+          const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+          if (after !== null) params.set("after", after);
+          const res = await fetch(
+            `http://localhost:8000/api/filesystem?${params}`
+          );
+
+          if (!res.ok) {
+            throw new Error(`Failed to fetch file system: ${res.status}`);
+          }
+
+          data.push(...(await res.json()));
+          after = res.headers.get("X-Next-Cursor");
+        } while (after !== null);
 
-        const data = await res.json();
         const tree = buildTree(data);
         setFileSystem(tree);
       } catch (err) {
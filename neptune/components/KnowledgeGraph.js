@@ -360,7 +360,30 @@ function KnowledgeGraph() {
 
   // Process fetched data to add positions to nodes
   const processGraphData = (data) => {
-    // Calculate 3D positions for nodes in a spherical layout
+    // Use the server-side layout when every node has one, scaled to the scene
+    const laidOut = data.nodes.length > 0 && data.nodes.every(
+      (node) => typeof node.x === 'number' && typeof node.y === 'number'
+    );
+    if (laidOut) {
+      const xs = data.nodes.map((node) => node.x);
+      const ys = data.nodes.map((node) => node.y);
+      const centerX = (Math.min(...xs) + Math.max(...xs)) / 2;
+      const centerY = (Math.min(...ys) + Math.max(...ys)) / 2;
+      const extent = Math.max(
+        Math.max(...xs) - Math.min(...xs),
+        Math.max(...ys) - Math.min(...ys),
+        1e-6
+      );
+      const scale = 100 / extent;
+      const nodes = data.nodes.map((node) => ({
+        ...node,
+        position: [(node.x - centerX) * scale, (node.y - centerY) * scale, 0],
+        size: node.size || node.noteCount * 20 || 30
+      }));
+      return { nodes, links: data.links };
+    }
+
+    // Otherwise calculate 3D positions for nodes in a spherical layout
     const nodes = data.nodes.map((node, index) => {
       const phi = Math.acos(-1 + (2 * index) / data.nodes.length);
       const theta = Math.sqrt(data.nodes.length * Math.PI) * phi;